@@ -1,72 +1,116 @@
-from scapy.all import ARP, Ether, srp
+import argparse
 import datetime
 import os
 
-def scan_network(network):
+from arp_sweep import benchmark_simulated_sweep, interface_plan, sweep_interfaces
+from discovery_inventory import DiscoveryInventory, format_diff
+from report_writer import FORMATS, report_filename, write_report
+
+DEVICE_COLUMNS = ("ip", "mac")
+DEVICE_HEADERS = ("IP Address", "MAC Address")
+
+def iter_network(network, interfaces=None, status=None, **sweep_options):
+    """
+    Sweeps the given network with ARP in rate-limited chunks, yielding devices as they answer.
+    Args:
+        network (str): The network range to scan (e.g., '192.168.1.1/24').
+        interfaces (list): Interfaces to sweep it on in parallel, each optionally with its own range
+            as 'NAME=NETWORK' (default: scapy's default interface).
+        status (dict): If given, 'complete' is set to True once the sweep has finished without an error.
+        **sweep_options: Passed to arp_sweep.ArpSweep (chunk_size, rate, timeout, retries, backoff).
+    Yields:
+        dict: IP and MAC address (and interface) of each active device.
+    """
+    if status is not None:
+        status["complete"] = False
+    yield from sweep_interfaces(interface_plan(network, interfaces), **sweep_options)
+    if status is not None:
+        status["complete"] = True
+
+def scan_network(network, interfaces=None, **sweep_options):
     """
     Scans the given network for active devices using ARP requests.
     Args:
         network (str): The network range to scan (e.g., '192.168.1.1/24').
+        interfaces (list): Interfaces to sweep on (see iter_network).
+        **sweep_options: Passed to arp_sweep.ArpSweep.
     Returns:
         list: A list of dictionaries containing IP and MAC addresses of active devices.
     """
     devices = []
     try:
-        # Create an ARP request packet
-        arp_request = ARP(pdst=network)
-        ether_frame = Ether(dst="ff:ff:ff:ff:ff:ff")  # Broadcast MAC address
-        packet = ether_frame / arp_request
-
-        # Send the packet and receive responses
-        answered, _ = srp(packet, timeout=2, verbose=False)
-
-        # Parse responses to extract IP and MAC addresses
-        for sent, received in answered:
-            devices.append({"ip": received.psrc, "mac": received.hwsrc})
-
+        devices.extend(iter_network(network, interfaces, **sweep_options))
     except Exception as e:
         print(f"Error during network scan: {e}")
 
     return devices
 
-def generate_report(devices):
+def generate_report(devices, fmt="text", columns=DEVICE_COLUMNS, headers=DEVICE_HEADERS):
     """
-    Generates a report of discovered devices and saves it to a text file.
+    Generates a report of discovered devices and saves it to a file.
     Args:
-        devices (list): List of dictionaries containing device information.
+        devices (iterable): Dictionaries containing device information (a generator is written as it yields).
+        fmt (str): Report format: text, jsonl, csv or parquet.
+        columns (sequence): Device fields written, in order.
+        headers (sequence): Column headings for the text report.
     """
     # Generate a unique filename with date and time stamp
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    filename = f"network_devices_{timestamp}.txt"
+    filename = report_filename("network_devices", fmt, timestamp)
 
     try:
         # Write device information to the file
-        with open(filename, 'w') as file:
-            file.write(f"Network Device Discovery Report - {timestamp}\n")
-            file.write("=" * 50 + "\n")
-            file.write(f"{'IP Address':<20}{'MAC Address':<20}\n")
-            file.write("-" * 50 + "\n")
-            for device in devices:
-                file.write(f"{device['ip']:<20}{device['mac']:<20}\n")
+        count = write_report(devices, filename, columns, fmt,
+                             title=f"Network Device Discovery Report - {timestamp}",
+                             headers=headers, rule_width=max(50, 20 * len(columns)))
 
-        print(f"Report generated successfully: {os.path.abspath(filename)}")
+        print(f"Report generated successfully: {os.path.abspath(filename)} ({count} devices)")
 
     except Exception as e:
         print(f"Error writing report: {e}")
 
+def echo_devices(devices, found=None):
+    """Prints devices as they are discovered, passing them through unchanged (and collecting them into found)."""
+    for device in devices:
+        print(f"IP: {device['ip']}, MAC: {device['mac']}")
+        if found is not None:
+            found.append(device)
+        yield device
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ARP-based LAN device discovery")
     # Define the network range to scan (adjust based on your LAN subnet)
-    network_range = "192.168.1.1/24"
-
-    print(f"Scanning network: {network_range}")
-    discovered_devices = scan_network(network_range)
+    parser.add_argument("network", nargs="?", default="192.168.1.1/24", help="Network range to scan")
+    parser.add_argument("--interface", action="append", metavar="NAME[=NETWORK]",
+                        help="Interface to sweep on, optionally with its own range (repeat for several)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="ARP requests sent back to back")
+    parser.add_argument("--rate", type=float, default=1000, help="Maximum ARP requests per second")
+    parser.add_argument("--timeout", type=float, default=0.5, help="Seconds to wait for late replies")
+    parser.add_argument("--retries", type=int, default=2, help="Re-probe rounds for silent addresses")
+    parser.add_argument("--inventory", default=None,
+                        help="Device inventory database; prints what was added, removed or changed since the last sweep")
+    parser.add_argument("--format", choices=FORMATS, default="text", help="Report format")
+    parser.add_argument("--benchmark", action="store_true", help="Benchmark the sweep on a simulated LAN and exit")
+    args = parser.parse_args()
 
-    if discovered_devices:
-        print(f"Discovered {len(discovered_devices)} devices:")
-        for device in discovered_devices:
-            print(f"IP: {device['ip']}, MAC: {device['mac']}")
+    if args.benchmark:
+        benchmark_simulated_sweep()
+        raise SystemExit
 
-        # Generate a report
-        generate_report(discovered_devices)
-    else:
-        print("No devices found on the network.")
+    print(f"Scanning network: {args.network}")
+    try:
+        # Devices are printed and written to the report as they answer
+        status = {}
+        devices = iter_network(args.network, args.interface, status=status,
+                               chunk_size=args.chunk_size, rate=args.rate, timeout=args.timeout,
+                               retries=args.retries)
+        found = []
+        generate_report(echo_devices(devices, found), args.format)
+        if args.inventory:
+            # A sweep that failed or found nothing does not remove devices; one that finished only
+            # removes devices within the ranges it covered
+            print(format_diff(DiscoveryInventory(args.inventory).record_sweep(
+                found, complete=status["complete"] and bool(found),
+                scope=list(interface_plan(args.network, args.interface).values()))))
+    except Exception as e:
+        print(f"Error during network scan: {e}")
@@ -2,36 +2,60 @@
 # pip install pyasn1==0.4.8
 
 
-from scapy.all import ARP, Ether, srp
 from pysnmp.hlapi import (SnmpEngine, CommunityData, UdpTransportTarget, ContextData, ObjectType, ObjectIdentity, nextCmd)
+from pysnmp.proto import api, rfc1905
+from pyasn1.codec.ber import encoder, decoder
+import argparse
+import asyncio
 import datetime
+import itertools
 import os
+import random
+import time
 
-def scan_network(network):
+from arp_sweep import interface_plan, sweep_interfaces
+from discovery_inventory import DEFAULT_FINGERPRINT_TTL, DiscoveryInventory, format_diff
+from report_writer import FORMATS, report_filename, write_report
+
+DEVICE_COLUMNS = ("ip", "mac", "type", "os")
+DEVICE_HEADERS = ("IP Address", "MAC Address", "Device Type", "Operating System")
+
+# SNMPv2c varbind values that stand for "no value here" rather than data
+SNMP_EXCEPTION_VALUES = (rfc1905.NoSuchObject, rfc1905.NoSuchInstance, rfc1905.EndOfMibView)
+
+# System group OIDs fetched in a single GET PDU per device
+SYSTEM_OIDS = {
+    "sys_descr": "1.3.6.1.2.1.1.1.0",
+    "sys_object_id": "1.3.6.1.2.1.1.2.0",
+    "sys_uptime": "1.3.6.1.2.1.1.3.0",
+    "sys_name": "1.3.6.1.2.1.1.5.0",
+}
+
+def scan_network(network, interfaces=None, status=None, **sweep_options):
     """
-    Scans the given network for active devices using ARP requests.
+    Scans the given network for active devices using ARP requests, sent in rate-limited chunks
+    with re-probes of silent addresses (see arp_sweep.ArpSweep).
     Args:
         network (str): The network range to scan (e.g., '192.168.1.1/24').
+        interfaces (list): Interfaces to sweep on in parallel, each optionally as 'NAME=NETWORK'.
+        status (dict): If given, 'complete' is set to whether the sweep finished without an error.
+        **sweep_options: Passed to arp_sweep.ArpSweep (chunk_size, rate, timeout, retries, backoff).
     Returns:
         list: A list of dictionaries containing IP and MAC addresses of active devices.
     """
     devices = []
+    complete = False
     try:
-        # Create an ARP request packet
-        arp_request = ARP(pdst=network)
-        ether_frame = Ether(dst="ff:ff:ff:ff:ff:ff")  # Broadcast MAC address
-        packet = ether_frame / arp_request
-
-        # Send the packet and receive responses
-        answered, _ = srp(packet, timeout=2, verbose=False)
-
-        # Parse responses to extract IP and MAC addresses
-        for sent, received in answered:
-            devices.append({"ip": received.psrc, "mac": received.hwsrc})
+        for device in sweep_interfaces(interface_plan(network, interfaces), **sweep_options):
+            print(f"Found: {device['ip']} ({device['mac']})")
+            devices.append(device)
+        complete = True
 
     except Exception as e:
         print(f"Error during network scan: {e}")
 
+    if status is not None:
+        status["complete"] = complete
     return devices
 
 def get_device_info(ip):
@@ -57,64 +81,309 @@ def get_device_info(ip):
                 return {"type": "Unknown", "os": "Unknown"}
 
             for varBind in varBinds:
-                sys_descr = str(varBind[1]).lower()
-                if "cisco" in sys_descr:
-                    return {"type": "Router", "os": "Cisco IOS"}
-                elif "windows" in sys_descr:
-                    return {"type": "PC", "os": "Windows"}
-                elif "linux" in sys_descr or "ubuntu" in sys_descr:
-                    return {"type": "Server", "os": "Linux"}
-                elif "macos" in sys_descr or "darwin" in sys_descr:
-                    return {"type": "PC", "os": "MacOS"}
-                else:
-                    return {"type": "Unknown", "os": sys_descr}
+                return classify_sys_descr(str(varBind[1]))
 
     except Exception as e:
         print(f"Error retrieving SNMP data from {ip}: {e}")
         return {"type": "Unknown", "os": "Unknown"}
 
-def generate_report(devices):
+def classify_sys_descr(sys_descr):
     """
-    Generates a report of discovered devices and saves it to a text file.
+    Derives device type and operating system from an SNMP sysDescr string.
     Args:
-        devices (list): List of dictionaries containing device information.
+        sys_descr (str): The sysDescr value.
+    Returns:
+        dict: A dictionary containing the device type and operating system.
+    """
+    sys_descr = sys_descr.lower()
+    if "cisco" in sys_descr:
+        return {"type": "Router", "os": "Cisco IOS"}
+    elif "windows" in sys_descr:
+        return {"type": "PC", "os": "Windows"}
+    elif "linux" in sys_descr or "ubuntu" in sys_descr:
+        return {"type": "Server", "os": "Linux"}
+    elif "macos" in sys_descr or "darwin" in sys_descr:
+        return {"type": "PC", "os": "MacOS"}
+    else:
+        return {"type": "Unknown", "os": sys_descr}
+
+class SnmpPoller(asyncio.DatagramProtocol):
+    """
+    Sends SNMP GET requests to many agents over one shared UDP socket.
+    Replies are matched to their requests by request ID, so any number of
+    requests can be in flight at once without an SnmpEngine per device.
+    """
+
+    def __init__(self, community="public", version=api.protoVersion1):
+        self.pMod = api.protoModules[version]
+        self.community = community
+        self.transport = None
+        self._pending = {}  # request ID -> future waiting for the response PDU
+        self._request_ids = itertools.count(random.randint(1, 2**30))
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            while data:
+                message, data = decoder.decode(data, asn1Spec=self.pMod.Message())
+                pdu = self.pMod.apiMessage.getPDU(message)
+                future = self._pending.pop(int(self.pMod.apiPDU.getRequestID(pdu)), None)
+                if future is not None and not future.done():
+                    future.set_result(pdu)
+        except Exception:
+            pass  # Ignore malformed or unexpected datagrams
+
+    def error_received(self, exc):
+        pass  # ICMP port unreachable from silent hosts; the request simply times out
+
+    def build_request(self, request_id, oids):
+        """Encodes a GET message carrying all OIDs in one PDU."""
+        pdu = self.pMod.GetRequestPDU()
+        self.pMod.apiPDU.setDefaults(pdu)
+        self.pMod.apiPDU.setRequestID(pdu, request_id)
+        self.pMod.apiPDU.setVarBinds(pdu, [(oid, self.pMod.Null("")) for oid in oids])
+        message = self.pMod.Message()
+        self.pMod.apiMessage.setDefaults(message)
+        self.pMod.apiMessage.setCommunity(message, self.community)
+        self.pMod.apiMessage.setPDU(message, pdu)
+        return encoder.encode(message)
+
+    async def get(self, target, oids, timeout=2, retries=1):
+        """
+        Fetches several OIDs from one agent.
+        Args:
+            target (tuple): (ip, port) of the agent.
+            oids (list): OIDs to fetch.
+            timeout (float): Seconds to wait for each attempt.
+            retries (int): Number of retransmissions after the first attempt.
+        Returns:
+            dict: OID -> value for a successful reply, {"error": ...} for an SNMP error, or None on timeout.
+        """
+        loop = asyncio.get_running_loop()
+        for _ in range(retries + 1):
+            request_id = next(self._request_ids) % 2**31
+            future = loop.create_future()
+            self._pending[request_id] = future
+            self.transport.sendto(self.build_request(request_id, oids), target)
+            try:
+                pdu = await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                continue
+            finally:
+                self._pending.pop(request_id, None)
+
+            error_status = self.pMod.apiPDU.getErrorStatus(pdu)
+            if error_status:
+                return {"error": error_status.prettyPrint()}
+            return {str(oid): value for oid, value in self.pMod.apiPDU.getVarBinds(pdu)}
+        return None
+
+def _parse_system_info(response):
+    """Turns a system group GET response into the device info dictionary used by the report."""
+    if not response:
+        return {"type": "Unknown", "os": "Unknown", "error": "No response"}
+    if "error" in response:
+        return {"type": "Unknown", "os": "Unknown", "error": response["error"]}
+    values = {name: response.get(oid) for name, oid in SYSTEM_OIDS.items()}
+    # v2c agents answer missing objects with exception values, which are treated like absent ones
+    values = {name: None if isinstance(value, SNMP_EXCEPTION_VALUES) else value for name, value in values.items()}
+    sys_descr = values["sys_descr"]
+    info = classify_sys_descr(str(sys_descr)) if sys_descr is not None else {"type": "Unknown", "os": "Unknown"}
+    info["sys_name"] = str(values["sys_name"]) if values["sys_name"] is not None else ""
+    info["sys_object_id"] = values["sys_object_id"].prettyPrint() if values["sys_object_id"] is not None else ""
+    info["sys_uptime"] = int(values["sys_uptime"]) if values["sys_uptime"] is not None else None
+    return info
+
+async def poll_devices_async(targets, community="public", concurrency=256, timeout=2, retries=1, deadline=30,
+                             version=api.protoVersion1):
+    """
+    Polls the system group of many devices concurrently through one SNMP socket.
+    Args:
+        targets (list): IP addresses, or (ip, port) tuples.
+        community (str): SNMP community string.
+        concurrency (int): Maximum number of devices with a request in flight.
+        timeout (float): Seconds to wait for each attempt.
+        retries (int): Number of retransmissions per device.
+        deadline (float): Seconds the whole sweep may take; unfinished devices are reported as Unknown.
+        version: api.protoVersion1 or api.protoVersion2c.
+    Returns:
+        dict: Target -> device info dictionary (type, os, sys_name, sys_object_id, sys_uptime).
+    """
+    loop = asyncio.get_running_loop()
+    transport, poller = await loop.create_datagram_endpoint(lambda: SnmpPoller(community, version),
+                                                            local_addr=("0.0.0.0", 0))
+    semaphore = asyncio.Semaphore(concurrency)
+    oids = list(SYSTEM_OIDS.values())
+    results = {}
+
+    async def poll(target):
+        address = (target, 161) if isinstance(target, str) else target
+        async with semaphore:
+            response = await poller.get(address, oids, timeout, retries)
+        try:
+            results[target] = _parse_system_info(response)
+        except Exception as e:  # An odd reply must not lose the device or leave a failed task behind
+            results[target] = {"type": "Unknown", "os": "Unknown", "error": f"Unparseable response: {e}"}
+
+    tasks = [asyncio.create_task(poll(target)) for target in targets]
+    try:
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=deadline)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+    finally:
+        transport.close()
+
+    return {target: results.get(target, {"type": "Unknown", "os": "Unknown", "error": "Deadline exceeded"})
+            for target in targets}
+
+def poll_devices(targets, **options):
+    """
+    Synchronous wrapper around poll_devices_async.
+    Args:
+        targets (list): IP addresses, or (ip, port) tuples.
+        **options: Passed through to poll_devices_async.
+    Returns:
+        dict: Target -> device info dictionary.
+    """
+    return asyncio.run(poll_devices_async(targets, **options))
+
+class SimulatedAgent(asyncio.DatagramProtocol):
+    """Minimal SNMP agent answering system group GETs, used to benchmark the poller on loopback."""
+
+    def __init__(self, sys_descr, sys_name, version=api.protoVersion1):
+        self.pMod = api.protoModules[version]
+        self.values = {
+            SYSTEM_OIDS["sys_descr"]: self.pMod.OctetString(sys_descr),
+            SYSTEM_OIDS["sys_object_id"]: self.pMod.ObjectIdentifier((1, 3, 6, 1, 4, 1, 9, 1, 1)),
+            SYSTEM_OIDS["sys_uptime"]: self.pMod.TimeTicks(123456),
+            SYSTEM_OIDS["sys_name"]: self.pMod.OctetString(sys_name),
+        }
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        request, _ = decoder.decode(data, asn1Spec=self.pMod.Message())
+        response = self.pMod.apiMessage.getResponse(request)
+        request_pdu = self.pMod.apiMessage.getPDU(request)
+        response_pdu = self.pMod.apiMessage.getPDU(response)
+        self.pMod.apiPDU.setVarBinds(response_pdu, [(oid, self.values.get(str(oid), self.pMod.Null("")))
+                                                    for oid, _ in self.pMod.apiPDU.getVarBinds(request_pdu)])
+        self.transport.sendto(encoder.encode(response), addr)
+
+async def _benchmark(agent_count, silent_count, concurrency):
+    loop = asyncio.get_running_loop()
+    transports, targets = [], []
+    try:
+        for index in range(agent_count):
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: SimulatedAgent(f"Cisco IOS Software, simulated agent {index}", f"agent-{index}"),
+                local_addr=("127.0.0.1", 0))
+            transports.append(transport)
+            targets.append(transport.get_extra_info("sockname")[:2])
+        for _ in range(silent_count):  # Bound but never answering, like a host without SNMP
+            transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, local_addr=("127.0.0.1", 0))
+            transports.append(transport)
+            targets.append(transport.get_extra_info("sockname")[:2])
+
+        start = time.perf_counter()
+        results = await poll_devices_async(targets, concurrency=concurrency, timeout=1, retries=1, deadline=10)
+        elapsed = time.perf_counter() - start
+    finally:
+        for transport in transports:
+            transport.close()
+
+    answered = sum(1 for info in results.values() if info.get("sys_name"))
+    print(f"[+] Polled {len(targets)} simulated agents ({silent_count} silent) in {elapsed:.2f}s, "
+          f"{answered} answered ({len(targets) / elapsed:.0f} devices/s)")
+    print(f"    A sequential sweep with a new SnmpEngine per device would spend at least "
+          f"{silent_count * 15}s on the silent agents alone (5s timeout x 3 attempts)")
+
+def benchmark_simulated_agents(agent_count=300, silent_count=20, concurrency=256):
+    """
+    Benchmarks the concurrent poller against simulated agents on loopback.
+    Args:
+        agent_count (int): Number of answering agents.
+        silent_count (int): Number of agents that never answer.
+        concurrency (int): Concurrency cap for the poller.
+    """
+    asyncio.run(_benchmark(agent_count, silent_count, concurrency))
+
+def generate_report(devices, fmt="text"):
+    """
+    Generates a report of discovered devices and saves it to a file.
+    Args:
+        devices (iterable): Dictionaries containing device information (a generator is written as it yields).
+        fmt (str): Report format: text, jsonl, csv or parquet.
     """
     # Generate a unique filename with date and time stamp
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    filename = f"network_devices_{timestamp}.txt"
+    filename = report_filename("network_devices", fmt, timestamp)
 
     try:
         # Write device information to the file
-        with open(filename, 'w') as file:
-            file.write(f"Enhanced Network Device Discovery Report - {timestamp}\n")
-            file.write("=" * 80 + "\n")
-            file.write(f"{'IP Address':<20}{'MAC Address':<20}{'Device Type':<20}{'Operating System':<20}\n")
-            file.write("-" * 80 + "\n")
-            for device in devices:
-                file.write(f"{device['ip']:<20}{device['mac']:<20}{device['type']:<20}{device['os']:<20}\n")
+        count = write_report(devices, filename, DEVICE_COLUMNS, fmt,
+                             title=f"Enhanced Network Device Discovery Report - {timestamp}",
+                             headers=DEVICE_HEADERS, rule_width=80)
 
-        print(f"Report generated successfully: {os.path.abspath(filename)}")
+        print(f"Report generated successfully: {os.path.abspath(filename)} ({count} devices)")
 
     except Exception as e:
         print(f"Error writing report: {e}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enhanced network device discovery")
+    parser.add_argument("--community", default="public", help="SNMP community string")
+    parser.add_argument("--concurrency", type=int, default=256, help="Maximum devices polled at once")
+    parser.add_argument("--deadline", type=float, default=30, help="Seconds the whole SNMP sweep may take")
+    parser.add_argument("--interface", action="append", metavar="NAME[=NETWORK]",
+                        help="Interface to sweep on, optionally with its own range (repeat for several)")
+    parser.add_argument("--rate", type=float, default=1000, help="Maximum ARP requests per second")
+    parser.add_argument("--retries", type=int, default=2, help="ARP re-probe rounds for silent addresses")
+    parser.add_argument("--inventory", default="discovery_inventory.db",
+                        help="Device inventory database (caches SNMP results between runs)")
+    parser.add_argument("--fingerprint-ttl", type=float, default=DEFAULT_FINGERPRINT_TTL / 3600,
+                        help="Hours before a cached SNMP result is refreshed")
+    parser.add_argument("--format", choices=FORMATS, default="text", help="Report format")
+    parser.add_argument("--benchmark", action="store_true", help="Benchmark the SNMP poller on loopback and exit")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_simulated_agents(concurrency=args.concurrency)
+        raise SystemExit
+
     # Allow user input for network range
     network_range = input("Enter the network range to scan (e.g., '192.168.1.1/24'): ")
     
     print(f"Scanning network: {network_range}")
-    discovered_devices = scan_network(network_range)
+    status = {}
+    discovered_devices = scan_network(network_range, args.interface, status=status,
+                                      rate=args.rate, retries=args.retries)
+
+    # Compare with the previous sweep. Devices are only reported removed after a sweep that finished
+    # and found something, and only within the ranges it covered.
+    inventory = DiscoveryInventory(args.inventory, fingerprint_ttl=args.fingerprint_ttl * 3600)
+    print(format_diff(inventory.record_sweep(
+        discovered_devices, complete=status["complete"] and bool(discovered_devices),
+        scope=list(interface_plan(network_range, args.interface).values()))))
 
     if discovered_devices:
         print(f"Discovered {len(discovered_devices)} devices:")
         
-        # Enrich data with device type and OS information
+        # Enrich data with device type and OS information; only new, changed or expired devices
+        # are polled (all of them concurrently), the rest come from the inventory
+        polled = inventory.enrich(discovered_devices, lambda ips: poll_devices(
+            ips, community=args.community, concurrency=args.concurrency, deadline=args.deadline))
+        print(f"Polled {polled} devices over SNMP, {len(discovered_devices) - polled} from the inventory cache")
         for device in discovered_devices:
-            info = get_device_info(device['ip'])
-            device.update(info)
             print(f"IP: {device['ip']}, MAC: {device['mac']}, Type: {device['type']}, OS: {device['os']}")
 
         # Generate a report
-        generate_report(discovered_devices)
+        generate_report(discovered_devices, args.format)
     else:
         print("No devices found on the network.")
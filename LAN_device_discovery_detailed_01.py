@@ -1,6 +1,12 @@
 import os
+import argparse
 import datetime
 
+from report_writer import FORMATS, report_filename, write_report
+
+DEVICE_COLUMNS = ("ip", "type", "os")
+DEVICE_HEADERS = ("IP Address", "Device Type", "Operating System")
+
 def get_device_info_via_snmp(ip, community="public"):
     """
     Fetch device information using SNMP command-line tools.
@@ -30,36 +36,36 @@ def get_device_info_via_snmp(ip, community="public"):
         print(f"Error retrieving SNMP data from {ip}: {e}")
         return {"type": "Unknown", "os": "Unknown"}
 
-def generate_report(devices):
+def generate_report(devices, fmt="text"):
     """
-    Generates a report of discovered devices and saves it to a text file.
+    Generates a report of discovered devices and saves it to a file.
     Args:
-        devices (list): List of dictionaries containing device information.
+        devices (iterable): Dictionaries containing device information (a generator is written as it yields).
+        fmt (str): Report format: text, jsonl, csv or parquet.
     """
+    # Generate a unique filename with date and time stamp
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    filename = f"network_devices_{timestamp}.txt"
+    filename = report_filename("network_devices", fmt, timestamp)
 
     try:
-        with open(filename, 'w') as file:
-            file.write(f"Enhanced Network Device Discovery Report - {timestamp}\n")
-            file.write("=" * 80 + "\n")
-            file.write(f"{'IP Address':<20}{'Device Type':<20}{'Operating System':<20}\n")
-            file.write("-" * 80 + "\n")
-            for device in devices:
-                file.write(f"{device['ip']:<20}{device['type']:<20}{device['os']:<20}\n")
+        # Write device information to the file
+        count = write_report(devices, filename, DEVICE_COLUMNS, fmt,
+                             title=f"Enhanced Network Device Discovery Report - {timestamp}",
+                             headers=DEVICE_HEADERS, rule_width=80)
 
-        print(f"Report generated successfully: {filename}")
+        print(f"Report generated successfully: {filename} ({count} devices)")
 
     except Exception as e:
         print(f"Error writing report: {e}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SNMP device details report")
+    parser.add_argument("--format", choices=FORMATS, default="text", help="Report format")
+    args = parser.parse_args()
+
     # Define IPs to scan (replace with actual IPs)
     ip_addresses = ["192.168.1.1", "192.168.1.100", "192.168.1.101"]
-    
-    devices = []
-    for ip in ip_addresses:
-        info = get_device_info_via_snmp(ip)
-        devices.append({"ip": ip, **info})
 
-    generate_report(devices)
+    # Each device is written as soon as it has been queried
+    devices = ({"ip": ip, **get_device_info_via_snmp(ip)} for ip in ip_addresses)
+    generate_report(devices, args.format)
@@ -1,12 +1,11 @@
-import re
+from critical_error_extractor import iter_critical_errors
 
 def extract_critical_errors(log_file):
-    with open(log_file, 'r') as file:
-        for line in file:
-            if re.search(r'critical', line.lower()):
-                print(line.strip())
+    for line in iter_critical_errors(log_file, keywords=[r'critical'], regex=True):
+        print(line.decode(errors='replace'))
 
-extract_critical_errors('system_logs.txt')
+if __name__ == "__main__":
+    extract_critical_errors('system_logs.txt')
 
 # A script that reads a log file and extracts lines containing the keyword "critical" using regular expressions.
 # This can be useful for identifying critical errors in network device logs.
\ No newline at end of file
@@ -1,21 +1,13 @@
-import re
-import datetime
+import critical_error_extractor
 
 def extract_critical_errors(input_log_file):
-    # Generate a unique log file name based on date and time
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    output_log_file = f"critical_errors_{timestamp}.txt"
-
-    # Open the input log file and create a new output log file
-    with open(input_log_file, 'r') as infile, open(output_log_file, 'w') as outfile:
-        for line in infile:
-            if re.search(r'critical', line.lower()):  # Search for "critical" in each line
-                outfile.write(line.strip() + '\n')  # Write the critical error to the new log file
-
-    print(f"Critical errors have been extracted to: {output_log_file}")
+    # Single-pass, memory-mapped search split across a process pool; the matches are written
+    # to critical_errors_<timestamp>.txt in input order
+    return critical_error_extractor.extract_critical_errors(input_log_file, keywords=['critical'])
 
 # Example usage
-extract_critical_errors('system_logs.txt')
+if __name__ == "__main__":
+    extract_critical_errors('system_logs.txt')
 # A script that reads a log file, extracts lines containing the keyword "critical", and writes them to a new log file with a timestamp in the filename. This is useful for archiving critical errors separately.
 # This can be useful for identifying critical errors in network device logs
 # and archiving them for future reference. The output log file is named with a timestamp to avoid overwriting previous logs.
@@ -0,0 +1,313 @@
+import heapq
+import ipaddress
+import queue
+import random
+import socket
+import threading
+import time
+
+BROADCAST = "ff:ff:ff:ff:ff:ff"
+ARP_TARGET_OFFSET = 38  # Ethernet header (14) + ARP fields before the target protocol address (24)
+
+
+def expand_network(network):
+    """
+    Lists the host addresses of a network.
+    Args:
+        network (str): A CIDR range (host bits may be set, e.g. '192.168.1.1/24') or a single address.
+    Returns:
+        list: Address strings.
+    """
+    net = ipaddress.ip_network(network, strict=False)
+    if net.num_addresses == 1:
+        return [str(net.network_address)]
+    return [str(address) for address in net.hosts()]
+
+
+class ScapyTransport:
+    """
+    Sends ARP requests and reads replies on one interface through a scapy layer-2 socket.
+    Requests are built once from a template and only the target address is patched in.
+    """
+
+    def __init__(self, interface=None):
+        """
+        Args:
+            interface (str): Interface to use (default: scapy's default interface).
+        """
+        from scapy.all import ARP, Ether, conf, get_if_addr, get_if_hwaddr
+
+        self.interface = interface or conf.iface
+        self._arp = ARP
+        mac = get_if_hwaddr(self.interface)
+        self._template = bytes(Ether(dst=BROADCAST, src=mac) /
+                               ARP(hwsrc=mac, psrc=get_if_addr(self.interface), pdst="0.0.0.0"))
+        self._socket = conf.L2socket(iface=self.interface)
+
+    def send(self, ips):
+        for ip in ips:
+            frame = (self._template[:ARP_TARGET_OFFSET] + socket.inet_aton(ip)
+                     + self._template[ARP_TARGET_OFFSET + 4:])
+            self._socket.send(frame)
+
+    def recv(self, timeout):
+        """
+        Waits up to timeout seconds for ARP replies.
+        Returns:
+            list: (ip, mac) tuples, returned as soon as any reply has arrived.
+        """
+        replies = []
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if not self._socket.select([self._socket], max(0.0, remaining)):
+                return replies
+            packet = self._socket.recv()
+            if packet is not None and packet.haslayer(self._arp) and packet[self._arp].op == 2:
+                replies.append((packet[self._arp].psrc, packet[self._arp].hwsrc))
+            if replies and not self._socket.select([self._socket], 0):
+                return replies
+            if remaining <= 0:
+                return replies
+
+    def close(self):
+        self._socket.close()
+
+
+class SimulatedTransport:
+    """
+    Simulated LAN for testing and benchmarking sweeps without a network.
+    Live hosts answer after a random delay. Like a real segment under a burst of broadcasts,
+    requests beyond what the hosts and switches can absorb (a token bucket of `burst` requests
+    refilled at `capacity` per second) are dropped, and every reply is also lost with probability `loss`.
+    """
+
+    def __init__(self, hosts, capacity=2000, burst=256, loss=0.01, delay=(0.001, 0.02), seed=None):
+        """
+        Args:
+            hosts (dict): IP address -> MAC address of the live hosts.
+            capacity (float): Requests per second absorbed without loss.
+            burst (int): Requests absorbed in a burst.
+            loss (float): Probability that any single reply is lost.
+            delay (tuple): Range of reply delays in seconds.
+            seed (int): Random seed.
+        """
+        self.hosts = hosts
+        self.capacity = capacity
+        self.burst = burst
+        self.loss = loss
+        self.delay = delay
+        self.sent = 0
+        self._random = random.Random(seed)
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._pending = []  # heap of (due, ip, mac)
+
+    def send(self, ips):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.capacity)
+        self._refilled = now
+        for ip in ips:
+            self.sent += 1
+            if self._tokens < 1:
+                continue
+            self._tokens -= 1
+            mac = self.hosts.get(ip)
+            if mac is not None and self._random.random() >= self.loss:
+                heapq.heappush(self._pending, (now + self._random.uniform(*self.delay), ip, mac))
+
+    def recv(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            replies = []
+            while self._pending and self._pending[0][0] <= now:
+                _, ip, mac = heapq.heappop(self._pending)
+                replies.append((ip, mac))
+            if replies or now >= deadline:
+                return replies
+            time.sleep(min(deadline, self._pending[0][0] if self._pending else deadline) - now)
+
+    def close(self):
+        pass
+
+
+class ArpSweep:
+    """
+    Sweeps address ranges with ARP in rate-limited chunks and yields devices as they answer.
+    Addresses that stay silent are re-probed in further rounds, each waiting longer (by `backoff`)
+    for late replies. A re-probe round that still finds more than `loss_threshold` of the devices
+    found so far means requests are being dropped, so the next round also sends more slowly;
+    a round that finds nothing new ends the sweep, as the remaining addresses are simply unused.
+    """
+
+    def __init__(self, transport, chunk_size=256, rate=1000.0, timeout=0.5, retries=2, backoff=2.0,
+                 loss_threshold=0.05):
+        """
+        Args:
+            transport: Object with send(ips), recv(timeout) -> [(ip, mac)] and close().
+            chunk_size (int): Requests sent back to back.
+            rate (float): Requests per second across chunks (None for no limit).
+            timeout (float): Seconds to wait for late replies after the first round.
+            retries (int): Re-probe rounds for addresses that did not answer.
+            backoff (float): Factor by which each re-probe round lengthens the wait (and lowers the rate).
+            loss_threshold (float): Share of devices recovered by a re-probe round above which the rate is lowered.
+        """
+        self.transport = transport
+        self.chunk_size = chunk_size
+        self.rate = rate
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.loss_threshold = loss_threshold
+        self.sent = 0
+        self.rounds = 0
+
+    def sweep(self, targets):
+        """
+        Sweeps the targets.
+        Args:
+            targets (iterable): IP address strings.
+        Yields:
+            dict: ip and mac of each device, the first time it answers.
+        """
+        pending = list(dict.fromkeys(targets))
+        wanted = set(pending)
+        found = set()
+        rate, timeout = self.rate, self.timeout
+
+        def answered(replies):
+            for ip, mac in replies:
+                if ip in wanted and ip not in found:
+                    found.add(ip)
+                    yield {"ip": ip, "mac": mac}
+
+        for attempt in range(self.retries + 1):
+            self.rounds += 1
+            known = len(found)
+            next_send = time.monotonic()
+            for start in range(0, len(pending), self.chunk_size):
+                # Pace the chunks, collecting replies while waiting for the next slot
+                while (remaining := next_send - time.monotonic()) > 0:
+                    yield from answered(self.transport.recv(remaining))
+                chunk = [ip for ip in pending[start:start + self.chunk_size] if ip not in found]
+                self.transport.send(chunk)
+                self.sent += len(chunk)
+                if rate:
+                    next_send += len(chunk) / rate
+                yield from answered(self.transport.recv(0))
+
+            deadline = time.monotonic() + timeout
+            while (remaining := deadline - time.monotonic()) > 0:
+                yield from answered(self.transport.recv(remaining))
+
+            pending = [ip for ip in pending if ip not in found]
+            if not pending:
+                return
+            if attempt:
+                recovered = len(found) - known
+                if not recovered:
+                    return
+                if rate and recovered > self.loss_threshold * len(found):
+                    rate /= self.backoff
+            timeout *= self.backoff
+
+
+def interface_plan(network, interfaces=None):
+    """
+    Builds a sweep plan for sweep_interfaces.
+    Args:
+        network (str): Range swept on every interface that does not name its own.
+        interfaces (list): Interface names, each optionally with its own range as 'NAME=NETWORK'
+            (default: scapy's default interface).
+    Returns:
+        dict: Interface name (None for the default) -> network.
+    """
+    plan = {}
+    for value in interfaces or [None]:
+        if value is None:
+            plan[None] = network
+        else:
+            interface, _, interface_network = value.partition("=")
+            plan[interface] = interface_network or network
+    return plan
+
+
+def sweep_interfaces(plan, transport_factory=ScapyTransport, **options):
+    """
+    Sweeps several interfaces in parallel, one thread each, yielding devices as they answer.
+    Args:
+        plan (dict): Interface name -> network (CIDR string) or list of addresses to sweep on it.
+        transport_factory (callable): Called with an interface name; returns a transport.
+        **options: Passed to ArpSweep (chunk_size, rate, timeout, retries, backoff).
+    Yields:
+        dict: ip, mac and interface of each device.
+    """
+    results = queue.Queue()
+    stop = threading.Event()
+    finished = object()
+
+    def runner(interface, targets):
+        transport = None
+        try:
+            transport = transport_factory(interface)
+            if isinstance(targets, str):
+                targets = expand_network(targets)
+            for device in ArpSweep(transport, **options).sweep(targets):
+                if stop.is_set():
+                    break
+                results.put(dict(device, interface=interface))
+        except Exception as e:
+            results.put(e)
+        finally:
+            if transport is not None:
+                transport.close()
+            results.put(finished)
+
+    threads = [threading.Thread(target=runner, args=item, daemon=True) for item in plan.items()]
+    for thread in threads:
+        thread.start()
+    try:
+        running = len(threads)
+        while running:
+            item = results.get()
+            if item is finished:
+                running -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        stop.set()
+
+
+def benchmark_simulated_sweep(network="10.20.0.0/20", live_fraction=0.3, seed=1):
+    """
+    Compares a single-burst sweep (the old srp call) with the chunked adaptive sweep on a simulated LAN.
+    Args:
+        network (str): Simulated network.
+        live_fraction (float): Share of addresses with a live host.
+        seed (int): Random seed.
+    """
+    targets = expand_network(network)
+    rng = random.Random(seed)
+    hosts = {ip: "02:00:%02x:%02x:%02x:%02x" % tuple(socket.inet_aton(ip))
+             for ip in targets if rng.random() < live_fraction}
+    print(f"[+] Simulated {network}: {len(targets)} addresses, {len(hosts)} live hosts")
+
+    configurations = {
+        "single burst, 2 s wait": dict(chunk_size=len(targets), rate=None, timeout=2.0, retries=0),
+        "chunked + adaptive re-probes": dict(chunk_size=256, rate=1500, timeout=0.25, retries=3),
+    }
+    for label, options in configurations.items():
+        transport = SimulatedTransport(hosts, seed=seed)
+        sweep = ArpSweep(transport, **options)
+        start = time.perf_counter()
+        first = None
+        found = 0
+        for _ in sweep.sweep(targets):
+            found += 1
+            first = first or time.perf_counter() - start
+        elapsed = time.perf_counter() - start
+        print(f"[+] {label}: found {found}/{len(hosts)} in {elapsed:.2f}s "
+              f"(first after {first or 0:.3f}s, {sweep.sent} requests, {sweep.rounds} rounds)")
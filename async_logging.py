@@ -0,0 +1,268 @@
+import atexit
+import collections
+import logging
+import os
+import tempfile
+import threading
+import time
+
+POLICIES = ("block", "drop_new", "drop_oldest")
+DEFAULT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+IDLE_CHECK_SECONDS = 1.0  # How often an idle writer checks for time-based rotation
+
+
+class BatchLogHandler(logging.Handler):
+    """
+    Logging handler that keeps file I/O off the logging threads.
+    emit() only appends the record to a bounded in-memory queue; a single writer thread takes
+    everything queued at once, formats it and writes it with one write (and flush) per batch, rotating
+    the file by size or age. When the queue is full, 'block' makes producers wait (backpressure),
+    while 'drop_new' and 'drop_oldest' discard records and note how many were lost in the log itself.
+    """
+
+    def __init__(self, filename, max_queue=100_000, policy="block", block_timeout=None, batch_size=4096,
+                 max_bytes=None, rotate_seconds=None, backup_count=5, fsync=False, encoding="utf-8"):
+        """
+        Args:
+            filename (str): Log file.
+            max_queue (int): Records waiting for the writer before the full-queue policy applies.
+            policy (str): 'block', 'drop_new' or 'drop_oldest'.
+            block_timeout (float): With 'block', seconds to wait before dropping the record (None waits forever).
+            batch_size (int): Most records written per batch.
+            max_bytes (int): Rotate before the next batch once the file has reached this size (None for no limit).
+            rotate_seconds (float): Rotate once the file is this old (None for no limit).
+            backup_count (int): Rotated files kept as filename.1 ... filename.N.
+            fsync (bool): Sync each batch to disk, so a crash loses at most the records still queued.
+            encoding (str): File encoding.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r} (expected one of {', '.join(POLICIES)})")
+        super().__init__()
+        self.filename = os.path.abspath(filename)
+        self.max_queue = max_queue
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self.fsync = fsync
+        self.encoding = encoding
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self._unreported_drops = 0  # Drops since the last batch was taken
+        self._first_drop = None     # Time of the first of them
+        self._processed = 0  # Queued records written or evicted
+        self._stopping = False
+        self._records = collections.deque()
+        self._mutex = threading.Lock()
+        self._not_empty = threading.Condition(self._mutex)
+        self._not_full = threading.Condition(self._mutex)
+        self._drained = threading.Condition(self._mutex)
+        self._open()
+        self._writer = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._writer.start()
+
+    def _open(self):
+        self._file = open(self.filename, "a", encoding=self.encoding)
+        self._size = self._file.tell()
+        self._opened = time.time()
+
+    def emit(self, record):
+        try:
+            # Merge the arguments now, as they may change after this call; formatting is left to the writer
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None
+            with self._mutex:
+                if len(self._records) >= self.max_queue:
+                    if self.policy == "drop_new":
+                        self._drop()
+                        return
+                    if self.policy == "drop_oldest":
+                        self._records.popleft()
+                        self._processed += 1
+                        self._drop()
+                    elif not self._not_full.wait_for(
+                            lambda: len(self._records) < self.max_queue or self._stopping, self.block_timeout):
+                        self._drop()
+                        return
+                self._records.append(record)
+                self.enqueued += 1
+                if len(self._records) == 1:
+                    self._not_empty.notify()
+        except Exception:
+            self.handleError(record)
+
+    def _drop(self):
+        # Called with the mutex held
+        self.dropped += 1
+        self._unreported_drops += 1
+        if self._first_drop is None:
+            self._first_drop = time.time()
+
+    def _take(self):
+        if len(self._records) <= self.batch_size:
+            records, self._records = self._records, collections.deque()
+            return records
+        return [self._records.popleft() for _ in range(self.batch_size)]
+
+    def _run(self):
+        while True:
+            with self._mutex:
+                if not self._records and not self._stopping:
+                    self._not_empty.wait(IDLE_CHECK_SECONDS)
+                records = self._take()
+                drops, first_drop = self._unreported_drops, self._first_drop
+                self._unreported_drops, self._first_drop = 0, None
+                stopping = self._stopping
+            if records or drops:
+                try:
+                    self._write(records, drops, first_drop)
+                except Exception:
+                    self.handleError(records[0] if records else logging.makeLogRecord({}))
+            else:
+                self._rotate_if_due()
+            with self._mutex:
+                self._processed += len(records)
+                self._not_full.notify_all()
+                self._drained.notify_all()
+            if stopping and not records:
+                return
+
+    def _write(self, records, drops=0, first_drop=None):
+        self._rotate_if_due()
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+        if drops:
+            # Written after the batch's records and stamped with the time of the first drop, so it does not
+            # appear ahead of records that were queued before the drops
+            note = logging.makeLogRecord({"msg": f"{drops} log records dropped (queue full) since "
+                                                 f"{time.strftime('%H:%M:%S', time.localtime(first_drop))}",
+                                          "levelno": logging.WARNING, "levelname": "WARNING", "name": __name__})
+            note.created, note.msecs = first_drop, (first_drop % 1) * 1000
+            lines.append(self.format(note))
+        lines.append("")
+        self._file.write("\n".join(lines))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._size = self._file.tell()
+        self.written += len(records)
+        self.batches += 1
+
+    def _rotate_if_due(self):
+        if not self._size:
+            return
+        if ((self.max_bytes and self._size >= self.max_bytes)
+                or (self.rotate_seconds and time.time() - self._opened >= self.rotate_seconds)):
+            self._file.close()
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.filename}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.filename}.{index + 1}")
+            if self.backup_count:
+                os.replace(self.filename, f"{self.filename}.1")
+            else:
+                os.remove(self.filename)
+            self._open()
+
+    def flush(self):
+        """Waits until every record queued so far has been written."""
+        with self._mutex:
+            target = self.enqueued
+            self._drained.wait_for(lambda: self._processed >= target or not self._writer.is_alive())
+
+    def close(self):
+        """Writes the remaining records, stops the writer thread and closes the file."""
+        with self._mutex:
+            self._stopping = True
+            self._not_empty.notify()
+            self._not_full.notify_all()
+        self._writer.join()
+        if not self._file.closed:
+            self._file.close()
+        super().close()
+
+
+def configure_logging(filename, level=logging.INFO, format=DEFAULT_FORMAT, logger=None, **options):
+    """
+    Sends a logger's records (the root logger by default) through a BatchLogHandler, in place of
+    logging.basicConfig(filename=...). The handler is closed, and its queue drained, at exit.
+    Args:
+        filename (str): Log file.
+        level (int): Logger level.
+        format (str): Record format.
+        logger (logging.Logger): Logger to configure (default: the root logger).
+        **options: Passed to BatchLogHandler (max_queue, policy, batch_size, max_bytes, rotate_seconds, ...).
+    Returns:
+        BatchLogHandler: The installed handler.
+    """
+    logger = logger or logging.getLogger()
+    handler = BatchLogHandler(filename, **options)
+    handler.setFormatter(logging.Formatter(format))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    atexit.register(handler.close)
+    return handler
+
+
+class _SyncedFileHandler(logging.FileHandler):
+    """FileHandler that syncs every record to disk, the per-record equivalent of BatchLogHandler(fsync=True)."""
+
+    def flush(self):
+        super().flush()
+        if self.stream:
+            os.fsync(self.stream.fileno())
+
+
+def benchmark_logging(record_count=100_000, producers=4, format="%(asctime)s - %(message)s", fsync=False):
+    """
+    Compares a plain FileHandler (what logging.basicConfig installs) with BatchLogHandler, logging
+    telemetry-style records from several threads.
+    Args:
+        record_count (int): Records logged in total.
+        producers (int): Threads logging concurrently.
+        format (str): Record format.
+        fsync (bool): Sync to disk, per record for FileHandler and per batch for BatchLogHandler.
+    """
+    def run(handler):
+        logger = logging.Logger(f"benchmark-{id(handler)}")
+        handler.setFormatter(logging.Formatter(format))
+        logger.addHandler(handler)
+        per_thread = record_count // producers
+
+        def produce(thread):
+            for index in range(per_thread):
+                logger.info("Data: %s", f"Latency: {index % 100}ms, thread {thread}")
+
+        threads = [threading.Thread(target=produce, args=(thread,)) for thread in range(producers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        produced = time.perf_counter() - start
+        handler.close()
+        return produced, time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        plain = _SyncedFileHandler if fsync else logging.FileHandler
+        results = {
+            f"{plain.__name__.lstrip('_')}": run(plain(os.path.join(directory, "plain.log"))),
+            "BatchLogHandler": run(BatchLogHandler(os.path.join(directory, "batched.log"), fsync=fsync)),
+        }
+    count = record_count // producers * producers
+    print(f"[+] {count} records from {producers} threads{', synced to disk' if fsync else ''}")
+    for label, (produced, total) in results.items():
+        print(f"[+] {label}: producers done after {produced:.2f}s ({count / produced:,.0f} records/s), "
+              f"all written after {total:.2f}s ({count / total:,.0f} records/s)")
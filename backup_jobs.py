@@ -0,0 +1,344 @@
+import contextlib
+import logging
+import os
+import queue
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS backup_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    submitted REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS backup_job_devices (
+    job_id INTEGER NOT NULL,
+    device_id INTEGER NOT NULL,
+    name TEXT,
+    state TEXT NOT NULL,         -- queued, running, done, failed, skipped or rejected
+    queued_at REAL,
+    started REAL,
+    finished REAL,
+    elapsed REAL,
+    error TEXT,
+    duplicate_of INTEGER,        -- job already handling the device, for skipped devices
+    PRIMARY KEY (job_id, device_id)
+);
+CREATE INDEX IF NOT EXISTS backup_job_devices_state ON backup_job_devices (job_id, state);
+-- One row per device with a backup queued or running in any process
+CREATE TABLE IF NOT EXISTS backup_in_flight (
+    device_id INTEGER PRIMARY KEY,
+    job_id INTEGER NOT NULL,
+    claimed_at REAL NOT NULL,
+    owner TEXT                   -- backup_owners.owner of the process running the backup
+);
+-- One row per running service instance, refreshed by its heartbeat
+CREATE TABLE IF NOT EXISTS backup_owners (
+    owner TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    heartbeat REAL NOT NULL
+);
+"""
+
+DEFAULT_STALE_AFTER = 3600  # Seconds after which a claim is taken to be left behind, even by a live process
+HEARTBEAT_INTERVAL = 15     # Seconds between heartbeats of a service instance
+OWNER_TIMEOUT = 60          # Seconds without a heartbeat after which an instance is taken to be gone
+
+
+def _process_alive(pid):
+    """Tells whether a process with this PID exists on this host (assumed alive where that cannot be checked)."""
+    if os.name != "posix":
+        return True  # os.kill would terminate it on Windows; rely on the heartbeat there
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class BackupJobService:
+    """
+    Runs device backups on a fixed pool of worker threads fed by a bounded queue.
+    Every submission becomes a job with an ID and per-device progress. Jobs, progress and the set of
+    devices being backed up live in a SQLite database, so several web worker processes sharing the
+    database see the same jobs, and a device that is already queued or running in any of them is not
+    queued again; the new job records which job is handling it instead.
+    Each claim records the service instance that made it. When an instance is gone (its process exited,
+    e.g. a recycled gunicorn worker, or its heartbeat stopped), its claims are released and their
+    backups marked failed at the next service start or submission.
+    """
+
+    def __init__(self, backup, path="backup_jobs.db", workers=4, max_queue=1000, history=100,
+                 stale_after=DEFAULT_STALE_AFTER):
+        """
+        Args:
+            backup (callable): Called with a device dict; returns True on success (exceptions count as failure).
+            path (str): Database file shared by every process running backups (e.g. the device repository's).
+            workers (int): Number of backups run at once by this process.
+            max_queue (int): Maximum devices waiting for a worker in this process; further devices are rejected.
+            history (int): Number of finished jobs whose status is kept.
+            stale_after (float): Seconds after which a device still claimed by a job is assumed abandoned
+                even though the claiming process is alive (e.g. a hung backup) and may be queued again;
+                should exceed the longest backup. Claims of processes that are gone are released sooner.
+        """
+        self.path = path
+        self._backup = backup
+        self._queue = queue.Queue()
+        self._max_queue = max_queue
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._history = history
+        self._stale_after = stale_after
+        self._host = socket.gethostname()
+        self.owner = f"{self._host}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+        if "owner" not in {row["name"] for row in connection.execute("PRAGMA table_info(backup_in_flight)")}:
+            connection.execute("ALTER TABLE backup_in_flight ADD COLUMN owner TEXT")  # Databases from before owners
+        with self._transaction() as connection:
+            connection.execute("INSERT INTO backup_owners (owner, host, pid, heartbeat) VALUES (?, ?, ?, ?)",
+                               (self.owner, self._host, os.getpid(), time.time()))
+            self._release_dead_owners(connection, time.time())
+        self._workers = [threading.Thread(target=self._worker, name=f"backup-worker-{index}", daemon=True)
+                         for index in range(workers)]
+        self._workers.append(threading.Thread(target=self._heartbeat, name="backup-heartbeat", daemon=True))
+        for worker in self._workers:
+            worker.start()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Autocommit; writes that must be atomic across processes use _transaction
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so checking and claiming devices is atomic across processes
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            try:
+                self._connection().execute("UPDATE backup_owners SET heartbeat = ? WHERE owner = ?",
+                                           (time.time(), self.owner))
+            except sqlite3.Error as e:
+                logging.error(f"Could not record the backup service heartbeat: {e}")
+
+    def _release_dead_owners(self, connection, now):
+        # Called inside a transaction
+        dead = [row["owner"] for row in connection.execute(
+                    "SELECT owner, host, pid, heartbeat FROM backup_owners WHERE owner != ?", (self.owner,))
+                if row["heartbeat"] < now - OWNER_TIMEOUT
+                or (row["host"] == self._host and not _process_alive(row["pid"]))]
+        for owner in dead:
+            claims = connection.execute("SELECT device_id, job_id FROM backup_in_flight WHERE owner = ?",
+                                        (owner,)).fetchall()
+            connection.executemany(
+                "UPDATE backup_job_devices SET state = 'failed', finished = ?, error = 'Abandoned (worker exited)' "
+                "WHERE job_id = ? AND device_id = ? AND state IN ('queued', 'running')",
+                [(now, claim["job_id"], claim["device_id"]) for claim in claims])
+            connection.execute("DELETE FROM backup_in_flight WHERE owner = ?", (owner,))
+            connection.execute("DELETE FROM backup_owners WHERE owner = ?", (owner,))
+            for job_id in {claim["job_id"] for claim in claims}:
+                self._finish_if_done(connection, job_id)
+            if claims:
+                logging.warning(f"Released {len(claims)} backups claimed by {owner}, which is gone")
+
+    def submit(self, devices):
+        """
+        Queues a backup job.
+        Args:
+            devices (list): Device dicts, each with a unique 'id'.
+        Returns:
+            str: The job ID.
+        """
+        now = time.time()
+        queued = []
+        with self._lock, self._transaction() as connection:
+            self._release_dead_owners(connection, now)
+            job_id = connection.execute("INSERT INTO backup_jobs (submitted) VALUES (?)", (now,)).lastrowid
+            claims = {row["device_id"]: row for row in connection.execute(
+                "SELECT device_id, job_id, claimed_at FROM backup_in_flight")}
+            capacity = self._max_queue - self._queue.qsize()
+            entries, abandoned = [], []
+            for device in devices:
+                state, error, duplicate_of = "queued", None, None
+                claim = claims.get(device["id"])
+                if claim is not None and claim["claimed_at"] > now - self._stale_after:
+                    state, duplicate_of = "skipped", claim["job_id"]
+                elif len(queued) >= capacity:
+                    state, error = "rejected", "Backup queue is full"
+                else:
+                    if claim is not None:
+                        abandoned.append((now, claim["job_id"], device["id"]))
+                    queued.append(device)
+                entries.append((job_id, device["id"], device["name"], state, now, error, duplicate_of))
+
+            connection.executemany(
+                "UPDATE backup_job_devices SET state = 'failed', finished = ?, error = 'Abandoned' "
+                "WHERE job_id = ? AND device_id = ? AND state IN ('queued', 'running')", abandoned)
+            for stale_job in {job for _, job, _ in abandoned}:
+                self._finish_if_done(connection, stale_job)
+            connection.executemany(
+                "INSERT INTO backup_job_devices (job_id, device_id, name, state, queued_at, error, duplicate_of) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", entries)
+            connection.executemany(
+                "INSERT OR REPLACE INTO backup_in_flight (device_id, job_id, claimed_at, owner) VALUES (?, ?, ?, ?)",
+                [(device["id"], job_id, now, self.owner) for device in queued])
+            self._finish_if_done(connection, job_id)
+            self._trim_history(connection)
+        # Queued only once the claims are committed, so workers always find their rows
+        for device in queued:
+            self._queue.put((job_id, device))
+        logging.info(f"Backup job {job_id} queued {len(queued)} of {len(devices)} devices")
+        return str(job_id)
+
+    def _worker(self):
+        while True:
+            job_id, device = self._queue.get()
+            self._connection().execute(
+                "UPDATE backup_job_devices SET state = 'running', started = ? WHERE job_id = ? AND device_id = ?",
+                (time.time(), job_id, device["id"]))
+            start = time.perf_counter()
+            error = None
+            try:
+                success = self._backup(device)
+            except Exception as e:
+                success, error = False, f"{type(e).__name__}: {e}"
+            elapsed = time.perf_counter() - start
+            try:
+                with self._transaction() as connection:
+                    connection.execute(
+                        "UPDATE backup_job_devices SET state = ?, finished = ?, elapsed = ?, error = ? "
+                        "WHERE job_id = ? AND device_id = ?",
+                        ("done" if success else "failed", time.time(), elapsed, error, job_id, device["id"]))
+                    connection.execute("DELETE FROM backup_in_flight WHERE device_id = ? AND job_id = ?",
+                                       (device["id"], job_id))
+                    self._finish_if_done(connection, job_id)
+            except sqlite3.Error as e:
+                logging.error(f"Could not record backup of device {device['name']} in job {job_id}: {e}")
+            self._queue.task_done()
+
+    @staticmethod
+    def _finish_if_done(connection, job_id):
+        connection.execute(
+            "UPDATE backup_jobs SET finished = ? WHERE id = ? AND finished IS NULL AND NOT EXISTS "
+            "(SELECT 1 FROM backup_job_devices WHERE job_id = ? AND state IN ('queued', 'running'))",
+            (time.time(), job_id, job_id))
+
+    def _trim_history(self, connection):
+        # Unfinished jobs are never dropped
+        old = [row[0] for row in connection.execute(
+            "SELECT id FROM backup_jobs WHERE finished IS NOT NULL AND id NOT IN "
+            "(SELECT id FROM backup_jobs ORDER BY id DESC LIMIT ?)", (self._history,))]
+        connection.executemany("DELETE FROM backup_job_devices WHERE job_id = ?", [(job_id,) for job_id in old])
+        connection.executemany("DELETE FROM backup_jobs WHERE id = ?", [(job_id,) for job_id in old])
+
+    def status(self, job_id, include_devices=True):
+        """
+        Returns a snapshot of a job's progress, or None for an unknown job.
+        Args:
+            job_id (str): The job ID.
+            include_devices (bool): Include per-device details (otherwise only the counts).
+        Returns:
+            dict: id, submitted, finished, elapsed, progress counts per state, and per-device details.
+        """
+        try:
+            job_id = int(job_id)
+        except (TypeError, ValueError):
+            return None
+        connection = self._connection()
+        job = connection.execute("SELECT submitted, finished FROM backup_jobs WHERE id = ?", (job_id,)).fetchone()
+        if job is None:
+            return None
+        progress = {row["state"]: row["count"] for row in connection.execute(
+            "SELECT state, COUNT(*) AS count FROM backup_job_devices WHERE job_id = ? GROUP BY state", (job_id,))}
+        progress["total"] = sum(progress.values())
+        status = {"id": str(job_id), "submitted": job["submitted"], "finished": job["finished"],
+                  "elapsed": (job["finished"] or time.time()) - job["submitted"], "progress": progress}
+        if include_devices:
+            status["devices"] = {
+                row["device_id"]: {key: row[key] for key in row.keys() if key not in ("job_id", "device_id")}
+                for row in connection.execute("SELECT * FROM backup_job_devices WHERE job_id = ?", (job_id,))}
+        return status
+
+    def jobs(self, include_devices=False):
+        """Returns the status of every tracked job, newest first."""
+        job_ids = [row[0] for row in self._connection().execute("SELECT id FROM backup_jobs ORDER BY id DESC")]
+        statuses = (self.status(job_id, include_devices) for job_id in job_ids)
+        return [status for status in statuses if status is not None]
+
+    def latest(self):
+        """Returns the progress of the newest job (without per-device details), or None."""
+        job_id = self._connection().execute("SELECT MAX(id) FROM backup_jobs").fetchone()[0]
+        return self.status(job_id, include_devices=False) if job_id is not None else None
+
+    def wait(self, job_id, timeout=None):
+        """
+        Waits for a job to finish.
+        Returns:
+            bool: True if the job finished within the timeout.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            status = self.status(job_id, include_devices=False)
+            if status is None or status["finished"] is not None:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+
+def benchmark_backup_service(device_count=40, workers=8, backup_seconds=0.1):
+    """
+    Compares a sequential backup walk with the worker pool on simulated backups.
+    Args:
+        device_count (int): Number of simulated devices.
+        workers (int): Worker threads in the pool.
+        backup_seconds (float): Simulated time per device backup.
+    """
+    devices = [{"id": index, "name": f"Device-{index}"} for index in range(device_count)]
+
+    def backup(device):
+        time.sleep(backup_seconds)
+        return True
+
+    start = time.perf_counter()
+    for device in devices:
+        backup(device)
+    sequential = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "backup_jobs.db")
+        service = BackupJobService(backup, path, workers=workers)
+        other_worker = BackupJobService(backup, path, workers=workers)  # Another web worker process
+        start = time.perf_counter()
+        job_id = service.submit(devices)
+        duplicate_id = other_worker.submit(devices)  # A second click, landing on the other worker
+        service.wait(job_id)
+        pooled = time.perf_counter() - start
+        skipped = other_worker.status(duplicate_id, include_devices=False)["progress"].get("skipped", 0)
+
+    print(f"[+] Sequential: {sequential:.2f}s for {device_count} devices")
+    print(f"[+] Pool of {workers}: {pooled:.2f}s ({sequential / pooled:.1f}x); "
+          f"{skipped} duplicate device backups skipped")
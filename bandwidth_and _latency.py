@@ -1,31 +1,42 @@
-import psutil
 import time
 import socket
 import argparse
 from datetime import datetime
 
-def get_bandwidth_stats(interval=1, previous_io=None):
-    """Get network bandwidth statistics"""
-    current_io = psutil.net_io_counters()
-    if previous_io:
-        upload = (current_io.bytes_sent - previous_io.bytes_sent) * 8 / interval / 1e6  # Mbps
-        download = (current_io.bytes_recv - previous_io.bytes_recv) * 8 / interval / 1e6  # Mbps
-        return upload, download, current_io
-    return 0, 0, current_io
+from bandwidth_sampler import BandwidthSampler, TOTAL
+from latency_prober import LatencyProber, format_summary, benchmark_local_listeners
+from timeseries_store import TimeSeriesStore, benchmark_against_text_log
+
+def get_bandwidth_stats(sampler, nic=TOTAL, interval=1):
+    """Get network bandwidth statistics (Mbps) averaged over the last interval, from the background sampler"""
+    return sampler.average(nic, seconds=interval)
 
 def measure_latency(host="8.8.8.8", port=53, timeout=1):
-    """Measure network latency using TCP connection time"""
+    """Measure network latency once using TCP connection time (see LatencyProber for continuous probing)"""
     try:
-        start = time.time()
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
             s.settimeout(timeout)
+            start = time.perf_counter_ns()
             s.connect((host, port))
-        return (time.time() - start) * 1000  # Convert to milliseconds
+            return (time.perf_counter_ns() - start) / 1e6  # Convert to milliseconds
     except (socket.error, socket.timeout):
         return None
 
-def main(log_file=None):
-    previous_io = None
+def format_latency(summaries):
+    """Condense latency summaries into the status line (worst target when probing several)"""
+    sent = sum(summary["sent"] for summary in summaries)
+    lost = sum(summary["lost"] + summary["errors"] for summary in summaries)
+    measured = [summary for summary in summaries if summary["p99"] is not None]
+    if not measured:
+        return f"Latency: N/A | Lost: {lost}/{sent}"
+    worst = max(measured, key=lambda summary: summary["p99"])
+    label = "Latency" if len(summaries) == 1 else f"Latency (worst of {len(summaries)}: {worst['target']})"
+    return f"{label}: p50 {worst['p50']:.1f} ms, p99 {worst['p99']:.1f} ms | Lost: {lost}/{sent}"
+
+def main(log_file=None, nic=TOTAL, sample_interval=0.25, targets=("8.8.8.8:53",), probe_rate=1.0, store_path=None):
+    sampler = BandwidthSampler(interval=sample_interval).start()
+    prober = LatencyProber(targets, rate=probe_rate).start()
+    store = TimeSeriesStore(store_path) if store_path else None
     print("Starting network monitor... (Ctrl+C to stop)")
     
     try:
@@ -33,12 +44,11 @@ def main(log_file=None):
             start_time = time.time()
             
             # Get bandwidth stats
-            upload, download, previous_io = get_bandwidth_stats(
-                interval=1, previous_io=previous_io
-            )
+            upload, download = get_bandwidth_stats(sampler, nic)
             
-            # Measure latency
-            latency = measure_latency()
+            # Read latency percentiles gathered by the background prober
+            summaries = prober.summaries()
+            latency = format_latency(summaries)
             
             # Prepare output
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -46,12 +56,16 @@ def main(log_file=None):
                 f"{timestamp} | "
                 f"Upload: {upload:.2f} Mbps | "
                 f"Download: {download:.2f} Mbps | "
-                f"Latency: {latency:.1f} ms" if latency else "Latency: N/A"
+                f"{latency}"
             )
             
             # Update console display
             print(output, end='\r', flush=True)
             
+            # Store the sample (latest latency of the first target, if any) for range queries and rollups
+            if store:
+                store.append(time.time(), upload, download, summaries[0]["last"] if summaries else None)
+            
             # Log to file if specified
             if log_file:
                 with open(log_file, "a") as f:
@@ -62,10 +76,38 @@ def main(log_file=None):
             
     except KeyboardInterrupt:
         print("\nMonitoring stopped.")
+    finally:
+        sampler.stop()
+        prober.stop()
+        if store:
+            store.close()
+        for summary in prober.summaries():
+            print(format_summary(summary))
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Real-time Network Monitor")
     parser.add_argument("--log", help="Log file path for saving statistics")
+    parser.add_argument("--interface", default=TOTAL, help="Interface to report (default: all interfaces)")
+    parser.add_argument("--sample-interval", type=float, default=0.25, help="Seconds between counter samples")
+    parser.add_argument("--targets", default="8.8.8.8:53",
+                        help="Comma-separated host:port latency targets, or @file with one per line")
+    parser.add_argument("--probe-rate", type=float, default=1.0, help="Latency probes per second per target")
+    parser.add_argument("--store", help="Time-series store directory for binary samples and rollups")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Probe local listeners with injected delays and exit")
+    parser.add_argument("--benchmark-store", action="store_true",
+                        help="Compare the time-series store with the text log and exit")
     args = parser.parse_args()
     
-    main(log_file=args.log)
+    if args.benchmark:
+        benchmark_local_listeners()
+    elif args.benchmark_store:
+        benchmark_against_text_log()
+    else:
+        if args.targets.startswith("@"):
+            with open(args.targets[1:]) as f:
+                targets = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        else:
+            targets = [target.strip() for target in args.targets.split(",") if target.strip()]
+        main(log_file=args.log, nic=args.interface, sample_interval=args.sample_interval,
+             targets=targets, probe_rate=args.probe_rate, store_path=args.store)
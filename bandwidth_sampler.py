@@ -0,0 +1,208 @@
+import threading
+import time
+import numpy as np
+import psutil
+
+# One record per sample; rates are in Mbps
+RATE_DTYPE = np.dtype([
+    ("timestamp", "f8"),
+    ("upload", "f8"),
+    ("download", "f8"),
+])
+
+TOTAL = "total"  # Ring holding the sum over all sampled interfaces
+
+
+def counter_delta(previous, current):
+    """
+    Difference between two readings of a monotonically increasing interface counter.
+    Handles 32-bit and 64-bit counter wraparound; a counter that went backwards by more than
+    a wrap could explain (e.g. the interface was reset) is treated as restarting from zero.
+    Args:
+        previous (int): Earlier reading.
+        current (int): Later reading.
+    Returns:
+        int: Bytes counted between the two readings.
+    """
+    if current >= previous:
+        return current - previous
+    modulus = 1 << 32 if previous < 1 << 32 else 1 << 64
+    wrapped = current + modulus - previous
+    return wrapped if wrapped < modulus // 2 else current
+
+
+class RateRing:
+    """
+    Fixed-size, preallocated ring of rate samples for one interface.
+    Like PacketRingBuffer, each sample is written twice so the latest window is contiguous;
+    history() returns a copy so readers never see the writer overwrite it.
+    """
+
+    def __init__(self, capacity):
+        """
+        Args:
+            capacity (int): Number of samples kept.
+        """
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, dtype=RATE_DTYPE)
+        self.count = 0
+
+    def append(self, timestamp, upload, download):
+        """Stores one sample, overwriting the oldest once the ring is full."""
+        slot = self.count % self.capacity
+        record = (timestamp, upload, download)
+        self._data[slot] = record
+        self._data[slot + self.capacity] = record
+        self.count += 1
+
+    def history(self, size=None):
+        """
+        Returns the most recent samples, oldest first.
+        Args:
+            size (int): Number of samples wanted (default: everything retained).
+        Returns:
+            numpy.ndarray: A copy of at most min(size, capacity) samples.
+        """
+        count = self.count
+        size = min(size or self.capacity, self.capacity, count)
+        if size == 0:
+            return self._data[:0].copy()
+        end = (count - 1) % self.capacity + self.capacity + 1
+        return self._data[end - size:end].copy()
+
+    def latest(self):
+        """Returns the newest sample as (timestamp, upload, download), or None before the first sample."""
+        count = self.count
+        if count == 0:
+            return None
+        timestamp, upload, download = self._data[(count - 1) % self.capacity].tolist()
+        return timestamp, upload, download
+
+
+class BandwidthSampler:
+    """
+    Background thread that samples per-interface byte counters at a fixed rate.
+    Rates are computed from monotonic-clock deltas, so a late wakeup does not distort them, and
+    stored per interface (plus a 'total' ring) for consumers that read without blocking.
+    """
+
+    def __init__(self, interval=0.25, history=240, interfaces=None):
+        """
+        Args:
+            interval (float): Seconds between samples (sub-second rates are fine).
+            history (int): Samples kept per interface.
+            interfaces (list): Interface names to sample (default: all).
+        """
+        self.interval = interval
+        self.history_size = history
+        self.interfaces = set(interfaces) if interfaces else None
+        self.rings = {TOTAL: RateRing(history)}
+        self._lock = threading.Lock()  # Guards creation of rings for new interfaces
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts the sampling thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="bandwidth-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the sampling thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _read_counters(self):
+        counters = psutil.net_io_counters(pernic=True, nowrap=False)
+        if self.interfaces is not None:
+            counters = {nic: io for nic, io in counters.items() if nic in self.interfaces}
+        return time.monotonic(), counters
+
+    def _run(self):
+        previous_time, previous = self._read_counters()
+        next_sample = previous_time + self.interval
+        while not self._stop.wait(max(0.0, next_sample - time.monotonic())):
+            now, current = self._read_counters()
+            elapsed = now - previous_time
+            next_sample += self.interval
+            if next_sample < now:  # Fell behind (e.g. suspended); do not try to catch up
+                next_sample = now + self.interval
+            if elapsed <= 0:
+                continue
+            self.sample(time.time(), elapsed, previous, current)
+            previous_time, previous = now, current
+
+    def sample(self, timestamp, elapsed, previous, current):
+        """
+        Converts two counter snapshots into rates and stores them.
+        Args:
+            timestamp (float): Wall-clock time of the newer snapshot, for display.
+            elapsed (float): Monotonic seconds between the snapshots.
+            previous (dict): Earlier psutil.net_io_counters(pernic=True) result.
+            current (dict): Later psutil.net_io_counters(pernic=True) result.
+        """
+        scale = 8 / elapsed / 1e6  # Bytes per interval -> Mbps
+        total_upload = total_download = 0.0
+        for nic, io in current.items():
+            before = previous.get(nic)
+            if before is None:
+                continue  # Interface appeared since the last sample
+            upload = counter_delta(before.bytes_sent, io.bytes_sent) * scale
+            download = counter_delta(before.bytes_recv, io.bytes_recv) * scale
+            self.ring(nic).append(timestamp, upload, download)
+            total_upload += upload
+            total_download += download
+        self.rings[TOTAL].append(timestamp, total_upload, total_download)
+
+    def ring(self, nic):
+        """Returns the ring for an interface, creating it on first use."""
+        ring = self.rings.get(nic)
+        if ring is None:
+            with self._lock:
+                ring = self.rings.setdefault(nic, RateRing(self.history_size))
+        return ring
+
+    def latest(self, nic=TOTAL):
+        """
+        Returns the newest rates without blocking.
+        Args:
+            nic (str): Interface name (default: the total over all interfaces).
+        Returns:
+            tuple: (timestamp, upload Mbps, download Mbps), or None before the first sample.
+        """
+        ring = self.rings.get(nic)
+        return ring.latest() if ring is not None else None
+
+    def history(self, nic=TOTAL, size=None):
+        """
+        Returns recent rate samples without blocking.
+        Args:
+            nic (str): Interface name (default: the total over all interfaces).
+            size (int): Number of samples wanted (default: everything retained).
+        Returns:
+            numpy.ndarray: Samples with timestamp, upload and download fields, oldest first.
+        """
+        ring = self.rings.get(nic)
+        return ring.history(size) if ring is not None else np.zeros(0, dtype=RATE_DTYPE)
+
+    def average(self, nic=TOTAL, seconds=1.0):
+        """
+        Returns the mean rates over the most recent samples without blocking.
+        Args:
+            nic (str): Interface name (default: the total over all interfaces).
+            seconds (float): Length of the averaging window.
+        Returns:
+            tuple: (upload Mbps, download Mbps); zeros before the first sample.
+        """
+        history = self.history(nic, size=max(1, round(seconds / self.interval)))
+        if len(history) == 0:
+            return 0.0, 0.0
+        return float(history["upload"].mean()), float(history["download"].mean())
+
+    def interface_names(self):
+        """Returns the interfaces sampled so far."""
+        return sorted(nic for nic in self.rings if nic != TOTAL)
@@ -1,3 +1,8 @@
+import json
+import argparse
+import time
+import threading
+from contextlib import contextmanager
 from netmiko import ConnectHandler
 from concurrent.futures import ThreadPoolExecutor
 
@@ -7,15 +12,251 @@ devices = [
     {"device_type": "cisco_ios", "host": "10.0.0.2", "username": "admin", "password": "password"},
 ]
 
-# Define the command to be executed on each device
+# Define the commands to be executed on each device
+config_commands = ["interface GigabitEthernet0/1", "description Configured by script"]
+show_commands = ["show running-config interface GigabitEthernet0/1"]
 
-def configure_device(device):
-    connection = ConnectHandler(**device)
-    connection.send_config_set(["interface GigabitEthernet0/1", "description Configured by script"])
-    connection.disconnect()
 
-with ThreadPoolExecutor(max_workers=5) as executor:
-    executor.map(configure_device, devices)  # Execute the function for each device in parallel
+def load_devices(path):
+    """
+    Loads device details (Netmiko ConnectHandler arguments) from a JSON file.
+    Args:
+        path (str): Path of a JSON file containing a list of device dictionaries.
+    Returns:
+        list: A list of device dictionaries.
+    """
+    with open(path, "r") as f:
+        return json.load(f)
 
-    # A script that reads device IPs and credentials from a file, establishes SSH connections using Netmiko, 
-    # and pushes configuration commands in parallel using multithreading to save time."
\ No newline at end of file
+
+class SessionPool:
+    """
+    Keeps one authenticated SSH session per host (and port) and reuses it across config batches and show
+    commands. Sessions are evicted, and their entries dropped, when a command on them fails, when they stop
+    answering keepalives, or when they have been idle longer than idle_timeout.
+    """
+
+    def __init__(self, connect=ConnectHandler, idle_timeout=300, keepalive_interval=60):
+        """
+        Args:
+            connect (callable): Session factory called with the device dictionary (default: Netmiko ConnectHandler).
+            idle_timeout (float): Seconds an unused session is kept open.
+            keepalive_interval (float): Seconds between keepalive/idle checks of pooled sessions.
+        """
+        self._connect = connect
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self._sessions = {}  # (host, port) -> {"connection", "lock", "last_used"}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._keepalive_thread = threading.Thread(target=self._keepalive_loop, daemon=True)
+        self._keepalive_thread.start()
+
+    def _entry(self, key):
+        # Returns the key's entry with its lock held; an entry evicted while waiting for its lock is
+        # no longer in the pool, so start over with the current one
+        while True:
+            with self._lock:
+                entry = self._sessions.setdefault(key, {"connection": None, "lock": threading.Lock(),
+                                                        "last_used": time.monotonic()})
+            entry["lock"].acquire()
+            with self._lock:
+                if self._sessions.get(key) is entry:
+                    return entry
+            entry["lock"].release()
+
+    @contextmanager
+    def session(self, device, timings=None):
+        """
+        Borrows the pooled session for a device, connecting only if none is open.
+        Args:
+            device (dict): Netmiko ConnectHandler arguments.
+            timings (dict): Optional dict that receives 'connect_time' and 'reused'.
+        Yields:
+            The connected session; only one caller uses a host's session at a time.
+        """
+        key = (device["host"], device.get("port"))
+        entry = self._entry(key)
+        try:
+            reused = entry["connection"] is not None
+            connect_time = 0.0
+            if not reused:
+                start = time.perf_counter()
+                entry["connection"] = self._connect(**device)
+                connect_time = time.perf_counter() - start
+            if timings is not None:
+                timings.update(connect_time=connect_time, reused=reused)
+            try:
+                yield entry["connection"]
+            finally:
+                entry["last_used"] = time.monotonic()
+        except Exception:
+            self._evict(key, entry)  # The session state is unknown after a failure (or it never connected)
+            raise
+        finally:
+            entry["lock"].release()
+
+    def _evict(self, key, entry):
+        # Called with the entry's lock held
+        with self._lock:
+            if self._sessions.get(key) is entry:
+                del self._sessions[key]
+        self._disconnect(entry)
+
+    def _disconnect(self, entry):
+        connection, entry["connection"] = entry["connection"], None
+        if connection is not None:
+            try:
+                connection.disconnect()
+            except Exception:
+                pass
+
+    def _keepalive_loop(self):
+        while not self._closed.wait(self.keepalive_interval):
+            with self._lock:
+                entries = list(self._sessions.items())
+            for key, entry in entries:
+                if not entry["lock"].acquire(blocking=False):
+                    continue  # In use, so it is alive by definition
+                try:
+                    if (entry["connection"] is None or time.monotonic() - entry["last_used"] > self.idle_timeout
+                            or not entry["connection"].is_alive()):  # Sends a keepalive on the channel
+                        self._evict(key, entry)
+                except Exception:
+                    self._evict(key, entry)
+                finally:
+                    entry["lock"].release()
+
+    def close_all(self):
+        """Stops the keepalive thread and disconnects every pooled session."""
+        self._closed.set()
+        with self._lock:
+            entries = list(self._sessions.values())
+            self._sessions.clear()
+        for entry in entries:
+            with entry["lock"]:
+                self._disconnect(entry)
+
+
+def configure_device(pool, device, config_commands=None, show_commands=None):
+    """
+    Pushes config commands and runs show commands on one device through the session pool.
+    Args:
+        pool (SessionPool): The session pool.
+        device (dict): Netmiko ConnectHandler arguments.
+        config_commands (list): Configuration commands to send as one config set.
+        show_commands (list): Show commands to run after the config set.
+    Returns:
+        dict: Structured result with host, port, success, error, outputs and timings.
+    """
+    result = {"host": device["host"], "port": device.get("port"), "success": False, "error": None, "reused": False,
+              "connect_time": 0.0, "elapsed": 0.0, "config_output": None, "show_output": {}}
+    start = time.perf_counter()
+    try:
+        with pool.session(device, timings=result) as connection:
+            if config_commands:
+                result["config_output"] = connection.send_config_set(config_commands)
+            for command in show_commands or []:
+                result["show_output"][command] = connection.send_command(command)
+        result["success"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def configure_devices(pool, devices, config_commands=None, show_commands=None, max_workers=5):
+    """
+    Runs configure_device for every device in parallel.
+    Args:
+        pool (SessionPool): The session pool.
+        devices (list): Netmiko ConnectHandler arguments for each device.
+        config_commands (list): Configuration commands to send.
+        show_commands (list): Show commands to run.
+        max_workers (int): Number of devices handled at once.
+    Returns:
+        list: One result dictionary per device, in input order.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda device: configure_device(pool, device, config_commands, show_commands),
+                                 devices))
+
+
+def print_results(results):
+    """Prints a per-device summary of a batch."""
+    for result in results:
+        status = "OK" if result["success"] else f"FAILED ({result['error']})"
+        session = "reused session" if result["reused"] else f"connected in {result['connect_time']:.2f}s"
+        host = f"{result['host']}:{result['port']}" if result.get("port") else result["host"]
+        print(f"{host:<20}{status} - {session}, total {result['elapsed']:.2f}s")
+
+
+def check_against_stub(device_count=4, login_delay=0.5, max_workers=5):
+    """
+    Runs the config and show batches through a SessionPool against local stub SSH servers
+    (see ssh_stub_server), then checks that every device logged in once, that the show batch sees
+    the configured lines, and that an evicted session's entry is dropped from the pool.
+    Args:
+        device_count (int): Number of stub devices, each on its own loopback port.
+        login_delay (float): Simulated login time of each stub device, in seconds.
+        max_workers (int): Number of devices handled at once.
+    Returns:
+        bool: True if every check passed.
+    """
+    from ssh_stub_server import StubSshServer
+
+    servers = [StubSshServer(hostname=f"Stub-{index}", login_delay=login_delay).start()
+               for index in range(device_count)]
+    stub_devices = [server.device() for server in servers]
+    pool = SessionPool()
+    try:
+        start = time.perf_counter()
+        configured = configure_devices(pool, stub_devices, config_commands=config_commands, max_workers=max_workers)
+        shown = configure_devices(pool, stub_devices, show_commands=show_commands, max_workers=max_workers)
+        elapsed = time.perf_counter() - start
+        print_results(configured + shown)
+
+        logins = sum(server.logins for server in servers)
+        applied = sum(config_commands[-1] in "".join(result["show_output"].values()) for result in shown)
+        with pool.session(stub_devices[0]) as connection:
+            connection.disconnect()  # Kill the session under the pool, as a dropped link would
+        try:
+            with pool.session(stub_devices[0]) as connection:
+                connection.send_command("show version")
+        except Exception:
+            pass  # The failure evicts the session
+        evicted = (stub_devices[0]["host"], stub_devices[0]["port"]) not in pool._sessions
+    finally:
+        pool.close_all()
+        for server in servers:
+            server.stop()
+
+    print(f"[+] {device_count} stub devices, 2 batches in {elapsed:.2f}s with {logins} logins "
+          f"(a connection per batch would need {2 * device_count})")
+    print(f"[{'+' if applied == device_count else '-'}] Config visible on {applied} of {device_count} devices")
+    print(f"[{'+' if evicted else '-'}] Failed session {'dropped from' if evicted else 'still in'} the pool")
+    return logins == device_count and applied == device_count and evicted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Push configuration to several devices in parallel")
+    parser.add_argument("devices_file", nargs="?", help="JSON file with a list of Netmiko device dictionaries")
+    parser.add_argument("--stub", type=int, metavar="DEVICES",
+                        help="Run the batches against DEVICES local stub SSH servers instead, then exit")
+    args = parser.parse_args()
+
+    if args.stub:
+        raise SystemExit(0 if check_against_stub(args.stub) else 1)
+    if args.devices_file:
+        devices = load_devices(args.devices_file)
+
+    pool = SessionPool()
+    try:
+        # Both batches share the same authenticated sessions
+        print_results(configure_devices(pool, devices, config_commands=config_commands))
+        print_results(configure_devices(pool, devices, show_commands=show_commands))
+    finally:
+        pool.close_all()
+
+    # A script that reads device IPs and credentials from a file, establishes SSH connections using Netmiko,
+    # and pushes configuration commands in parallel using multithreading to save time.
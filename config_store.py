@@ -0,0 +1,364 @@
+import difflib
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    base TEXT,              -- NULL for a full copy, else the hash this delta applies to
+    depth INTEGER NOT NULL, -- deltas between this blob and the nearest full copy
+    data BLOB NOT NULL      -- zlib-compressed text or JSON delta
+);
+CREATE TABLE IF NOT EXISTS versions (
+    device_id INTEGER NOT NULL,
+    taken_at REAL NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (device_id, taken_at)
+);
+"""
+
+# Lines that change on every 'show running-config' without a config change
+VOLATILE_LINES = re.compile(
+    r"^(Building configuration\.\.\.|Current configuration : \d+ bytes|"
+    r"! (Last configuration change|NVRAM config last updated|No configuration change since).*|"
+    r"ntp clock-period \d+)$")
+
+KEYFRAME_INTERVAL = 16  # Longest delta chain; bounds restore latency
+
+
+def normalize_config(text):
+    """
+    Normalizes a running-config so cosmetic differences do not count as changes.
+    Volatile header lines are dropped, line endings are unified and trailing whitespace is removed.
+    Args:
+        text (str): Raw 'show running-config' output.
+    Returns:
+        str: The normalized config.
+    """
+    lines = (line.rstrip() for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"))
+    return "\n".join(line for line in lines if not VOLATILE_LINES.match(line)).strip("\n") + "\n"
+
+
+def config_hash(normalized):
+    """Content address of a normalized config."""
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def make_delta(base_lines, lines):
+    """
+    Encodes lines as copy ranges from base_lines plus literal added lines.
+    Returns:
+        list: Operations [start, end] (copy base_lines[start:end]) or {"+": [lines...]} (literal lines).
+    """
+    operations = []
+    matcher = difflib.SequenceMatcher(None, base_lines, lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            operations.append([i1, i2])
+        elif tag in ("replace", "insert"):
+            operations.append({"+": lines[j1:j2]})
+    return operations
+
+
+def apply_delta(base_lines, operations):
+    """Rebuilds the lines encoded by make_delta."""
+    lines = []
+    for operation in operations:
+        if isinstance(operation, dict):
+            lines.extend(operation["+"])
+        else:
+            lines.extend(base_lines[operation[0]:operation[1]])
+    return lines
+
+
+class ConfigStore:
+    """
+    Content-addressed, delta-compressed store of device configurations.
+    Configs are hashed after normalization, so an unchanged config stores nothing and identical
+    configs on different devices share one blob. A changed config is stored as a line delta against
+    the device's previous version, with a full copy every KEYFRAME_INTERVAL deltas.
+    """
+
+    def __init__(self, path="config_backups.db", cache_size=256):
+        """
+        Args:
+            path (str): SQLite database file.
+            cache_size (int): Reconstructed configs kept in memory.
+        """
+        self.path = path
+        self._local = threading.local()
+        self._cache = OrderedDict()  # hash -> list of lines
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def latest_hash(self, device_id, at=None):
+        """Returns the hash of a device's config as of a time (default: the newest), or None."""
+        query = "SELECT hash FROM versions WHERE device_id = ?"
+        params = [device_id]
+        if at is not None:
+            query += " AND taken_at <= ?"
+            params.append(at)
+        row = self._connection().execute(query + " ORDER BY taken_at DESC LIMIT 1", params).fetchone()
+        return row[0] if row else None
+
+    def save(self, device_id, text, taken_at=None):
+        """
+        Stores a device's config if it changed.
+        Args:
+            device_id (int): Device the config belongs to.
+            text (str): Raw 'show running-config' output.
+            taken_at (float): Backup time in seconds since the epoch (default: now).
+        Returns:
+            tuple: (hash, changed); nothing is written when the config is unchanged.
+        """
+        taken_at = time.time() if taken_at is None else taken_at
+        normalized = normalize_config(text)
+        digest = config_hash(normalized)
+        previous = self.latest_hash(device_id)
+        if digest == previous:
+            return digest, False
+
+        connection = self._connection()
+        with connection:
+            exists = connection.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone()
+            if not exists:
+                lines = normalized.split("\n")
+                full = zlib.compress(normalized.encode(), 9)
+                blob = (digest, None, 0, full)
+                if previous is not None:
+                    depth = connection.execute("SELECT depth FROM blobs WHERE hash = ?", (previous,)).fetchone()[0]
+                    if depth + 1 < KEYFRAME_INTERVAL:
+                        delta = zlib.compress(json.dumps(make_delta(self._lines(previous), lines)).encode(), 9)
+                        if len(delta) < len(full):
+                            blob = (digest, previous, depth + 1, delta)
+                # Another thread or process may have stored the same config since the check above
+                inserted = connection.execute(
+                    "INSERT OR IGNORE INTO blobs (hash, base, depth, data) VALUES (?, ?, ?, ?)", blob).rowcount
+                if inserted:
+                    self._remember(digest, lines)
+            connection.execute("INSERT OR REPLACE INTO versions (device_id, taken_at, hash) VALUES (?, ?, ?)",
+                               (device_id, taken_at, digest))
+        return digest, True
+
+    def _remember(self, digest, lines):
+        with self._cache_lock:
+            self._cache[digest] = lines
+            self._cache.move_to_end(digest)
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _lines(self, digest):
+        with self._cache_lock:
+            lines = self._cache.get(digest)
+        if lines is not None:
+            return lines
+
+        # Walk back to the nearest full copy (or cached version), then replay the deltas forward
+        connection = self._connection()
+        chain = []
+        current = digest
+        while True:
+            row = connection.execute("SELECT base, data FROM blobs WHERE hash = ?", (current,)).fetchone()
+            if row is None:
+                raise KeyError(f"Unknown config {current}")
+            base, data = row
+            if base is None:
+                lines = zlib.decompress(data).decode().split("\n")
+                break
+            chain.append(data)
+            with self._cache_lock:
+                lines = self._cache.get(base)
+            if lines is not None:
+                break
+            current = base
+        for data in reversed(chain):
+            lines = apply_delta(lines, json.loads(zlib.decompress(data)))
+        self._remember(digest, lines)
+        return lines
+
+    def get(self, digest):
+        """Returns the normalized config stored under a hash."""
+        return "\n".join(self._lines(digest))
+
+    def config_at(self, device_id, at=None):
+        """
+        Returns a device's config as it was at a time.
+        Args:
+            device_id (int): Device.
+            at (float): Seconds since the epoch (default: now).
+        Returns:
+            str: The normalized config, or None if no backup is that old.
+        """
+        digest = self.latest_hash(device_id, at)
+        return self.get(digest) if digest else None
+
+    def versions(self, device_id):
+        """Returns (taken_at, hash) for every stored version of a device, oldest first."""
+        return self._connection().execute(
+            "SELECT taken_at, hash FROM versions WHERE device_id = ? ORDER BY taken_at", (device_id,)).fetchall()
+
+    def diff(self, old_hash, new_hash, context=3):
+        """
+        Returns a unified diff between two stored configs.
+        Args:
+            old_hash (str): Hash of the older config.
+            new_hash (str): Hash of the newer config.
+            context (int): Lines of context around each change.
+        Returns:
+            str: The diff (empty if the configs are identical).
+        """
+        if old_hash == new_hash:
+            return ""
+        return "\n".join(difflib.unified_diff(self._lines(old_hash), self._lines(new_hash),
+                                              old_hash[:12], new_hash[:12], n=context, lineterm=""))
+
+    def diff_between(self, device_id, old_time, new_time, context=3):
+        """Returns the unified diff of a device's config between two times."""
+        old_hash, new_hash = self.latest_hash(device_id, old_time), self.latest_hash(device_id, new_time)
+        if old_hash is None or new_hash is None:
+            return None
+        return self.diff(old_hash, new_hash, context)
+
+    def storage_bytes(self):
+        """Returns the total size of the stored blobs."""
+        return self._connection().execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()[0]
+
+
+class StubDevice:
+    """
+    Local stand-in for a Netmiko connection to a Cisco IOS device, for exercising backups.
+    Its running-config has a volatile header and drifts by a few lines per change().
+    """
+
+    def __init__(self, host="stub", interfaces=48, seed=None, **kwargs):
+        """
+        Args:
+            host (str): Hostname used in the config.
+            interfaces (int): Number of interface stanzas.
+            seed (int): Random seed for the generated config and its changes.
+            **kwargs: Other ConnectHandler arguments (ignored).
+        """
+        self.host = host
+        self.random = random.Random(seed if seed is not None else host)
+        self.sections = {"hostname": [f"hostname {host}"]}
+        for index in range(interfaces):
+            self.sections[f"interface {index}"] = [
+                f"interface GigabitEthernet0/{index}",
+                f" description Access port {index}",
+                f" switchport access vlan {self.random.randint(10, 99)}",
+                " switchport mode access",
+                " spanning-tree portfast",
+                "!",
+            ]
+        self.sections["acl"] = [f" permit ip 10.{index}.0.0 0.0.255.255 any" for index in range(40)]
+
+    def change(self):
+        """Makes a small configuration change, like a nightly edit."""
+        key = self.random.choice([key for key in self.sections if key.startswith("interface")])
+        stanza = self.sections[key]
+        stanza[2] = f" switchport access vlan {self.random.randint(10, 99)}"
+        if self.random.random() < 0.3:
+            self.sections["acl"].append(f" permit ip host 192.0.2.{self.random.randint(1, 254)} any")
+
+    def send_command(self, command):
+        if command != "show running-config":
+            raise ValueError(f"Unsupported command on stub device: {command}")
+        body = [line for section in self.sections.values() for line in section]
+        lines = ["Building configuration...", "",
+                 f"Current configuration : {sum(len(line) + 1 for line in body)} bytes",
+                 f"! Last configuration change at {time.strftime('%H:%M:%S')} UTC",
+                 f"! NVRAM config last updated at {time.strftime('%H:%M:%S')} UTC",
+                 "!", "version 15.2", "!"] + body[:1] + ["!"] + body[1:]
+        return "\r\n".join(lines[:-len(self.sections["acl"])] + ["ip access-list extended MGMT"]
+                           + lines[-len(self.sections["acl"]):] + ["end"])
+
+    def disconnect(self):
+        pass
+
+
+def collect_backup(store, device, connect, taken_at=None):
+    """
+    Pulls a device's running-config and stores it.
+    Args:
+        store (ConfigStore): Backup store.
+        device (dict): Device with an 'id' plus the connect() arguments.
+        connect (callable): Session factory, e.g. netmiko.ConnectHandler (StubDevice only for tests and benchmarks).
+        taken_at (float): Backup time (default: now).
+    Returns:
+        tuple: (hash, changed).
+    """
+    connection = connect(**{key: value for key, value in device.items() if key != "id"})
+    try:
+        text = connection.send_command("show running-config")
+    finally:
+        connection.disconnect()
+    return store.save(device["id"], text, taken_at)
+
+
+def benchmark_config_store(device_count=200, nights=60, change_rate=0.2, restores=2000):
+    """
+    Backs up stub devices nightly and measures storage and restore latency.
+    Args:
+        device_count (int): Number of stub devices.
+        nights (int): Nightly backups per device.
+        change_rate (float): Chance a device's config changes on a given night.
+        restores (int): Random 'config at time T' lookups timed (with a cold cache).
+    """
+    rng = random.Random(0)
+    stubs = {index: StubDevice(f"sw{index:04d}", seed=index) for index in range(device_count)}
+    start_time = 1_700_000_000.0
+    with tempfile.TemporaryDirectory() as directory:
+        store = ConfigStore(os.path.join(directory, "backups.db"))
+        full_bytes = compressed_bytes = changes = 0
+        begin = time.perf_counter()
+        for night in range(nights):
+            taken_at = start_time + night * 86400
+            for index, stub in stubs.items():
+                if night and rng.random() < change_rate:
+                    stub.change()
+                text = stub.send_command("show running-config")
+                full_bytes += len(text)
+                compressed_bytes += len(zlib.compress(text.encode(), 9))
+                changes += store.save(index, text, taken_at)[1]
+        ingest = time.perf_counter() - begin
+
+        store._cache.clear()
+        latencies = []
+        for _ in range(restores):
+            device_id = rng.randrange(device_count)
+            at = start_time + rng.uniform(0, nights) * 86400
+            begin = time.perf_counter()
+            store.config_at(device_id, at)
+            latencies.append(time.perf_counter() - begin)
+            store._cache.clear()
+        latencies.sort()
+        stored = store.storage_bytes()
+        store._connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        database = os.path.getsize(store.path)
+
+    backups = device_count * nights
+    print(f"[+] {backups} backups ({changes} changed) in {ingest:.1f}s")
+    print(f"[+] Full copies: {full_bytes / 1e6:.1f} MB, zlib per copy: {compressed_bytes / 1e6:.1f} MB, "
+          f"store blobs: {stored / 1e6:.2f} MB ({full_bytes / stored:.0f}x smaller), database {database / 1e6:.2f} MB")
+    print(f"[+] Restore at time T (cold cache): median {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
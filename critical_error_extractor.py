@@ -0,0 +1,432 @@
+import re
+import os
+import gzip
+import json
+import mmap
+import time
+import hashlib
+import argparse
+import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import zstandard  # Optional: only needed for .zst archives (pip install zstandard)
+except ImportError:
+    zstandard = None
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags  # Optional: event-driven follow mode
+except ImportError:
+    INotify = None
+
+DEFAULT_KEYWORDS = ("critical",)
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024  # Bytes of log handed to each worker task
+DEFAULT_CHECKPOINT_FILE = "critical_errors_checkpoint.json"
+FINGERPRINT_BYTES = 1024  # Head of the file hashed to detect rewrites that keep the same inode
+
+
+def build_pattern(keywords=DEFAULT_KEYWORDS, regex=False):
+    """
+    Combines keywords (or regular expressions) into one case-insensitive bytes pattern.
+    Args:
+        keywords (iterable): Keywords or patterns to search for.
+        regex (bool): Treat keywords as regular expressions instead of literal text.
+    Returns:
+        tuple: (pattern source, flags), suitable for passing to worker processes.
+    """
+    if isinstance(keywords, str):
+        keywords = [keywords]
+    parts = [k.encode() if regex else re.escape(k.encode()) for k in keywords]
+    return b"|".join(b"(?:" + part + b")" for part in parts), re.IGNORECASE
+
+
+def search_buffer(buf, pattern, start=0, end=None):
+    """
+    Finds every line in buf[start:end] that matches pattern, in a single pass.
+    Args:
+        buf (bytes or mmap): The data to search; start must be at a line boundary.
+        pattern (tuple): (pattern source, flags) from build_pattern.
+        start (int): Offset to start searching at.
+        end (int): Offset to stop searching at (default: end of buffer).
+    Returns:
+        list: Matching lines (bytes), stripped, in input order.
+    """
+    compiled = re.compile(*pattern)  # Compiled once per chunk, not once per line
+    end = len(buf) if end is None else end
+    matches = []
+    pos = start
+    while pos < end:
+        match = compiled.search(buf, pos, end)
+        if not match:
+            break
+        newline = buf.rfind(b"\n", start, match.start())
+        line_start = newline + 1 if newline >= 0 else start
+        line_end = buf.find(b"\n", match.start(), end)
+        if line_end < 0:
+            line_end = end
+        matches.append(buf[line_start:line_end].strip())
+        pos = line_end + 1
+    return matches
+
+
+def _search_file_range(path, start, end, pattern):
+    """Worker task: memory-maps the file and searches one line-aligned byte range."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return search_buffer(mm, pattern, start, end)
+
+
+def _search_block(block, pattern):
+    """Worker task: searches one line-aligned block of decompressed data."""
+    return search_buffer(block, pattern)
+
+
+def split_on_lines(path, chunk_size=DEFAULT_CHUNK_SIZE, start=0, end=None):
+    """
+    Splits a file into byte ranges of roughly chunk_size that end on line boundaries.
+    Args:
+        path (str): Path of the (uncompressed) file.
+        chunk_size (int): Target size of each range in bytes.
+        start (int): Offset to start at (must be at a line boundary).
+        end (int): Offset to stop at (default: EOF).
+    Returns:
+        list: A list of (start, end) tuples covering the file from start to end.
+    """
+    size = os.path.getsize(path) if end is None else end
+    if size <= start:
+        return []
+    ranges = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        while start < size:
+            newline = mm.find(b"\n", min(start + chunk_size, size) - 1, size)
+            range_end = size if newline < 0 else newline + 1
+            ranges.append((start, range_end))
+            start = range_end
+    return ranges
+
+
+def open_compressed(path):
+    """
+    Opens a .gz or .zst log for binary streaming reads.
+    Args:
+        path (str): Path of the compressed file.
+    Returns:
+        file object: A readable binary stream of decompressed data.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError("Reading .zst logs requires the zstandard module: pip install zstandard")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    raise ValueError(f"Unsupported compressed log format: {path}")
+
+
+def iter_line_blocks(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Reads a binary stream in blocks that end on line boundaries.
+    Args:
+        stream: A readable binary file object.
+        chunk_size (int): Target block size in bytes.
+    Yields:
+        bytes: Blocks containing only whole lines.
+    """
+    carry = b""
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        data = carry + data
+        newline = data.rfind(b"\n")
+        if newline < 0:
+            carry = data
+            continue
+        carry = data[newline + 1:]
+        yield data[:newline + 1]
+    if carry:
+        yield carry
+
+
+def _ordered_results(executor, fn, tasks, pattern, window):
+    """Submits tasks to the pool with a bounded window and yields results in input order."""
+    pending = deque()
+    for task in tasks:
+        pending.append(executor.submit(fn, *task, pattern))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def iter_critical_errors(input_log_file, keywords=DEFAULT_KEYWORDS, regex=False, workers=None,
+                         chunk_size=DEFAULT_CHUNK_SIZE, start=0, end=None):
+    """
+    Searches a log file for lines matching any keyword, in parallel, preserving input order.
+    Plain files are memory-mapped and split on line boundaries across a process pool;
+    .gz and .zst files are decompressed as a stream and handed to the pool block by block.
+    Args:
+        input_log_file (str): Path of the log file (.gz/.zst are read transparently).
+        keywords (iterable): Keywords or patterns to search for (case-insensitive).
+        regex (bool): Treat keywords as regular expressions.
+        workers (int): Number of worker processes (default: CPU count).
+        chunk_size (int): Bytes per worker task.
+        start (int): Byte offset to start at in a plain file (must be at a line boundary).
+        end (int): Byte offset to stop at in a plain file (default: EOF).
+    Yields:
+        bytes: Matching lines, stripped, in input order.
+    """
+    pattern = build_pattern(keywords, regex)
+    workers = workers or os.cpu_count() or 1
+    compressed = input_log_file.endswith((".gz", ".zst"))
+
+    if compressed:
+        stream = open_compressed(input_log_file)
+        tasks = ((block,) for block in iter_line_blocks(stream, chunk_size))
+        fn = _search_block
+    else:
+        stream = None
+        ranges = split_on_lines(input_log_file, chunk_size, start, end)
+        tasks = ((input_log_file, s, e) for s, e in ranges)
+        fn = _search_file_range
+        if len(ranges) <= 1:
+            workers = 1  # Not worth starting a pool for a single chunk
+
+    try:
+        if workers == 1:
+            for task in tasks:
+                yield from fn(*task, pattern)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for lines in _ordered_results(executor, fn, tasks, pattern, workers * 2):
+                    yield from lines
+    finally:
+        if stream is not None:
+            stream.close()
+
+
+def extract_critical_errors(input_log_file, keywords=DEFAULT_KEYWORDS, regex=False, workers=None,
+                            output_log_file=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Extracts matching lines from a log file into a timestamped critical_errors file.
+    Args:
+        input_log_file (str): Path of the log file to search.
+        keywords (iterable): Keywords or patterns to search for (case-insensitive).
+        regex (bool): Treat keywords as regular expressions.
+        workers (int): Number of worker processes (default: CPU count).
+        output_log_file (str): Output path (default: critical_errors_<timestamp>.txt).
+        chunk_size (int): Bytes per worker task.
+    Returns:
+        str: Path of the output file.
+    """
+    if output_log_file is None:
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        output_log_file = f"critical_errors_{timestamp}.txt"
+
+    with open(output_log_file, "wb") as outfile:
+        for line in iter_critical_errors(input_log_file, keywords, regex, workers, chunk_size):
+            outfile.write(line + b"\n")
+
+    print(f"Critical errors have been extracted to: {output_log_file}")
+    return output_log_file
+
+
+def load_checkpoints(checkpoint_file=DEFAULT_CHECKPOINT_FILE):
+    """
+    Loads per-file read positions saved by previous incremental runs.
+    Args:
+        checkpoint_file (str): Path of the JSON checkpoint file.
+    Returns:
+        dict: Checkpoint entries keyed by absolute input path.
+    """
+    try:
+        with open(checkpoint_file, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_checkpoints(checkpoints, checkpoint_file=DEFAULT_CHECKPOINT_FILE):
+    """Atomically writes the checkpoint file so an interrupted run never leaves it half-written."""
+    temp_file = checkpoint_file + ".tmp"
+    with open(temp_file, "w") as f:
+        json.dump(checkpoints, f, indent=2)
+    os.replace(temp_file, checkpoint_file)
+
+
+def file_fingerprint(path, length=FINGERPRINT_BYTES):
+    """
+    Hashes the head of a file.
+    Args:
+        path (str): Path of the file.
+        length (int): Number of leading bytes to hash.
+    Returns:
+        tuple: (sha1 hex digest, number of bytes hashed).
+    """
+    with open(path, "rb") as f:
+        head = f.read(length)
+    return hashlib.sha1(head).hexdigest(), len(head)
+
+
+def complete_lines_end(path, start, size):
+    """Returns the offset just past the last newline in [start, size), so partial lines are left for the next run."""
+    if size <= start:
+        return start
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        newline = mm.rfind(b"\n", start, size)
+    return newline + 1 if newline >= 0 else start
+
+
+def find_rotated_file(path, inode, device):
+    """
+    Looks for the file logrotate renamed the input to (e.g., system_logs.txt.1).
+    Args:
+        path (str): Current path of the log file.
+        inode (int): Inode recorded in the checkpoint.
+        device (int): Device recorded in the checkpoint.
+    Returns:
+        str: Path of the rotated file, or None if it is gone (or was compressed).
+    """
+    path = os.path.abspath(path)
+    for entry in os.scandir(os.path.dirname(path)):
+        if entry.path != path and entry.is_file(follow_symlinks=False) and entry.inode() == inode:
+            if entry.stat(follow_symlinks=False).st_dev == device:
+                return entry.path
+    return None
+
+
+def extract_new_critical_errors(input_log_file, keywords=DEFAULT_KEYWORDS, regex=False, workers=None,
+                                checkpoint_file=DEFAULT_CHECKPOINT_FILE, output_log_file=None):
+    """
+    Appends matches from the part of a log written since the last run.
+    The checkpoint records each file's byte offset, inode and a head fingerprint. A changed
+    inode means the log was rotated: the rest of the renamed file is read before starting the
+    new one from byte 0. A shrunken file or changed fingerprint means it was truncated or
+    rewritten and is rescanned from the start.
+    Args:
+        input_log_file (str): Path of the (uncompressed) log file.
+        keywords (iterable): Keywords or patterns to search for (case-insensitive).
+        regex (bool): Treat keywords as regular expressions.
+        workers (int): Number of worker processes (default: CPU count).
+        checkpoint_file (str): Path of the JSON checkpoint file.
+        output_log_file (str): Output path (default: the one recorded in the checkpoint,
+            or a new critical_errors_<timestamp>.txt on the first run).
+    Returns:
+        int: Number of new matching lines appended.
+    """
+    if input_log_file.endswith((".gz", ".zst")):
+        raise ValueError("Incremental mode needs an uncompressed, growing log file")
+
+    checkpoints = load_checkpoints(checkpoint_file)
+    key = os.path.abspath(input_log_file)
+    state = checkpoints.get(key)
+    if output_log_file is None:
+        output_log_file = state["output"] if state else None
+    if output_log_file is None:
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        output_log_file = f"critical_errors_{timestamp}.txt"
+
+    stat = os.stat(input_log_file)
+    ranges = []  # (path, start, end) still to be searched, in log order
+    start = 0
+    if state:
+        if (state["inode"], state["device"]) != (stat.st_ino, stat.st_dev):
+            rotated = find_rotated_file(input_log_file, state["inode"], state["device"])
+            if rotated:
+                ranges.append((rotated, state["offset"], os.path.getsize(rotated)))
+            else:
+                print(f"[!] {input_log_file} was rotated and the old file is gone; its unread tail is lost")
+        elif stat.st_size < state["offset"] or \
+                file_fingerprint(input_log_file, state["fingerprint_length"])[0] != state["fingerprint"]:
+            print(f"[!] {input_log_file} was truncated or rewritten; rescanning from the start")
+        else:
+            start = state["offset"]
+    end = complete_lines_end(input_log_file, start, stat.st_size)
+    ranges.append((input_log_file, start, end))
+
+    count = 0
+    with open(output_log_file, "ab") as outfile:
+        for path, range_start, range_end in ranges:
+            for line in iter_critical_errors(path, keywords, regex, workers, start=range_start, end=range_end):
+                outfile.write(line + b"\n")
+                count += 1
+
+    fingerprint, fingerprint_length = file_fingerprint(input_log_file)
+    checkpoints[key] = {
+        "offset": end,
+        "inode": stat.st_ino,
+        "device": stat.st_dev,
+        "fingerprint": fingerprint,
+        "fingerprint_length": fingerprint_length,
+        "output": output_log_file,
+    }
+    save_checkpoints(checkpoints, checkpoint_file)
+    return count
+
+
+def follow_critical_errors(input_log_file, keywords=DEFAULT_KEYWORDS, regex=False, workers=1,
+                           checkpoint_file=DEFAULT_CHECKPOINT_FILE, output_log_file=None, poll_interval=1.0):
+    """
+    Keeps extracting new matches as the log grows (like tail -f), surviving rotation.
+    Uses inotify on the log's directory when inotify_simple is installed, otherwise polls.
+    Args:
+        input_log_file (str): Path of the (uncompressed) log file.
+        keywords (iterable): Keywords or patterns to search for (case-insensitive).
+        regex (bool): Treat keywords as regular expressions.
+        workers (int): Number of worker processes per pass (new data is usually small).
+        checkpoint_file (str): Path of the JSON checkpoint file.
+        output_log_file (str): Output path (see extract_new_critical_errors).
+        poll_interval (float): Seconds between polls, or the inotify wait timeout.
+    """
+    def catch_up():
+        count = extract_new_critical_errors(input_log_file, keywords, regex, workers,
+                                            checkpoint_file, output_log_file)
+        if count:
+            output = load_checkpoints(checkpoint_file)[os.path.abspath(input_log_file)]["output"]
+            print(f"[+] {count} new critical errors appended to: {output}")
+
+    catch_up()
+    if INotify is None:
+        while True:
+            time.sleep(poll_interval)
+            if os.path.exists(input_log_file):
+                catch_up()
+
+    # Watch the directory, not the file, so rotation (rename + create) is seen too
+    inotify = INotify()
+    mask = inotify_flags.MODIFY | inotify_flags.CREATE | inotify_flags.MOVED_TO | inotify_flags.MOVED_FROM
+    inotify.add_watch(os.path.dirname(os.path.abspath(input_log_file)), mask)
+    name = os.path.basename(input_log_file)
+    while True:
+        events = inotify.read(timeout=int(poll_interval * 1000))
+        if any(event.name == name for event in events) and os.path.exists(input_log_file):
+            catch_up()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract critical errors from (compressed) log files")
+    parser.add_argument("log_file", nargs="?", default="system_logs.txt", help="Log file to search")
+    parser.add_argument("-k", "--keyword", action="append", dest="keywords",
+                        help="Keyword to search for (repeatable, default: critical)")
+    parser.add_argument("--regex", action="store_true", help="Treat keywords as regular expressions")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--output", default=None, help="Output file (default: critical_errors_<timestamp>.txt)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only read what was appended since the last run and append new matches")
+    parser.add_argument("--follow", action="store_true", help="Keep watching the log for new lines (tail -f)")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_FILE, help="Checkpoint file for incremental runs")
+    args = parser.parse_args()
+    keywords = args.keywords or DEFAULT_KEYWORDS
+
+    if args.follow:
+        try:
+            follow_critical_errors(args.log_file, keywords, args.regex, args.workers or 1,
+                                   args.checkpoint, args.output)
+        except KeyboardInterrupt:
+            print("\nFollow mode stopped.")
+    elif args.incremental:
+        count = extract_new_critical_errors(args.log_file, keywords, args.regex, args.workers,
+                                            args.checkpoint, args.output)
+        output = load_checkpoints(args.checkpoint)[os.path.abspath(args.log_file)]["output"]
+        print(f"{count} new critical errors have been appended to: {output}")
+    else:
+        extract_critical_errors(args.log_file, keywords, args.regex, args.workers, args.output)
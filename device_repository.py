@@ -0,0 +1,166 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    ip_address TEXT,
+    status TEXT NOT NULL DEFAULT 'unknown',
+    last_backup TEXT
+);
+CREATE INDEX IF NOT EXISTS devices_name ON devices (name);
+CREATE INDEX IF NOT EXISTS devices_ip_address ON devices (ip_address);
+CREATE INDEX IF NOT EXISTS devices_status_name ON devices (status, name);
+CREATE INDEX IF NOT EXISTS devices_last_backup ON devices (last_backup);
+
+-- Bumped by every change, so any worker can tell whether a rendered page is still current
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+CREATE TRIGGER IF NOT EXISTS devices_insert AFTER INSERT ON devices
+    BEGIN UPDATE meta SET value = value + 1 WHERE key = 'version'; END;
+CREATE TRIGGER IF NOT EXISTS devices_update AFTER UPDATE ON devices
+    BEGIN UPDATE meta SET value = value + 1 WHERE key = 'version'; END;
+CREATE TRIGGER IF NOT EXISTS devices_delete AFTER DELETE ON devices
+    BEGIN UPDATE meta SET value = value + 1 WHERE key = 'version'; END;
+"""
+
+SORT_COLUMNS = ("name", "ip_address", "status", "last_backup", "id")
+
+
+class DeviceRepository:
+    """
+    Device inventory in a SQLite database in WAL mode, so several web workers can read while
+    one writes. Each thread gets its own connection.
+    """
+
+    def __init__(self, path="devices.db"):
+        """
+        Args:
+            path (str): Database file (created with its schema if missing).
+        """
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def version(self):
+        """Returns a counter that changes whenever any device changes."""
+        return self._connection().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM devices").fetchone()[0]
+
+    def upsert_many(self, devices):
+        """
+        Inserts or replaces devices.
+        Args:
+            devices (iterable): Device dicts with id, name and optionally ip_address, status and last_backup.
+        """
+        rows = ((device.get("id"), device["name"], device.get("ip_address"), device.get("status", "unknown"),
+                 device.get("last_backup")) for device in devices)
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT INTO devices (id, name, ip_address, status, last_backup) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET name = excluded.name, ip_address = excluded.ip_address, "
+                "status = excluded.status, last_backup = excluded.last_backup", rows)
+
+    def seed(self, devices):
+        """Loads devices only if the repository is empty."""
+        if self.count() == 0:
+            self.upsert_many(devices)
+
+    def get(self, device_id):
+        row = self._connection().execute("SELECT * FROM devices WHERE id = ?", (device_id,)).fetchone()
+        return dict(row) if row else None
+
+    def all(self):
+        """Returns every device as a dict, ordered by id."""
+        return [dict(row) for row in self._connection().execute("SELECT * FROM devices ORDER BY id")]
+
+    def mark_backed_up(self, device_id, timestamp):
+        """Records a device's last successful backup time."""
+        with self._connection() as connection:
+            connection.execute("UPDATE devices SET last_backup = ? WHERE id = ?", (timestamp, device_id))
+
+    def page(self, page=1, per_page=50, status=None, search=None, sort="name", descending=False):
+        """
+        Returns one page of devices, filtered and sorted in the database.
+        Args:
+            page (int): 1-based page number.
+            per_page (int): Devices per page.
+            status (str): Only devices with this status.
+            search (str): Only devices whose name or IP address starts with this text.
+            sort (str): Column to sort on (one of SORT_COLUMNS).
+            descending (bool): Sort in descending order.
+        Returns:
+            tuple: (list of device dicts, total number of matching devices).
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort on {sort!r}")
+        where, params = [], []
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if search:
+            # Prefix ranges rather than LIKE, so the name and IP indexes are used
+            where.append("((name >= ? AND name < ?) OR (ip_address >= ? AND ip_address < ?))")
+            params += [search, search + "\uffff", search, search + "\uffff"]
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+        direction = "DESC" if descending else "ASC"
+
+        connection = self._connection()
+        total = connection.execute(f"SELECT COUNT(*) FROM devices{clause}", params).fetchone()[0]
+        rows = connection.execute(
+            f"SELECT * FROM devices{clause} ORDER BY {sort} {direction}, id {direction} LIMIT ? OFFSET ?",
+            params + [per_page, (max(page, 1) - 1) * per_page]).fetchall()
+        return [dict(row) for row in rows], total
+
+    def statuses(self):
+        """Returns the distinct device statuses."""
+        return [row[0] for row in self._connection().execute("SELECT DISTINCT status FROM devices ORDER BY status")]
+
+
+def benchmark_device_repository(device_count=50_000, per_page=50):
+    """
+    Times bulk load and typical dashboard page queries on a large synthetic inventory.
+    Args:
+        device_count (int): Number of devices loaded.
+        per_page (int): Page size queried.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        repository = DeviceRepository(os.path.join(directory, "devices.db"))
+        devices = [{"id": index, "name": f"Device-{index:06d}",
+                    "ip_address": f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}",
+                    "status": "down" if index % 17 == 0 else "up"} for index in range(1, device_count + 1)]
+        start = time.perf_counter()
+        repository.upsert_many(devices)
+        load = time.perf_counter() - start
+        print(f"[+] Loaded {device_count} devices in {load:.2f}s")
+
+        queries = {
+            "first page by name": {},
+            "last page by name": {"page": device_count // per_page},
+            "status=down sorted by name": {"status": "down"},
+            "name prefix search": {"search": "Device-0123"},
+            "IP prefix search": {"search": "10.0.100."},
+            "sorted by last backup, descending": {"sort": "last_backup", "descending": True},
+        }
+        for label, options in queries.items():
+            start = time.perf_counter()
+            rows, total = repository.page(per_page=per_page, **options)
+            elapsed = time.perf_counter() - start
+            print(f"[+] {label}: {len(rows)} of {total} in {elapsed * 1000:.1f} ms")
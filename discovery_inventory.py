@@ -0,0 +1,288 @@
+import ipaddress
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    mac TEXT PRIMARY KEY,
+    ip TEXT,
+    hostname TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    present INTEGER NOT NULL DEFAULT 1,  -- seen in the latest complete sweep
+    fingerprint TEXT,                    -- JSON enrichment result
+    fingerprint_ip TEXT,                 -- address the fingerprint was taken from
+    fingerprint_expires REAL
+);
+CREATE INDEX IF NOT EXISTS devices_ip ON devices (ip);
+CREATE TABLE IF NOT EXISTS ip_history (
+    mac TEXT NOT NULL,
+    ip TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (mac, ip)
+);
+CREATE INDEX IF NOT EXISTS ip_history_ip ON ip_history (ip);
+"""
+
+DEFAULT_FINGERPRINT_TTL = 24 * 3600
+DEFAULT_FAILURE_TTL = 3600  # Devices that did not answer are retried sooner
+FINGERPRINT_FIELDS = ("sys_descr", "sys_name")  # Present in every result from a device that answered
+
+
+def fingerprint_failed(info):
+    """
+    Tells whether enriching a device failed, i.e. it did not answer: the result has an 'error' key or
+    none of FINGERPRINT_FIELDS. A device that answered with an unrecognised sysDescr (type 'Unknown')
+    still has a valid fingerprint.
+    """
+    return "error" in info or all(info.get(field) is None for field in FINGERPRINT_FIELDS)
+
+
+class DiscoveryInventory:
+    """
+    Persistent device inventory keyed by MAC address, kept in SQLite.
+    Each sweep is diffed against the stored state, and enrichment results (e.g. SNMP fingerprints)
+    are cached with a TTL, so only new, changed or expired devices need to be enriched again.
+    """
+
+    def __init__(self, path="discovery_inventory.db", fingerprint_ttl=DEFAULT_FINGERPRINT_TTL,
+                 failure_ttl=DEFAULT_FAILURE_TTL):
+        """
+        Args:
+            path (str): SQLite database file.
+            fingerprint_ttl (float): Seconds a fingerprint stays valid.
+            failure_ttl (float): Seconds a failed fingerprint (see fingerprint_failed) is kept before retrying.
+        """
+        self.path = path
+        self.fingerprint_ttl = fingerprint_ttl
+        self.failure_ttl = failure_ttl
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def record_sweep(self, devices, seen_at=None, complete=True, scope=None):
+        """
+        Stores the result of a sweep and diffs it against the previous state.
+        Args:
+            devices (iterable): Device dicts with 'mac', 'ip' and optionally 'hostname'.
+            seen_at (float): Sweep time (default: now).
+            complete (bool): The sweep finished, so devices in its scope that it did not see are removed.
+                Pass False for failed, partial or passive sweeps.
+            scope (str or iterable): Network(s) the sweep covered, as CIDR strings; only devices last seen
+                at an address in them can be removed (default: the whole inventory).
+        Returns:
+            dict: 'added' and 'removed' device dicts, 'changed' dicts with mac, ip and
+                'changes' (field -> [old, new]), and the 'unchanged' count.
+        """
+        seen_at = time.time() if seen_at is None else seen_at
+        swept = {}
+        for device in devices:
+            swept[device["mac"].lower()] = device
+        connection = self._connection()
+        with connection:
+            known = {row["mac"]: row for row in connection.execute(
+                "SELECT mac, ip, hostname, present FROM devices")}
+            diff = {"added": [], "removed": [], "changed": [], "unchanged": 0}
+            for mac, device in swept.items():
+                ip, hostname = device.get("ip"), device.get("hostname")
+                row = known.get(mac)
+                if row is None:
+                    diff["added"].append({"mac": mac, "ip": ip, "hostname": hostname})
+                    continue
+                changes = {}
+                if ip and ip != row["ip"]:
+                    changes["ip"] = [row["ip"], ip]
+                if hostname and hostname != row["hostname"]:
+                    changes["hostname"] = [row["hostname"], hostname]
+                if not row["present"]:
+                    changes["present"] = [False, True]
+                if changes:
+                    diff["changed"].append({"mac": mac, "ip": ip or row["ip"], "changes": changes})
+                else:
+                    diff["unchanged"] += 1
+            if complete:
+                networks = None
+                if scope is not None:
+                    networks = [ipaddress.ip_network(network, strict=False)
+                                for network in ([scope] if isinstance(scope, str) else scope)]
+                diff["removed"] = [{"mac": mac, "ip": row["ip"], "hostname": row["hostname"]}
+                                   for mac, row in known.items()
+                                   if row["present"] and mac not in swept and _in_scope(row["ip"], networks)]
+
+            connection.executemany(
+                "INSERT INTO devices (mac, ip, hostname, first_seen, last_seen, present) VALUES (?, ?, ?, ?, ?, 1) "
+                "ON CONFLICT (mac) DO UPDATE SET ip = COALESCE(excluded.ip, ip), "
+                "hostname = COALESCE(excluded.hostname, hostname), last_seen = excluded.last_seen, present = 1",
+                [(mac, device.get("ip"), device.get("hostname"), seen_at, seen_at) for mac, device in swept.items()])
+            connection.executemany(
+                "INSERT INTO ip_history (mac, ip, first_seen, last_seen) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (mac, ip) DO UPDATE SET last_seen = excluded.last_seen",
+                [(mac, device["ip"], seen_at, seen_at) for mac, device in swept.items() if device.get("ip")])
+            connection.executemany("UPDATE devices SET present = 0 WHERE mac = ?",
+                                   [(device["mac"],) for device in diff["removed"]])
+        return diff
+
+    def stale(self, devices, now=None):
+        """
+        Picks the devices whose fingerprint must be (re)taken: never fingerprinted, expired,
+        or fingerprinted at a different address than they have now.
+        Args:
+            devices (iterable): Device dicts with 'mac' and 'ip'.
+            now (float): Current time (default: now).
+        Returns:
+            list: The device dicts that need enrichment.
+        """
+        now = time.time() if now is None else now
+        devices = list(devices)
+        cached = self._fingerprint_rows([device["mac"] for device in devices])
+        stale = []
+        for device in devices:
+            row = cached.get(device["mac"].lower())
+            if (row is None or row["fingerprint"] is None or row["fingerprint_expires"] <= now
+                    or row["fingerprint_ip"] != device.get("ip")):
+                stale.append(device)
+        return stale
+
+    def store_fingerprints(self, fingerprints, now=None):
+        """
+        Caches enrichment results.
+        Args:
+            fingerprints (iterable): (mac, ip, info dict) tuples.
+            now (float): Time the fingerprints were taken (default: now).
+        """
+        now = time.time() if now is None else now
+        rows = []
+        for mac, ip, info in fingerprints:
+            ttl = self.failure_ttl if fingerprint_failed(info) else self.fingerprint_ttl
+            rows.append((json.dumps(info), ip, now + ttl, mac.lower()))
+        with self._connection() as connection:
+            connection.executemany(
+                "UPDATE devices SET fingerprint = ?, fingerprint_ip = ?, fingerprint_expires = ? WHERE mac = ?", rows)
+
+    def fingerprints(self, macs):
+        """Returns the cached fingerprints of devices, as mac -> info dict (expired ones included)."""
+        return {mac: json.loads(row["fingerprint"]) for mac, row in self._fingerprint_rows(macs).items()
+                if row["fingerprint"] is not None}
+
+    def _fingerprint_rows(self, macs):
+        macs = [mac.lower() for mac in macs]
+        rows = {}
+        connection = self._connection()
+        for start in range(0, len(macs), 500):  # Stay below SQLite's bound parameter limit
+            batch = macs[start:start + 500]
+            query = ("SELECT mac, fingerprint, fingerprint_ip, fingerprint_expires FROM devices "
+                     f"WHERE mac IN ({', '.join('?' * len(batch))})")
+            rows.update((row["mac"], row) for row in connection.execute(query, batch))
+        return rows
+
+    def enrich(self, devices, fingerprint, now=None):
+        """
+        Merges fingerprints into devices, calling the fingerprint function only for stale devices.
+        Args:
+            devices (list): Device dicts with 'mac' and 'ip' (already recorded with record_sweep).
+            fingerprint (callable): Called with a list of IP addresses; returns ip -> info dict
+                (e.g. LAN_device_discovery_detailed.poll_devices). Devices missing from the result count as failed.
+            now (float): Current time (default: now).
+        Returns:
+            int: Number of devices that were fingerprinted.
+        """
+        stale = [device for device in self.stale(devices, now) if device.get("ip")]
+        if stale:
+            results = fingerprint([device["ip"] for device in stale])
+            missing = {"type": "Unknown", "os": "Unknown", "error": "No result"}
+            self.store_fingerprints(((device["mac"], device["ip"], results.get(device["ip"], missing))
+                                     for device in stale), now)
+        cached = self.fingerprints([device["mac"] for device in devices])
+        for device in devices:
+            device.update(cached.get(device["mac"].lower(), {}))
+        return len(stale)
+
+    def history(self, mac):
+        """Returns a device's addresses with when each was first and last seen, newest first."""
+        return [dict(row) for row in self._connection().execute(
+            "SELECT ip, first_seen, last_seen FROM ip_history WHERE mac = ? ORDER BY last_seen DESC", (mac.lower(),))]
+
+    def get(self, mac):
+        row = self._connection().execute("SELECT * FROM devices WHERE mac = ?", (mac.lower(),)).fetchone()
+        return dict(row) if row else None
+
+
+def _in_scope(ip, networks):
+    if networks is None:
+        return True
+    if not ip:
+        return False
+    address = ipaddress.ip_address(ip)
+    return any(address in network for network in networks)
+
+
+def format_diff(diff):
+    """Formats a sweep diff for printing, one line per added, removed or changed device."""
+    lines = [f"[+] {len(diff['added'])} added, {len(diff['removed'])} removed, "
+             f"{len(diff['changed'])} changed, {diff['unchanged']} unchanged"]
+    lines += [f"    + {device['ip']} {device['mac']}" for device in diff["added"]]
+    lines += [f"    - {device['ip']} {device['mac']}" for device in diff["removed"]]
+    for device in diff["changed"]:
+        changes = ", ".join(f"{field} {old} -> {new}" for field, (old, new) in device["changes"].items())
+        lines.append(f"    ~ {device['ip']} {device['mac']}: {changes}")
+    return "\n".join(lines)
+
+
+def benchmark_inventory(device_count=2000, sweeps=24, churn=0.05, fingerprint_seconds=0.01, seed=1):
+    """
+    Simulates hourly sweeps of a LAN where a few devices change each hour, comparing the cost of
+    fingerprinting every device on every sweep with fingerprinting only what changed.
+    Args:
+        device_count (int): Devices on the simulated LAN.
+        sweeps (int): Number of sweeps (one simulated hour apart).
+        churn (float): Share of devices that join, leave or change address each sweep.
+        fingerprint_seconds (float): Simulated cost of fingerprinting one device.
+        seed (int): Random seed.
+    """
+    rng = random.Random(seed)
+    lan = {f"02:00:00:00:{index >> 8:02x}:{index & 255:02x}": f"10.1.{index >> 8}.{index & 255}"
+           for index in range(device_count)}
+    calls = []
+
+    def fingerprint(ips):
+        calls.extend(ips)
+        return {ip: {"type": "Server", "os": "Linux", "sys_name": f"host-{ip}"} for ip in ips}
+
+    with tempfile.TemporaryDirectory() as directory:
+        inventory = DiscoveryInventory(os.path.join(directory, "inventory.db"))
+        now = time.time()
+        start = time.perf_counter()
+        totals = {"added": 0, "removed": 0, "changed": 0}
+        for sweep in range(sweeps):
+            present = {mac: ip for mac, ip in lan.items() if rng.random() > churn}
+            for mac in rng.sample(sorted(present), int(len(present) * churn / 2)):
+                present[mac] = f"10.2.{rng.randrange(256)}.{rng.randrange(256)}"
+            devices = [{"mac": mac, "ip": ip} for mac, ip in present.items()]
+            diff = inventory.record_sweep(devices, seen_at=now + sweep * 3600)
+            inventory.enrich(devices, fingerprint, now=now + sweep * 3600)
+            for key in totals:
+                totals[key] += len(diff[key])
+        elapsed = time.perf_counter() - start
+
+    full = device_count * sweeps
+    print(f"[+] {sweeps} sweeps of {device_count} devices: {totals['added']} added, "
+          f"{totals['removed']} removed, {totals['changed']} changed")
+    print(f"[+] Fingerprinted {len(calls)} devices instead of ~{full} "
+          f"({len(calls) / full:.1%}); ~{len(calls) * fingerprint_seconds:.0f}s of probing instead of "
+          f"~{full * fingerprint_seconds:.0f}s; inventory bookkeeping took {elapsed:.2f}s")
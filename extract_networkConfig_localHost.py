@@ -1,41 +1,245 @@
 import os
-import subprocess
+import json
+import time
+import socket
+import struct
+import hashlib
+import argparse
 import datetime
 
+import psutil
 
-def extract_network_configuration():
-    # Get the current working directory
-    current_dir = os.getcwd()
-    
-    # Generate a unique filename with date and time stamp
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    output_file = os.path.join(current_dir, f"network_config_{timestamp}.txt")
+# Route flags (linux/route.h)
+RTF_UP = 0x0001
+RTF_GATEWAY = 0x0002
+
+# Link attributes read from sysfs; counters are left out because they change constantly
+SYSFS_LINK_ATTRIBUTES = ("operstate", "carrier", "address", "mtu", "type")
+
+# Kernel settings that change how the host routes traffic
+SYSCTLS = (
+    "net.ipv4.ip_forward",
+    "net.ipv6.conf.all.forwarding",
+    "net.ipv4.conf.all.rp_filter",
+    "net.ipv6.conf.all.disable_ipv6",
+)
+
+STATE_FILE = "network_config_state.json"
+
+
+def read_text(path):
+    """Reads a small sysfs/procfs file, returning None if it is missing or unreadable."""
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def collect_interfaces():
+    """
+    Collects interfaces with their addresses and link state.
+    Addresses come from getifaddrs (netlink on Linux) via psutil, link state from sysfs where available.
+    Returns:
+        dict: Interface name -> attributes.
+    """
+    families = {socket.AF_INET: "ipv4", socket.AF_INET6: "ipv6", psutil.AF_LINK: "link"}
+    stats = psutil.net_if_stats()
+    interfaces = {}
+    for name, addresses in psutil.net_if_addrs().items():
+        interface = {"addresses": sorted(
+            ({"family": families.get(address.family, str(address.family)), "address": address.address,
+              "netmask": address.netmask, "broadcast": address.broadcast} for address in addresses),
+            key=lambda address: (address["family"], address["address"]))}
+        if name in stats:
+            stat = stats[name]
+            interface.update(up=stat.isup, speed=stat.speed, mtu=stat.mtu, duplex=int(stat.duplex))
+        for attribute in SYSFS_LINK_ATTRIBUTES:
+            value = read_text(f"/sys/class/net/{name}/{attribute}")
+            if value is not None:
+                interface[attribute] = value
+        interfaces[name] = interface
+    return interfaces
 
 
+def collect_ipv4_routes(path="/proc/net/route"):
+    """Parses the kernel IPv4 routing table (empty if unavailable)."""
+    routes = []
     try:
-        # Execute the command to get network configuration (platform-dependent)
-        if subprocess.os.name == "nt":    # Windows OS
-            command = ["ipconfig", "/all"]
-        else:  # Unix/Linux OS
-            command = ["ifconfig", "-a"]
-
-        # Run the command and capture the output
-
-        result = subprocess.run(command, stdout=subprocess.PIPE,
-stderr=subprocess.PIPE, text=True)
-            
-        # Check if the command executed successfully
-        if result.returncode == 0:
-            # Write the output to the file
-            with open(output_file, 'w') as file:
-                file.write(result.stdout)
-            print(f"Network configuration has been saved to: {output_file}")
-        else:
-            print(f"Error executing command: {result.stderr}")
-    except Exception as e:
-        print(f"An error occurred: {e}")
+        with open(path) as f:
+            lines = f.read().splitlines()[1:]
+    except OSError:
+        return routes
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 8:
+            continue
+        flags = int(fields[3], 16)
+        if not flags & RTF_UP:
+            continue
+        mask = int(fields[7], 16)
+        routes.append({
+            "family": "ipv4",
+            "destination": socket.inet_ntoa(struct.pack("<I", int(fields[1], 16))),
+            "prefix": bin(mask).count("1"),
+            "gateway": socket.inet_ntoa(struct.pack("<I", int(fields[2], 16))) if flags & RTF_GATEWAY else None,
+            "interface": fields[0],
+            "metric": int(fields[6]),
+        })
+    return routes
+
+
+def collect_ipv6_routes(path="/proc/net/ipv6_route"):
+    """Parses the kernel IPv6 routing table (empty if unavailable)."""
+    routes = []
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return routes
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 10:
+            continue
+        flags = int(fields[8], 16)
+        if not flags & RTF_UP:
+            continue
+        routes.append({
+            "family": "ipv6",
+            "destination": socket.inet_ntop(socket.AF_INET6, bytes.fromhex(fields[0])),
+            "prefix": int(fields[1], 16),
+            "gateway": socket.inet_ntop(socket.AF_INET6, bytes.fromhex(fields[4])) if flags & RTF_GATEWAY else None,
+            "interface": fields[9],
+            "metric": int(fields[5], 16),
+        })
+    return routes
+
+
+def collect_sysctls():
+    """Reads routing-related kernel settings from /proc/sys (only those present)."""
+    values = {}
+    for name in SYSCTLS:
+        value = read_text("/proc/sys/" + name.replace(".", "/"))
+        if value is not None:
+            values[name] = value
+    return values
+
+
+def collect_network_snapshot():
+    """
+    Collects the host's network configuration without spawning any process.
+    Returns:
+        dict: Structured snapshot with interfaces, routes and sysctls.
+    """
+    routes = collect_ipv4_routes() + collect_ipv6_routes()
+    routes.sort(key=lambda route: (route["family"], route["destination"], route["prefix"],
+                                   route["interface"], route["metric"]))
+    return {"hostname": socket.gethostname(), "interfaces": collect_interfaces(),
+            "routes": routes, "sysctl": collect_sysctls()}
+
+
+def snapshot_digest(snapshot):
+    """Hashes a snapshot's canonical JSON form."""
+    return hashlib.sha256(json.dumps(snapshot, sort_keys=True).encode()).hexdigest()
+
+
+def describe_changes(old, new):
+    """
+    Summarizes what changed between two snapshots.
+    Returns:
+        list: Human-readable change descriptions.
+    """
+    if old is None:
+        return ["initial snapshot"]
+    changes = []
+    old_interfaces, new_interfaces = old.get("interfaces", {}), new["interfaces"]
+    for name in sorted(new_interfaces.keys() - old_interfaces.keys()):
+        changes.append(f"interface {name} added")
+    for name in sorted(old_interfaces.keys() - new_interfaces.keys()):
+        changes.append(f"interface {name} removed")
+    for name in sorted(new_interfaces.keys() & old_interfaces.keys()):
+        before, after = old_interfaces[name], new_interfaces[name]
+        for key in sorted(before.keys() | after.keys()):
+            if before.get(key) != after.get(key):
+                changes.append(f"interface {name} {key} changed")
+
+    def route_key(route):
+        return (route["family"], route["destination"], route["prefix"], route["gateway"],
+                route["interface"], route["metric"])
+
+    old_routes = {route_key(route) for route in old.get("routes", [])}
+    new_routes = {route_key(route) for route in new["routes"]}
+    for family, destination, prefix, gateway, interface, _ in sorted(new_routes - old_routes, key=str):
+        changes.append(f"route {destination}/{prefix} via {gateway or 'direct'} dev {interface} added")
+    for family, destination, prefix, gateway, interface, _ in sorted(old_routes - new_routes, key=str):
+        changes.append(f"route {destination}/{prefix} via {gateway or 'direct'} dev {interface} removed")
+
+    for name in sorted(old.get("sysctl", {}).keys() | new["sysctl"].keys()):
+        if old.get("sysctl", {}).get(name) != new["sysctl"].get(name):
+            changes.append(f"sysctl {name} changed")
+    if old.get("hostname") != new["hostname"]:
+        changes.append("hostname changed")
+    return changes
+
+
+def extract_network_configuration(output_dir=None, state_file=None, force=False):
+    """
+    Snapshots the network configuration and saves it only if it changed since the last snapshot.
+    Args:
+        output_dir (str): Directory for snapshot files (default: the current directory).
+        state_file (str): File remembering the last snapshot (default: network_config_state.json there).
+        force (bool): Write a snapshot even if nothing changed.
+    Returns:
+        str: Path of the new snapshot file, or None if nothing changed.
+    """
+    output_dir = output_dir or os.getcwd()
+    state_file = state_file or os.path.join(output_dir, STATE_FILE)
+
+    start = time.perf_counter()
+    snapshot = collect_network_snapshot()
+    digest = snapshot_digest(snapshot)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    previous = None
+    try:
+        with open(state_file) as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    if previous and previous.get("digest") == digest and not force:
+        print(f"Network configuration unchanged ({elapsed:.1f} ms)")
+        return None
+
+    changes = describe_changes(previous.get("snapshot") if previous else None, snapshot)
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    output_file = os.path.join(output_dir, f"network_config_{timestamp}.json")
+    with open(output_file, "w") as file:
+        json.dump({"timestamp": timestamp, "digest": digest, "changes": changes, "snapshot": snapshot},
+                  file, indent=2, sort_keys=True)
+
+    # Replace the state atomically, so an interrupted run never loses the previous snapshot
+    temporary = state_file + ".tmp"
+    with open(temporary, "w") as f:
+        json.dump({"digest": digest, "file": output_file, "snapshot": snapshot}, f)
+    os.replace(temporary, state_file)
+
+    print(f"Network configuration changed ({'; '.join(changes)}) - saved to: {output_file} ({elapsed:.1f} ms)")
+    return output_file
 
 
 # Run the function
-extract_network_configuration()  # Call the function to extract network configuration
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshot the network configuration when it changes")
+    parser.add_argument("--output-dir", help="Directory for snapshot files (default: current directory)")
+    parser.add_argument("--force", action="store_true", help="Write a snapshot even if nothing changed")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="Time N collections and exit")
+    args = parser.parse_args()
 
+    if args.benchmark:
+        start = time.perf_counter()
+        for _ in range(args.benchmark):
+            collect_network_snapshot()
+        print(f"[+] Average collection time: {(time.perf_counter() - start) * 1000 / args.benchmark:.2f} ms")
+    else:
+        extract_network_configuration(args.output_dir, force=args.force)  # Extract the network configuration
@@ -0,0 +1,115 @@
+from collections import OrderedDict
+
+
+class FlowTable:
+    """
+    Bounded 5-tuple flow table with packet/byte counters and per-second buckets.
+    Flows are kept in least-recently-seen order. When the table is full the least recently
+    seen flow is evicted, and flows idle for longer than idle_timeout are evicted as time
+    advances. Evicted flows are passed to on_evict as flow records, so memory stays bounded
+    however long the capture runs.
+    """
+
+    def __init__(self, max_flows=65536, idle_timeout=60.0, max_buckets=60, on_evict=None):
+        """
+        Args:
+            max_flows (int): Maximum number of flows held at once.
+            idle_timeout (float): Seconds without packets after which a flow is evicted.
+            max_buckets (int): Per-second buckets kept per flow (oldest dropped first).
+            on_evict (callable): Called with each evicted flow record (dict).
+        """
+        self.max_flows = max_flows
+        self.idle_timeout = idle_timeout
+        self.max_buckets = max_buckets
+        self.on_evict = on_evict
+        self.flows = OrderedDict()  # (src, dst, proto, sport, dport) -> [first, last, packets, bytes, buckets]
+        self.evicted = 0
+        self._last_idle_check = 0.0
+
+    def add(self, timestamp, src, dst, proto, size, sport=0, dport=0):
+        """
+        Accounts one packet to its flow.
+        Args:
+            timestamp (float): Capture time in seconds since the epoch.
+            src (int): Source IPv4 address as an integer.
+            dst (int): Destination IPv4 address as an integer.
+            proto (int): IP protocol number.
+            size (int): Packet length in bytes.
+            sport (int): Source port (0 for protocols without ports).
+            dport (int): Destination port (0 for protocols without ports).
+        """
+        key = (src, dst, proto, sport, dport)
+        flow = self.flows.get(key)
+        if flow is None:
+            if len(self.flows) >= self.max_flows:
+                self._evict(*self.flows.popitem(last=False))
+            flow = self.flows[key] = [timestamp, timestamp, 0, 0, {}]
+        else:
+            self.flows.move_to_end(key)
+            flow[1] = timestamp
+        flow[2] += 1
+        flow[3] += size
+
+        buckets = flow[4]
+        second = int(timestamp)
+        bucket = buckets.get(second)
+        if bucket is None:
+            if len(buckets) >= self.max_buckets:
+                del buckets[next(iter(buckets))]
+            bucket = buckets[second] = [0, 0]
+        bucket[0] += 1
+        bucket[1] += size
+
+        if timestamp - self._last_idle_check >= 1.0:
+            self.evict_idle(timestamp)
+
+    def extend(self, timestamps, srcs, dsts, protos, sizes, sports, dports):
+        """Accounts a batch of packets given as columns (as produced by raw_capture.decode_block)."""
+        for packet in zip(timestamps, srcs, dsts, protos, sizes, sports, dports):
+            self.add(*packet)
+
+    def evict_idle(self, now):
+        """
+        Evicts flows that have seen no packets for idle_timeout seconds.
+        Args:
+            now (float): Current capture time in seconds since the epoch.
+        """
+        self._last_idle_check = now
+        while self.flows:
+            key, flow = next(iter(self.flows.items()))
+            if now - flow[1] < self.idle_timeout:
+                break
+            del self.flows[key]
+            self._evict(key, flow)
+
+    def flush(self):
+        """Evicts every remaining flow, oldest first."""
+        while self.flows:
+            self._evict(*self.flows.popitem(last=False))
+
+    def _evict(self, key, flow):
+        self.evicted += 1
+        if self.on_evict is not None:
+            self.on_evict(flow_record(key, flow))
+
+    def __len__(self):
+        return len(self.flows)
+
+
+def flow_record(key, flow):
+    """
+    Builds the flow record emitted for a flow.
+    Args:
+        key (tuple): (src, dst, proto, sport, dport).
+        flow (list): [first_seen, last_seen, packets, bytes, buckets].
+    Returns:
+        dict: The flow record, including the busiest second's packet and byte counts.
+    """
+    src, dst, proto, sport, dport = key
+    first_seen, last_seen, packets, byte_count, buckets = flow
+    return {
+        "src": src, "dst": dst, "proto": proto, "sport": sport, "dport": dport,
+        "packets": packets, "bytes": byte_count, "first_seen": first_seen, "last_seen": last_seen,
+        "peak_pps": max((bucket[0] for bucket in buckets.values()), default=0),
+        "peak_bps": max((bucket[1] for bucket in buckets.values()), default=0),
+    }
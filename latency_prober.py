@@ -0,0 +1,331 @@
+import asyncio
+import ipaddress
+import socket
+import threading
+import time
+import numpy as np
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of latencies in nanoseconds.
+    Each power of two is split into 2**sub_bucket_bits linear sub-buckets, so every recorded value
+    is kept with a relative error below 2**-sub_bucket_bits (about 3% at the default) using a fixed
+    number of counters. Percentiles are read in one pass over the buckets.
+    """
+
+    def __init__(self, sub_bucket_bits=5):
+        """
+        Args:
+            sub_bucket_bits (int): Log2 of the number of linear sub-buckets per power of two.
+        """
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.counts = np.zeros((64 - sub_bucket_bits) * self.sub_bucket_count, dtype=np.int64)
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def bucket_index(self, value):
+        """Maps a value to its bucket."""
+        shift = max(0, value.bit_length() - self.sub_bucket_bits - 1)
+        return shift * self.sub_bucket_count + (value >> shift)
+
+    def bucket_upper(self, index):
+        """Returns the highest value that maps to a bucket."""
+        shift = max(0, index // self.sub_bucket_count - 1)
+        mantissa = index - shift * self.sub_bucket_count
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value):
+        """
+        Records one latency.
+        Args:
+            value (int): Latency in nanoseconds.
+        """
+        self.counts[self.bucket_index(value)] += 1
+        self.total += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """
+        Returns the value at a percentile.
+        Args:
+            percent (float): Percentile between 0 and 100.
+        Returns:
+            int: Latency in nanoseconds (the upper edge of its bucket, capped at the maximum), or None if empty.
+        """
+        if self.total == 0:
+            return None
+        rank = max(1, int(np.ceil(percent / 100 * self.total)))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(self.bucket_upper(index), self.max)
+
+    def reset(self):
+        """Clears all recorded values."""
+        self.counts[:] = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+
+class TargetStats:
+    """Latency histogram plus loss and error counters for one probe target."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.histogram = LatencyHistogram()
+        self.sent = 0
+        self.lost = 0  # Probes that timed out
+        self.errors = 0  # Probes that failed immediately (refused, unreachable, reset)
+        self.last = None  # Latency of the latest completed probe in nanoseconds (None if it failed)
+
+    def summary(self):
+        """
+        Returns the target's statistics.
+        Returns:
+            dict: target, sent, received, lost, errors, and last/p50/p95/p99/max latency in milliseconds.
+        """
+        histogram = self.histogram
+
+        def ms(value):
+            return value / 1e6 if value is not None else None
+
+        return {"target": format_target(self.host, self.port), "sent": self.sent, "received": histogram.total,
+                "lost": self.lost, "errors": self.errors, "last": ms(self.last),
+                "p50": ms(histogram.percentile(50)), "p95": ms(histogram.percentile(95)),
+                "p99": ms(histogram.percentile(99)), "max": ms(histogram.max if histogram.total else None)}
+
+
+def parse_target(target, default_port=53):
+    """
+    Parses a probe target: 'host', 'host:port', an IPv6 address ('::1') or '[address]:port'.
+    Returns:
+        tuple: (host, port).
+    Raises:
+        ValueError: If the target is malformed.
+    """
+    if target.startswith("["):
+        host, bracket, port = target[1:].partition("]")
+        if not bracket or (port and not port.startswith(":")):
+            raise ValueError(f"Invalid target {target!r}")
+        port = port[1:]
+    else:
+        try:
+            ipaddress.ip_address(target)  # A bare address (IPv6 ones contain colons) has no port
+            host, port = target, ""
+        except ValueError:
+            host, _, port = target.rpartition(":") if ":" in target else (target, "", "")
+    return host, int(port) if port else default_port
+
+
+def format_target(host, port):
+    """Formats a host and port as a target string, bracketing IPv6 addresses."""
+    return f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+
+
+async def probe_once(host, port, timeout=1.0, payload=None):
+    """
+    Times one TCP probe with perf_counter_ns.
+    Without a payload the TCP handshake is timed; with a payload the request/response round trip
+    after connecting is timed instead (the first bytes of the reply end the measurement).
+    Args:
+        host (str): Target address.
+        port (int): Target port.
+        timeout (float): Seconds before the probe counts as lost.
+        payload (bytes): Optional request to send.
+    Returns:
+        int: Latency in nanoseconds.
+    Raises:
+        asyncio.TimeoutError: If the probe timed out.
+        OSError: If the connection failed.
+    """
+    writer = None
+    try:
+        start = time.perf_counter_ns()
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        if payload is None:
+            return time.perf_counter_ns() - start
+        start = time.perf_counter_ns()
+        writer.write(payload)
+        reply = await asyncio.wait_for(reader.read(1), timeout)
+        if not reply:
+            raise ConnectionResetError("Connection closed before a reply")
+        return time.perf_counter_ns() - start
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+class LatencyProber:
+    """
+    Probes many targets concurrently, each at its own fixed rate, from one event loop.
+    Probes of one target never overlap; a global semaphore caps the probes in flight.
+    """
+
+    def __init__(self, targets, rate=1.0, timeout=1.0, concurrency=256, payload=None):
+        """
+        Args:
+            targets (list): (host, port) tuples or 'host:port' strings.
+            rate (float): Probes per second per target.
+            timeout (float): Seconds before a probe counts as lost.
+            concurrency (int): Maximum probes in flight across all targets.
+            payload (bytes): Optional request whose round trip is timed instead of the handshake.
+        """
+        self.rate = rate
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.payload = payload
+        self.stats = {}
+        for target in targets:
+            host, port = parse_target(target) if isinstance(target, str) else target
+            self.stats[(host, port)] = TargetStats(host, port)
+        self._stop = None
+        self._loop = None
+        self._thread = None
+
+    async def _probe_target(self, stats, semaphore, offset):
+        interval = 1 / self.rate
+        next_probe = time.monotonic() + offset  # Spread targets over the first interval
+        while not self._stop.is_set():
+            delay = next_probe - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._stop.wait(), delay)
+                    return
+                except asyncio.TimeoutError:
+                    pass
+            next_probe = max(next_probe + interval, time.monotonic())
+            async with semaphore:
+                stats.sent += 1
+                # last keeps the previous result while this probe is in flight, so readers never see a gap
+                try:
+                    latency = await probe_once(stats.host, stats.port, self.timeout, self.payload)
+                except asyncio.TimeoutError:
+                    stats.lost += 1
+                    stats.last = None
+                except OSError:
+                    stats.errors += 1
+                    stats.last = None
+                else:
+                    stats.histogram.record(latency)
+                    stats.last = latency
+
+    async def run(self, duration=None):
+        """
+        Probes every target until the duration elapses or stop() is called.
+        Args:
+            duration (float): Seconds to probe (None for no limit).
+        """
+        self._stop = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        count = len(self.stats)
+        tasks = [asyncio.create_task(self._probe_target(stats, semaphore, index / count / self.rate))
+                 for index, stats in enumerate(self.stats.values())]
+        if duration is not None:
+            self._loop.call_later(duration, self._stop.set)
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def start(self):
+        """Runs the prober in a background thread; statistics can be read while it runs."""
+        self._thread = threading.Thread(target=asyncio.run, args=(self.run(),), name="latency-prober", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops a prober started with start() and waits for in-flight probes to finish."""
+        while self._loop is None and self._thread is not None and self._thread.is_alive():
+            time.sleep(0.01)  # The loop has not started yet
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def summaries(self):
+        """Returns one summary dictionary per target."""
+        return [stats.summary() for stats in self.stats.values()]
+
+
+def format_summary(summary):
+    """Formats a target summary as one line."""
+    def ms(value):
+        return f"{value:.2f} ms" if value is not None else "N/A"
+
+    return (f"{summary['target']:<22} p50 {ms(summary['p50'])} | p95 {ms(summary['p95'])} | "
+            f"p99 {ms(summary['p99'])} | max {ms(summary['max'])} | "
+            f"lost {summary['lost']}/{summary['sent']} | errors {summary['errors']}")
+
+
+async def start_delayed_listener(delay, host="127.0.0.1"):
+    """
+    Starts a local TCP listener that answers each request after an injected delay.
+    Args:
+        delay (float): Seconds to wait before replying (None never replies, so probes are lost).
+        host (str): Address to listen on.
+    Returns:
+        asyncio.Server: The listener; its port is server.sockets[0].getsockname()[1].
+    """
+    async def handle(reader, writer):
+        try:
+            while await reader.read(1024):
+                if delay is None:
+                    continue
+                await asyncio.sleep(delay)
+                writer.write(b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, 0, family=socket.AF_INET)
+
+
+async def _benchmark(delays, listeners_per_delay, rate, duration):
+    servers = []
+    for delay in delays:
+        for _ in range(listeners_per_delay):
+            servers.append((delay, await start_delayed_listener(delay)))
+    targets = [("127.0.0.1", server.sockets[0].getsockname()[1]) for _, server in servers]
+    prober = LatencyProber(targets, rate=rate, timeout=0.5, payload=b"ping\n")
+    start = time.perf_counter()
+    await prober.run(duration)
+    elapsed = time.perf_counter() - start
+    for _, server in servers:
+        server.close()
+    return servers, prober, elapsed
+
+
+def benchmark_local_listeners(delays=(0.0, 0.005, 0.02, None), listeners_per_delay=50, rate=5.0, duration=3.0):
+    """
+    Probes local listeners with injected reply delays and compares measured and injected latency.
+    Args:
+        delays (tuple): Injected delays in seconds (None for a listener that never answers).
+        listeners_per_delay (int): Listeners started for each delay.
+        rate (float): Probes per second per listener.
+        duration (float): Seconds to probe.
+    """
+    servers, prober, elapsed = asyncio.run(_benchmark(delays, listeners_per_delay, rate, duration))
+    by_delay = {}
+    for (delay, _), stats in zip(servers, prober.stats.values()):
+        by_delay.setdefault(delay, []).append(stats.summary())
+
+    total = sum(stats.sent for stats in prober.stats.values())
+    print(f"[+] {total} probes to {len(servers)} targets in {elapsed:.1f}s")
+    for delay, summaries in by_delay.items():
+        injected = "never" if delay is None else f"{delay * 1000:.0f} ms"
+        p50s = [s["p50"] for s in summaries if s["p50"] is not None]
+        lost = sum(s["lost"] for s in summaries)
+        sent = sum(s["sent"] for s in summaries)
+        median = f"{np.median(p50s):.2f} ms" if p50s else "N/A"
+        print(f"[+] Injected delay {injected:>6}: median p50 {median}, lost {lost}/{sent}")
@@ -1,10 +1,55 @@
 import socket
 import platform
 import os
+import heapq
+import argparse
+import functools
 import subprocess
+import threading
+import time
 import psutil
+from collections.abc import Mapping
 from datetime import datetime
 
+from report_writer import EXTENSIONS, FORMATS, open_report
+
+DISK_TIMEOUT = 2.0  # Seconds to wait for a mount before reporting it as unresponsive
+TOP_PROCESSES = 10
+# Structured reports use a long layout, so every section fits the same columns
+REPORT_COLUMNS = ("section", "item", "field", "value")
+REPORT_TYPES = dict.fromkeys(REPORT_COLUMNS, "str")
+PROCESS_SORT_KEYS = {
+    "cpu": lambda info: info["cpu_percent"] or 0.0,
+    "memory": lambda info: info["memory_info"].rss if info["memory_info"] else 0,
+}
+# Mount point -> (thread, start time) of disk probes that have not returned yet, shared across calls
+_disk_probes = {}
+_disk_probes_lock = threading.Lock()
+
+
+class LazySections(Mapping):
+    """Report sections that are only collected the first time they are read."""
+
+    def __init__(self, loaders):
+        """
+        Args:
+            loaders (dict): Section name -> callable returning that section.
+        """
+        self._loaders = loaders
+        self._values = {}
+
+    def __getitem__(self, name):
+        if name not in self._values:
+            self._values[name] = self._loaders[name]()
+        return self._values[name]
+
+    def __iter__(self):
+        return iter(self._loaders)
+
+    def __len__(self):
+        return len(self._loaders)
+
+
 class SystemInfoCollector:
     @staticmethod
     def get_host_info():
@@ -15,14 +60,19 @@ class SystemInfoCollector:
             return {
                 "Hostname": hostname,
                 "IP Address": ip_address,
-                "All IPs": [addr.address for addr in psutil.net_if_addrs().values()]
+                "All IPs": [addr.address for addrs in psutil.net_if_addrs().values() for addr in addrs]
             }
         except Exception as e:
             return {"Error": str(e)}
 
     @staticmethod
     def get_os_info():
-        """Get operating system information"""
+        """Get operating system information (read once per process)"""
+        return dict(SystemInfoCollector._os_info())
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _os_info():
         return {
             "System": platform.system(),
             "Release": platform.release(),
@@ -32,20 +82,28 @@ class SystemInfoCollector:
 
     @staticmethod
     def get_cpu_info():
-        """Get CPU information"""
+        """Get CPU information (read once per process; failures are retried on the next call)"""
         try:
-            if platform.system() == "Windows":
-                return platform.processor()
-            elif platform.system() == "Linux":
-                with open("/proc/cpuinfo", "r") as f:
-                    lines = [line.strip() for line in f if "model name" in line]
-                return lines[0].split(":")[1] if lines else "Unknown"
-            elif platform.system() == "Darwin":
-                return subprocess.check_output(["sysctl", "-n", "machdep.cpu.brand_string"]).decode().strip()
-            return "Unknown"
+            return SystemInfoCollector._cpu_model()
         except Exception as e:
             return f"Error: {str(e)}"
 
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _cpu_model():
+        # Raises on failure, and lru_cache does not cache exceptions
+        if platform.system() == "Windows":
+            return platform.processor()
+        elif platform.system() == "Linux":
+            with open("/proc/cpuinfo", "r") as f:
+                for line in f:
+                    if "model name" in line:
+                        return line.split(":", 1)[1].strip()
+            return "Unknown"
+        elif platform.system() == "Darwin":
+            return subprocess.check_output(["sysctl", "-n", "machdep.cpu.brand_string"]).decode().strip()
+        return "Unknown"
+
     @staticmethod
     def get_memory_info():
         """Get memory information"""
@@ -57,18 +115,56 @@ class SystemInfoCollector:
         }
 
     @staticmethod
-    def get_disk_info():
-        """Get storage device information"""
+    def get_disk_info(timeout=DISK_TIMEOUT):
+        """
+        Get storage device information.
+        Every mount is probed on its own thread, so a hung mount (e.g. a stale NFS share)
+        only marks that mount as unresponsive instead of stalling the whole report. A mount whose
+        probe from an earlier call is still stuck is not probed again until that probe returns.
+        Args:
+            timeout (float): Seconds to wait for all mounts together.
+        """
+        partitions = psutil.disk_partitions()
+        results = [None] * len(partitions)
+
+        def probe(index, part):
+            try:
+                usage = psutil.disk_usage(part.mountpoint)
+                results[index] = {
+                    "Total": f"{usage.total / (1024**3):.2f} GB",
+                    "Used": f"{usage.used / (1024**3):.2f} GB",
+                    "Free": f"{usage.free / (1024**3):.2f} GB"
+                }
+            except Exception as e:
+                results[index] = {"Error": str(e)}
+            finally:
+                with _disk_probes_lock:
+                    if _disk_probes.get(part.mountpoint, (None,))[0] is threading.current_thread():
+                        del _disk_probes[part.mountpoint]
+
+        # Daemon threads, because a thread stuck in statvfs cannot be cancelled and must not block exit
+        threads = []
+        with _disk_probes_lock:
+            for index, part in enumerate(partitions):
+                running = _disk_probes.get(part.mountpoint)
+                if running is not None:
+                    results[index] = {"Error": f"No response for {time.monotonic() - running[1]:.1f}s "
+                                               "(earlier probe still running)"}
+                    continue
+                thread = threading.Thread(target=probe, args=(index, part), daemon=True)
+                _disk_probes[part.mountpoint] = (thread, time.monotonic())
+                threads.append(thread)
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
         disks = []
-        for part in psutil.disk_partitions():
-            usage = psutil.disk_usage(part.mountpoint)
-            disks.append({
-                "Device": part.device,
-                "Mount": part.mountpoint,
-                "Total": f"{usage.total / (1024**3):.2f} GB",
-                "Used": f"{usage.used / (1024**3):.2f} GB",
-                "Free": f"{usage.free / (1024**3):.2f} GB"
-            })
+        for part, usage in zip(partitions, results):
+            disk = {"Device": part.device, "Mount": part.mountpoint}
+            disk.update(usage or {"Error": f"No response within {timeout:g}s"})
+            disks.append(disk)
         return disks
 
     @staticmethod
@@ -76,6 +172,31 @@ class SystemInfoCollector:
         """Get running processes"""
         return [proc.info for proc in psutil.process_iter(['pid', 'name', 'username'])]
 
+    @staticmethod
+    def get_top_processes(limit=TOP_PROCESSES, sort="cpu", interval=0.1):
+        """
+        Get the processes using the most CPU or memory.
+        Args:
+            limit (int): Number of processes returned.
+            sort (str): 'cpu' or 'memory' (resident set size).
+            interval (float): Seconds over which CPU usage is measured.
+        Returns:
+            list: Process info dicts (pid, name, username, cpu_percent, memory_info), highest first.
+        """
+        key = PROCESS_SORT_KEYS[sort]
+        if sort == "cpu":
+            # The first cpu_percent() call only sets the baseline; process_iter() keeps the
+            # Process objects, so the next pass measures usage over the interval
+            for proc in psutil.process_iter():
+                try:
+                    proc.cpu_percent(None)
+                except psutil.Error:
+                    pass
+            time.sleep(interval)
+        infos = (proc.info for proc in
+                 psutil.process_iter(['pid', 'name', 'username', 'cpu_percent', 'memory_info']))
+        return heapq.nlargest(limit, infos, key=key)
+
     @staticmethod
     def get_open_ports():
         """Get open network ports"""
@@ -86,25 +207,63 @@ class SystemInfoCollector:
         return list(set(ports))
 
     @staticmethod
-    def collect_all():
-        """Collect all system information"""
+    def collect_all(process_limit=TOP_PROCESSES, process_sort="cpu", disk_timeout=DISK_TIMEOUT):
+        """
+        Collect all system information.
+        Sections are collected the first time they are read, so callers only pay for what they use.
+        Returns:
+            dict: 'System Information' (a LazySections mapping) and 'Timestamp'.
+        """
         return {
-            "System Information": {
-                "Host Info": SystemInfoCollector.get_host_info(),
-                "OS Info": SystemInfoCollector.get_os_info(),
-                "CPU Info": SystemInfoCollector.get_cpu_info(),
-                "Memory": SystemInfoCollector.get_memory_info(),
-                "Storage": SystemInfoCollector.get_disk_info(),
-                "Processes": SystemInfoCollector.get_processes()[:10],  # Top 10
-                "Open Ports": SystemInfoCollector.get_open_ports()
-            },
+            "System Information": LazySections({
+                "Host Info": SystemInfoCollector.get_host_info,
+                "OS Info": SystemInfoCollector.get_os_info,
+                "CPU Info": SystemInfoCollector.get_cpu_info,
+                "Memory": SystemInfoCollector.get_memory_info,
+                "Storage": lambda: SystemInfoCollector.get_disk_info(disk_timeout),
+                "Processes": lambda: SystemInfoCollector.get_top_processes(process_limit, process_sort),
+                "Open Ports": SystemInfoCollector.get_open_ports
+            }),
             "Timestamp": datetime.now().isoformat()
         }
 
     @staticmethod
-    def save_to_file(filename="LocalHost_report.txt"):
-        """Save system information to a text file"""
-        data = SystemInfoCollector.collect_all()
+    def iter_report_records(data):
+        """
+        Yields (section, item, field, value) rows for a structured report, one section at a time.
+        Args:
+            data (dict): Result of collect_all().
+        """
+        info = data['System Information']
+        for section in ("Host Info", "OS Info", "Memory"):
+            for key, value in info[section].items():
+                yield {"section": section, "item": None, "field": key, "value": str(value)}
+        yield {"section": "CPU Info", "item": None, "field": "Model", "value": info['CPU Info']}
+        for disk in info['Storage']:
+            for key, value in disk.items():
+                if key != "Mount":
+                    yield {"section": "Storage", "item": disk['Mount'], "field": key, "value": value}
+        for port in info['Open Ports']:
+            yield {"section": "Open Ports", "item": port, "field": "State", "value": "LISTEN"}
+        for proc in info['Processes']:
+            fields = {"Name": proc['name'], "Username": proc['username'],
+                      "CPU Percent": proc['cpu_percent'],
+                      "RSS": proc['memory_info'].rss if proc['memory_info'] else None}
+            for key, value in fields.items():
+                yield {"section": "Processes", "item": str(proc['pid']), "field": key,
+                       "value": None if value is None else str(value)}
+        yield {"section": "Report", "item": None, "field": "Timestamp", "value": data['Timestamp']}
+
+    @staticmethod
+    def save_to_file(filename="LocalHost_report.txt", process_limit=TOP_PROCESSES, process_sort="cpu",
+                     disk_timeout=DISK_TIMEOUT, fmt="text"):
+        """Save system information to a text file, or as JSON Lines, CSV or Parquet rows"""
+        data = SystemInfoCollector.collect_all(process_limit, process_sort, disk_timeout)
+
+        if fmt != "text":
+            with open_report(filename, REPORT_COLUMNS, fmt, types=REPORT_TYPES) as report:
+                report.write_many(SystemInfoCollector.iter_report_records(data))
+            return
         
         with open(filename, "w") as f:
             f.write("SYSTEM INFORMATION REPORT\n")
@@ -131,6 +290,9 @@ class SystemInfoCollector:
             for disk in data['System Information']['Storage']:
                 f.write(f"\nDevice: {disk['Device']}\n")
                 f.write(f"Mount: {disk['Mount']}\n")
+                if "Error" in disk:
+                    f.write(f"Error: {disk['Error']}\n")
+                    continue
                 f.write(f"Total: {disk['Total']}\n")
                 f.write(f"Used: {disk['Used']}\n")
                 f.write(f"Free: {disk['Free']}\n")
@@ -141,12 +303,24 @@ class SystemInfoCollector:
                 f.write(f"- {port}\n")
             
             # Processes
-            f.write("\n[RUNNING PROCESSES (First 10)]\n")
+            f.write(f"\n[TOP {process_limit} PROCESSES BY {process_sort.upper()}]\n")
             for proc in data['System Information']['Processes']:
-                f.write(f"PID {proc['pid']}: {proc['name']} ({proc['username']})\n")
+                rss = proc['memory_info'].rss / (1024**2) if proc['memory_info'] else 0.0
+                f.write(f"PID {proc['pid']}: {proc['name']} ({proc['username']}) "
+                        f"CPU {proc['cpu_percent'] or 0.0:.1f}% RSS {rss:.1f} MB\n")
             
             f.write(f"\nReport generated at: {data['Timestamp']}\n")
 
 if __name__ == "__main__":
-    SystemInfoCollector.save_to_file()
+    parser = argparse.ArgumentParser(description="Generate a local host system report")
+    parser.add_argument("--output", default=None, help="Report file (default: LocalHost_report.<format extension>)")
+    parser.add_argument("--format", choices=FORMATS, default="text", help="Report format")
+    parser.add_argument("--top", type=int, default=TOP_PROCESSES, help="Number of processes listed")
+    parser.add_argument("--sort", choices=sorted(PROCESS_SORT_KEYS), default="cpu", help="Process ranking")
+    parser.add_argument("--disk-timeout", type=float, default=DISK_TIMEOUT,
+                        help="Seconds to wait for mounts before reporting them as unresponsive")
+    args = parser.parse_args()
+
+    output = args.output or f"LocalHost_report.{EXTENSIONS[args.format]}"
+    SystemInfoCollector.save_to_file(output, args.top, args.sort, args.disk_timeout, args.format)
     print("System report generated successfully!")
@@ -1,10 +1,9 @@
 import logging
 
-logging.basicConfig(
-    filename='automation.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+from async_logging import configure_logging
+
+# Records are queued and written by a background thread, so logging never blocks the task on disk I/O
+configure_logging('automation.log', format='%(asctime)s - %(levelname)s - %(message)s')
 
 logging.info('Starting network automation task...')
 try:
@@ -15,4 +14,4 @@ try:
 except Exception as e:
     logging.error(f'Error occurred: {e}')
 
-    # A script that logs the progress and errors of network automation tasks using Python's logging module.
\ No newline at end of file
+    # A script that logs the progress and errors of network automation tasks using Python's logging module.
@@ -1,16 +1,72 @@
+import logging
+import argparse
+
+from async_logging import POLICIES, benchmark_logging, configure_logging
+from telemetry_ingest import TelemetryIngestor, benchmark_ingest
+
+LOG_FILE = 'network_logs.txt'
+LOG_FORMAT = '%(asctime)s - %(message)s'
+
+logger = logging.getLogger("telemetry")
+
 
 # ✅ Define function first
-def log_telemetry(data):
-    import logging
-    # Configure logger (example)
-    logging.basicConfig(
-        filename='network_logs.txt',
-        level=logging.INFO,
-        format='%(asctime)s - %(message)s'
-    )
+def log_telemetry(data, ingestor=None, device="localhost"):
+    """
+    Parses telemetry entries once, at ingest, into typed samples and logs them in normalized form
+    (e.g. "Throughput: 1Gbps" -> "throughput=1000.0 Mbps"). Logging is configured once by the caller
+    (see configure_logging), so this only enqueues the records and never waits on the log file.
+    Args:
+        data (iterable): Telemetry entries, e.g. "Latency: 50ms".
+        ingestor (TelemetryIngestor): Receives the parsed samples (default: a new one).
+        device (str): Device the entries came from.
+    Returns:
+        TelemetryIngestor: The ingestor, for window aggregates over the samples.
+    """
+    ingestor = ingestor or TelemetryIngestor()
     for entry in data:
-        logging.info(f"Data: {entry}")
+        sample = ingestor.ingest(entry, device)
+        if sample is None:
+            logger.warning("Unparsed telemetry from %s: %s", device, entry)
+            continue
+        metric, value, unit = sample
+        # repr keeps every digit of the value (%g would round to 6 significant digits)
+        logger.info("Data: %s %s=%r%s", device, metric, value, f" {unit}" if unit else "")
+    return ingestor
+
+
+def print_aggregates(ingestor, window):
+    """Prints count/min/max/mean/p99 per window, device and metric."""
+    for row in ingestor.aggregate_rows(window):
+        print(f"[+] {row['device']} {row['metric']} ({row['unit'] or 'no unit'}): count {row['count']}, "
+              f"min {row['min']:g}, max {row['max']:g}, mean {row['mean']:g}, p99 {row['p99']:g}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Log network telemetry to a file")
+    parser.add_argument("--log-file", default=LOG_FILE, help=f"Log file (default: {LOG_FILE})")
+    parser.add_argument("--device", default="localhost", help="Device the telemetry comes from")
+    parser.add_argument("--window", type=float, default=60.0,
+                        help="Window for the printed aggregates, in seconds (default: 60)")
+    parser.add_argument("--max-bytes", type=int, help="Rotate the log file once it reaches this size")
+    parser.add_argument("--rotate-hours", type=float, help="Rotate the log file after this many hours")
+    parser.add_argument("--policy", choices=POLICIES, default="block",
+                        help="What to do when the log queue is full (default: block)")
+    parser.add_argument("--benchmark", type=int, metavar="RECORDS",
+                        help="Compare FileHandler and the queued logger with RECORDS records, then exit")
+    parser.add_argument("--benchmark-ingest", type=int, metavar="SAMPLES",
+                        help="Compare text re-parsing with typed ingest and vectorized aggregates, then exit")
+    args = parser.parse_args()
 
-# Now call the function
-telemetry_data = ["Latency: 50ms", "Throughput: 1Gbps"]
-log_telemetry(telemetry_data)
+    if args.benchmark:
+        benchmark_logging(args.benchmark, format=LOG_FORMAT)
+        benchmark_logging(args.benchmark, format=LOG_FORMAT, fsync=True)
+    elif args.benchmark_ingest:
+        benchmark_ingest(args.benchmark_ingest)
+    else:
+        configure_logging(args.log_file, format=LOG_FORMAT, policy=args.policy, max_bytes=args.max_bytes,
+                          rotate_seconds=args.rotate_hours * 3600 if args.rotate_hours else None)
+        # Now call the function
+        telemetry_data = ["Latency: 50ms", "Throughput: 1Gbps"]
+        ingestor = log_telemetry(telemetry_data, device=args.device)
+        print_aggregates(ingestor, args.window)
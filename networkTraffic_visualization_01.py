@@ -1,8 +1,11 @@
 from scapy.all import sniff, IP, TCP, UDP, ICMP
 import matplotlib.pyplot as plt
 from collections import Counter
+import argparse
 import datetime
 
+import pcap_reader
+
 def capture_traffic(interface=None, packet_count=100):
     """
     Captures network traffic and returns a list of packets.
@@ -42,6 +45,20 @@ def analyze_traffic(packets):
 
     return protocol_counts
 
+def analyze_pcap(pcap_file, workers=None):
+    """
+    Counts protocols in a pcap/pcapng file by parsing headers directly from the memory-mapped file.
+    Args:
+        pcap_file (str): Path of the capture file.
+        workers (int): Number of worker processes (default: CPU count).
+    Returns:
+        dict: A dictionary with protocol names as keys and counts as values.
+    """
+    print(f"Analyzing capture file: {pcap_file}...")
+    protocol_counts = pcap_reader.count_protocols(pcap_file, workers=workers)
+    print(f"Analyzed {sum(protocol_counts.values())} packets.")
+    return protocol_counts
+
 def visualize_traffic(protocol_counts):
     """
     Visualizes the network traffic using a bar chart.
@@ -68,15 +85,28 @@ def visualize_traffic(protocol_counts):
     plt.show()
 
 if __name__ == "__main__":
-    # Set parameters for capturing traffic
-    interface = None  # Set to your network interface (e.g., "eth0", "wlan0", "en0"), or leave None for all interfaces
-    packet_count = 100
+    parser = argparse.ArgumentParser(description="Network traffic visualization")
+    parser.add_argument("--pcap", help="Analyze a pcap/pcapng file instead of capturing live traffic")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for pcap analysis")
+    parser.add_argument("--benchmark", action="store_true", help="Benchmark pcap ingestion on a synthetic capture and exit")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        pcap_reader.benchmark_synthetic(workers=args.workers)
+        raise SystemExit
+
+    if args.pcap:
+        protocol_counts = analyze_pcap(args.pcap, workers=args.workers)
+    else:
+        # Set parameters for capturing traffic
+        interface = None  # Set to your network interface (e.g., "eth0", "wlan0", "en0"), or leave None for all interfaces
+        packet_count = 100
 
-    # Capture network traffic
-    packets = capture_traffic(interface=interface, packet_count=packet_count)
+        # Capture network traffic
+        packets = capture_traffic(interface=interface, packet_count=packet_count)
 
-    # Analyze the captured traffic
-    protocol_counts = analyze_traffic(packets)
+        # Analyze the captured traffic
+        protocol_counts = analyze_traffic(packets)
 
     # Display analysis results
     print("\nProtocol Counts:")
@@ -2,37 +2,105 @@
 
 import streamlit as st
 import pandas as pd
-from scapy.all import sniff, IP, TCP, UDP, ICMP
+from scapy.all import AsyncSniffer, IP
 import plotly.express as px
+import threading
 import time
 
-# Global variables
-packets_data = []
+from packet_ring_buffer import PacketRingBuffer, PROTOCOL_LABELS, ip_to_int, int_to_ip
+from raw_capture import RawPacketCapture
 
-def packet_callback(packet):
+# Packets retained for the dashboard; memory stays fixed no matter how long the capture runs
+RING_CAPACITY = 200_000
+
+def packet_callback(packet, ring):
     """
     Callback function to process captured packets.
     Args:
         packet: Captured packet.
+        ring (PacketRingBuffer): Ring buffer the packet record is written to.
     """
     if IP in packet:
-        protocol = "TCP" if TCP in packet else "UDP" if UDP in packet else "ICMP" if ICMP in packet else "Other"
-        packets_data.append({
-            "timestamp": time.time(),
-            "source": packet[IP].src,
-            "destination": packet[IP].dst,
-            "protocol": protocol,
-            "size": len(packet)
-        })
-
-def start_packet_capture(interface="eth0", count=100):
+        ip = packet[IP]
+        ring.append(time.time(), ip_to_int(ip.src), ip_to_int(ip.dst), ip.proto, len(packet))
+
+class PacketCapture:
+    """
+    Captures in a background thread, writing into a fixed-size ring buffer.
+    On Linux with sufficient privileges the kernel-filtered raw capture is used;
+    otherwise Scapy's AsyncSniffer with the same BPF filter.
     """
-    Starts packet capture using Scapy.
+
+    def __init__(self, capacity=RING_CAPACITY):
+        self.ring = PacketRingBuffer(capacity)
+        self.sniffer = None
+        self.raw_thread = None
+        self.raw_capture = None
+        self.stop_event = threading.Event()
+        self.started_at = None
+
+    @property
+    def running(self):
+        if self.raw_thread is not None:
+            return self.raw_thread.is_alive()
+        return self.sniffer is not None and self.sniffer.running
+
+    def start(self, interface="eth0", bpf_filter=None):
+        """
+        Starts capturing without blocking the caller.
+        Args:
+            interface (str): Network interface to capture packets from.
+            bpf_filter (str): tcpdump-style capture filter applied in the kernel (e.g., 'tcp or udp').
+        """
+        if self.running:
+            return
+        self.raw_thread = self.sniffer = None
+        try:
+            self.raw_capture = RawPacketCapture(interface, bpf_filter or None)
+        except (OSError, ImportError):
+            self.sniffer = AsyncSniffer(iface=interface, filter=bpf_filter or None,
+                                        prn=lambda packet: packet_callback(packet, self.ring), store=False)
+            self.sniffer.start()
+        else:
+            self.stop_event.clear()
+            self.raw_thread = threading.Thread(target=self._run_raw_capture, daemon=True)
+            self.raw_thread.start()
+        self.started_at = self.started_at or time.time()
+
+    def _run_raw_capture(self):
+        try:
+            self.raw_capture.run(self.ring.extend, stop_event=self.stop_event)
+        finally:
+            self.raw_capture.close()
+
+    def stop(self):
+        """Stops the background capture."""
+        if self.raw_thread is not None:
+            self.stop_event.set()
+            self.raw_thread.join()
+        elif self.running:
+            self.sniffer.stop()
+
+@st.cache_resource
+def get_packet_capture():
+    """Returns the capture shared by every rerun and session of the dashboard."""
+    return PacketCapture()
+
+def window_to_dataframe(window):
+    """
+    Builds the dashboard DataFrame from a ring buffer window.
     Args:
-        interface (str): Network interface to capture packets from.
-        count (int): Number of packets to capture.
+        window (numpy.ndarray): Structured array view from PacketRingBuffer.window.
+    Returns:
+        pd.DataFrame: Packet data; addresses stay numeric and are formatted only where displayed.
     """
-    sniff(iface=interface, prn=packet_callback, count=count)
+    return pd.DataFrame({
+        "timestamp": window["timestamp"],
+        "source": window["src"],
+        "destination": window["dst"],
+        "protocol": PROTOCOL_LABELS[window["proto"]],
+        "size": window["size"],
+    })
 
 def create_visualizations(df):
     """
@@ -63,7 +131,7 @@ def create_visualizations(df):
         # Top source IPs chart
         top_sources = df['source'].value_counts().head(10)
         fig_sources = px.bar(
-            x=top_sources.index,
+            x=[int_to_ip(source) for source in top_sources.index],
             y=top_sources.values,
             title="Top Source IP Addresses"
         )
@@ -76,22 +144,33 @@ def main():
     st.set_page_config(page_title="Network Traffic Analysis", layout="wide")
     st.title("Real-Time Network Traffic Analysis Dashboard")
 
-    # Capture packets and create DataFrame
+    capture = get_packet_capture()
+
+    # Capture runs in the background; reruns only read the most recent window
     interface = st.sidebar.text_input("Enter network interface (e.g., eth0):", value="eth0")
-    count = st.sidebar.number_input("Number of packets to capture:", min_value=10, max_value=1000, value=100)
-    
+    bpf_filter = st.sidebar.text_input("Capture filter (BPF, e.g., tcp port 443):", value="")
+    window_size = st.sidebar.number_input("Packets to analyze (most recent):", min_value=10,
+                                          max_value=RING_CAPACITY, value=1000)
+
     if st.sidebar.button("Start Capture"):
-        start_packet_capture(interface=interface, count=count)
-    
-    if len(packets_data) > 0:
-        df = pd.DataFrame(packets_data)
+        capture.start(interface=interface, bpf_filter=bpf_filter)
+    if st.sidebar.button("Stop Capture"):
+        capture.stop()
+    st.sidebar.button("Refresh")
+    st.sidebar.write("Capturing..." if capture.running else "Capture stopped.")
+    if capture.raw_thread is not None and capture.raw_capture.cpu_time:
+        st.sidebar.write(f"Raw capture: {capture.raw_capture.packets_per_cpu_second:,.0f} packets/s per core")
+
+    window = capture.ring.window(window_size)
+    if len(window) > 0:
+        df = window_to_dataframe(window)
         
         # Display metrics
         col1, col2 = st.columns(2)
         with col1:
-            st.metric("Total Packets Captured", len(df))
+            st.metric("Total Packets Captured", capture.ring.count)
         with col2:
-            duration = time.time() - df['timestamp'].iloc[0]
+            duration = time.time() - capture.started_at
             st.metric("Capture Duration", f"{duration:.2f}s")
         
         # Create visualizations
@@ -99,10 +178,10 @@ def main():
 
         # Display recent packets
         st.subheader("Recent Packets")
-        st.dataframe(
-            df.tail(10)[['timestamp', 'source', 'destination', 'protocol', 'size']],
-            use_container_width=True
-        )
+        recent = df.tail(10)[['timestamp', 'source', 'destination', 'protocol', 'size']].copy()
+        recent['source'] = recent['source'].map(int_to_ip)
+        recent['destination'] = recent['destination'].map(int_to_ip)
+        st.dataframe(recent, use_container_width=True)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,103 @@
+import socket
+import numpy as np
+
+# One fixed-width record per packet; addresses are IPv4 packed into uint32
+PACKET_DTYPE = np.dtype([
+    ("timestamp", "f8"),
+    ("src", "u4"),
+    ("dst", "u4"),
+    ("proto", "u1"),
+    ("size", "u4"),
+])
+
+PROTOCOL_NAMES = {1: "ICMP", 6: "TCP", 17: "UDP"}
+
+# Lookup table so protocol numbers can be labelled for a whole window in one vectorized step
+PROTOCOL_LABELS = np.array([PROTOCOL_NAMES.get(number, "Other") for number in range(256)], dtype=object)
+
+
+def ip_to_int(ip):
+    """Packs a dotted IPv4 address into an integer."""
+    return int.from_bytes(socket.inet_aton(ip), "big")
+
+
+def int_to_ip(value):
+    """Unpacks an integer into a dotted IPv4 address."""
+    return socket.inet_ntoa(int(value).to_bytes(4, "big"))
+
+
+class PacketRingBuffer:
+    """
+    Fixed-capacity, preallocated ring of packet records for one writer thread and any number of readers.
+    Every record is written twice (at slot i and i + capacity), so the most recent window of up to
+    capacity records is always contiguous and is returned as a NumPy view without copying. The writer
+    publishes a record by bumping `count` after it is stored, so readers never take a lock. A view
+    is only stable until the writer laps it; copy it if it has to outlive the next capacity packets.
+    """
+
+    def __init__(self, capacity=100_000):
+        """
+        Args:
+            capacity (int): Maximum number of packets kept; memory use is fixed at 2 x capacity records.
+        """
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, dtype=PACKET_DTYPE)
+        self.count = 0  # Packets ever written; the newest is at slot (count - 1) % capacity
+
+    def append(self, timestamp, src, dst, proto, size):
+        """
+        Stores one packet record, overwriting the oldest once the ring is full.
+        Args:
+            timestamp (float): Capture time in seconds since the epoch.
+            src (int): Source IPv4 address as an integer.
+            dst (int): Destination IPv4 address as an integer.
+            proto (int): IP protocol number.
+            size (int): Packet length in bytes.
+        """
+        slot = self.count % self.capacity
+        record = (timestamp, src, dst, proto, size)
+        self._data[slot] = record
+        self._data[slot + self.capacity] = record
+        self.count += 1
+
+    def extend(self, timestamps, srcs, dsts, protos, sizes):
+        """
+        Stores a batch of packet records with vectorized writes.
+        Args:
+            timestamps, srcs, dsts, protos, sizes (sequence): One column per field, all the same length.
+        """
+        total = len(timestamps)
+        if total == 0:
+            return
+        records = np.empty(total, dtype=PACKET_DTYPE)
+        records["timestamp"] = timestamps
+        records["src"] = srcs
+        records["dst"] = dsts
+        records["proto"] = protos
+        records["size"] = sizes
+        records = records[-self.capacity:]  # Older records in an oversized batch would be overwritten anyway
+
+        slot = (self.count + total - len(records)) % self.capacity
+        first = min(len(records), self.capacity - slot)
+        for base in (0, self.capacity):
+            self._data[base + slot:base + slot + first] = records[:first]
+            self._data[base:base + len(records) - first] = records[first:]
+        self.count += total
+
+    def window(self, size=None):
+        """
+        Returns the most recent packets, oldest first, as a zero-copy structured array view.
+        Args:
+            size (int): Number of packets wanted (default: everything retained).
+        Returns:
+            numpy.ndarray: A view of at most min(size, capacity) records.
+        """
+        count = self.count
+        size = min(size or self.capacity, self.capacity, count)
+        if size == 0:
+            return self._data[:0]
+        end = (count - 1) % self.capacity + self.capacity + 1
+        return self._data[end - size:end]
+
+    def __len__(self):
+        return min(self.count, self.capacity)
@@ -1,9 +1,9 @@
+from critical_error_extractor import iter_critical_errors
 
 def extract_critical_errors(log_file):
-    with open(log_file, 'r') as file:
-        for line in file:
-            if 'critical' in line.lower():
-                print(line.strip())
+    for line in iter_critical_errors(log_file, keywords=['critical']):
+        print(line.decode(errors='replace'))
 
 # Example usage
-extract_critical_errors('system_logs.txt')
+if __name__ == "__main__":
+    extract_critical_errors('system_logs.txt')
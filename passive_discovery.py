@@ -0,0 +1,433 @@
+import argparse
+import mmap
+import re
+import socket
+import struct
+import time
+
+import pcap_reader
+from LAN_device_discovery import generate_report
+from report_writer import FORMATS
+
+ETH_P_IP = 0x0800
+ETH_P_ARP = 0x0806
+ETH_P_IPV6 = 0x86DD
+ETH_P_LLDP = 0x88CC
+DHCP_PORTS = (67, 68)
+MDNS_PORT = 5353
+
+# Kernel filter for live capture: only the frames the parsers below understand
+PASSIVE_FILTER = "arp or udp port 67 or udp port 68 or udp port 5353 or ether proto 0x88cc"
+
+DEVICE_FIELDS = ("ip", "mac", "hostname", "vendor", "ipv6")
+PASSIVE_COLUMNS = ("ip", "mac", "hostname", "vendor", "hints", "sources", "last_seen")
+PASSIVE_HEADERS = ("IP Address", "MAC Address", "Hostname", "Vendor", "Hints", "Seen In", "Last Seen")
+
+DHCP_MESSAGE_REQUEST = 3
+DHCP_MESSAGE_ACK = 5
+LLDP_CAPABILITIES = {0x04: "bridge", 0x08: "wlan-ap", 0x10: "router", 0x20: "phone", 0x80: "station"}
+MDNS_MODEL_KEYS = ("model=", "md=", "am=")  # TXT keys that carry a device model (_device-info, Chromecast, AirPlay)
+
+
+def format_mac(raw):
+    return ":".join(f"{byte:02x}" for byte in raw)
+
+
+def link_source(buf, offset, length, linktype):
+    """Returns the source MAC address of a frame, or None if its link layer has none."""
+    if linktype == pcap_reader.LINKTYPE_ETHERNET and length >= 14:
+        return format_mac(buf[offset + 6:offset + 12])
+    if linktype == pcap_reader.LINKTYPE_LINUX_SLL and length >= 16 and buf[offset + 5] == 6:
+        return format_mac(buf[offset + 6:offset + 12])
+    if linktype == pcap_reader.LINKTYPE_LINUX_SLL2 and length >= 20 and buf[offset + 11] == 6:
+        return format_mac(buf[offset + 12:offset + 18])
+    return None
+
+
+def parse_arp(buf, pos, end):
+    """Parses an ARP request, reply or gratuitous announcement into an observation."""
+    if pos + 28 > end:
+        return []
+    htype, ptype, hlen, plen = struct.unpack_from("!HHBB", buf, pos)
+    if ptype != ETH_P_IP or hlen != 6 or plen != 4:
+        return []
+    sender_ip = buf[pos + 14:pos + 18]
+    if sender_ip == b"\x00\x00\x00\x00":
+        return []  # ARP probe: the sender has no address yet
+    gratuitous = sender_ip == buf[pos + 24:pos + 28]
+    return [{"mac": format_mac(buf[pos + 8:pos + 14]), "ip": socket.inet_ntoa(sender_ip),
+             "source": "garp" if gratuitous else "arp"}]
+
+
+def dhcp_options(buf, pos, end):
+    """Reads DHCP options into a dict of code -> bytes."""
+    options = {}
+    while pos < end:
+        code = buf[pos]
+        if code == 255:
+            break
+        if code == 0:
+            pos += 1
+            continue
+        if pos + 2 > end:
+            break
+        size = buf[pos + 1]
+        options[code] = bytes(buf[pos + 2:min(pos + 2 + size, end)])
+        pos += 2 + size
+    return options
+
+
+def parse_dhcp(buf, pos, end):
+    """
+    Parses a DHCP message. Client messages give the client's hostname, vendor class and requested
+    address; a server ACK gives the address actually assigned. The client is identified by chaddr,
+    as relayed or server-sent frames do not carry its MAC address as their source.
+    """
+    if pos + 240 > end or buf[pos + 2] != 6 or buf[pos + 236:pos + 240] != b"\x63\x82\x53\x63":
+        return []
+    op = buf[pos]
+    mac = format_mac(buf[pos + 28:pos + 34])
+    options = dhcp_options(buf, pos + 240, end)
+    message = (options.get(53) or b"\x00")[0]  # An empty option 53 counts as no message type
+    observation = {"mac": mac, "source": "dhcp"}
+    if op == 1:
+        if 12 in options:
+            observation["hostname"] = options[12].decode("utf-8", "replace").strip("\x00")
+        if 60 in options:
+            observation["vendor"] = options[60].decode("utf-8", "replace").strip("\x00")
+        if 55 in options:
+            observation["hints"] = ["dhcp-params:" + ",".join(map(str, options[55]))]
+        ciaddr = buf[pos + 12:pos + 16]
+        if ciaddr != b"\x00\x00\x00\x00":
+            observation["ip"] = socket.inet_ntoa(ciaddr)
+        elif message == DHCP_MESSAGE_REQUEST and len(options.get(50, b"")) == 4:
+            observation["ip"] = socket.inet_ntoa(options[50])
+    elif message == DHCP_MESSAGE_ACK:
+        observation["ip"] = socket.inet_ntoa(buf[pos + 16:pos + 20])
+    else:
+        return []
+    return [observation]
+
+
+def dns_name(buf, pos, start, end):
+    """
+    Reads a (possibly compressed) DNS name.
+    Returns:
+        tuple: (name, position after the name in the record).
+    """
+    labels = []
+    after = None
+    for _ in range(64):  # Bounds pointer loops in malformed packets
+        if pos >= end:
+            raise ValueError("Truncated DNS name")
+        size = buf[pos]
+        if size & 0xC0 == 0xC0:
+            if pos + 1 >= end:
+                raise ValueError("Truncated DNS pointer")
+            if after is None:
+                after = pos + 2
+            pos = start + (((size & 0x3F) << 8) | buf[pos + 1])
+            continue
+        if size == 0:
+            return ".".join(labels), after if after is not None else pos + 1
+        labels.append(bytes(buf[pos + 1:pos + 1 + size]).decode("utf-8", "replace"))
+        pos += 1 + size
+    raise ValueError("DNS name pointer loop")
+
+
+def parse_mdns(buf, pos, end, sender_ip):
+    """
+    Parses an mDNS response: A/AAAA records for the sender give its hostname, PTR records the
+    services it announces, and TXT records often its model.
+    """
+    if pos + 12 > end:
+        return []
+    _, flags, questions, answers, authorities, additionals = struct.unpack_from("!6H", buf, pos)
+    if not flags & 0x8000:
+        return []
+    observation = {"source": "mdns", "hints": []}
+    try:
+        cursor = pos + 12
+        for _ in range(questions):
+            _, cursor = dns_name(buf, cursor, pos, end)
+            cursor += 4
+        for _ in range(answers + authorities + additionals):
+            name, cursor = dns_name(buf, cursor, pos, end)
+            if cursor + 10 > end:
+                break
+            rtype, _, _, rdlength = struct.unpack_from("!HHIH", buf, cursor)
+            rdata = cursor + 10
+            cursor = rdata + rdlength
+            if cursor > end:
+                break
+            hostname = name[:-6] if name.endswith(".local") else name
+            if rtype == 1 and rdlength == 4:
+                address = socket.inet_ntoa(buf[rdata:rdata + 4])
+                # Only records for the sender itself; a sleep proxy answers for other hosts
+                if address == sender_ip or ":" in sender_ip:
+                    observation.update(ip=address, hostname=hostname)
+            elif rtype == 28 and rdlength == 16:
+                address = socket.inet_ntop(socket.AF_INET6, bytes(buf[rdata:rdata + 16]))
+                if address == sender_ip or ":" not in sender_ip:
+                    observation.update(ipv6=address, hostname=hostname)
+            elif rtype == 12 and not name.endswith(".arpa"):
+                service = name[:-6] if name.endswith(".local") else name
+                if service.startswith("_") and service != "_services._dns-sd._udp":
+                    observation["hints"].append("mdns:" + service)
+            elif rtype == 16:
+                entry = rdata
+                while entry < cursor:
+                    text = bytes(buf[entry + 1:entry + 1 + buf[entry]]).decode("utf-8", "replace")
+                    if text.startswith(MDNS_MODEL_KEYS):
+                        observation["hints"].append("model:" + text.split("=", 1)[1])
+                    entry += 1 + buf[entry]
+    except ValueError:
+        pass  # Keep whatever was read before the malformed part
+    if ":" in sender_ip:
+        observation.setdefault("ipv6", sender_ip)
+    else:
+        observation.setdefault("ip", sender_ip)
+    return [observation]
+
+
+def parse_lldp(buf, pos, end):
+    """Parses an LLDP advertisement: system name, description, capabilities and management address."""
+    observation = {"source": "lldp", "hints": []}
+    while pos + 2 <= end:
+        header = struct.unpack_from("!H", buf, pos)[0]
+        tlv_type, size = header >> 9, header & 0x1FF
+        value = pos + 2
+        pos = value + size
+        if tlv_type == 0 or pos > end:
+            break
+        if tlv_type == 5:
+            observation["hostname"] = bytes(buf[value:pos]).decode("utf-8", "replace")
+        elif tlv_type == 6 and size:
+            observation["vendor"] = bytes(buf[value:pos]).decode("utf-8", "replace").splitlines()[0]
+        elif tlv_type == 7 and size >= 4:
+            enabled = struct.unpack_from("!H", buf, value + 2)[0]
+            observation["hints"] += [name for bit, name in LLDP_CAPABILITIES.items() if enabled & bit]
+        elif tlv_type == 8 and size >= 6 and buf[value] == 5 and buf[value + 1] == 1:
+            observation["ip"] = socket.inet_ntoa(buf[value + 2:value + 6])
+    return [observation]
+
+
+def parse_frame(buf, offset, length, linktype):
+    """
+    Extracts device observations from one frame.
+    Args:
+        buf (bytes or mmap): Buffer holding the frame.
+        offset (int): Offset of the frame.
+        length (int): Captured length of the frame.
+        linktype (int): Link-layer type (pcap LINKTYPE_* value).
+    Returns:
+        list: Observation dicts with a mac and any of ip, ipv6, hostname, vendor, hints, and their source.
+    """
+    ethertype, pos = pcap_reader.network_header(buf, offset, length, linktype)
+    if ethertype is None:
+        return []
+    end = offset + length
+    sender = link_source(buf, offset, length, linktype)
+
+    if ethertype == ETH_P_ARP:
+        return parse_arp(buf, pos, end)
+    if ethertype == ETH_P_LLDP:
+        observations = parse_lldp(buf, pos, end)
+    elif ethertype == ETH_P_IP:
+        if pos + 20 > end or buf[pos + 9] != 17 or (buf[pos + 6] & 0x1F or buf[pos + 7]):
+            return []
+        udp = pos + (buf[pos] & 0x0F) * 4
+        if udp + 8 > end:
+            return []
+        sport, dport = struct.unpack_from("!HH", buf, udp)
+        if sport in DHCP_PORTS and dport in DHCP_PORTS:
+            return parse_dhcp(buf, udp + 8, end)
+        if MDNS_PORT not in (sport, dport):
+            return []
+        observations = parse_mdns(buf, udp + 8, end, socket.inet_ntoa(buf[pos + 12:pos + 16]))
+    elif ethertype == ETH_P_IPV6:
+        if pos + 48 > end or buf[pos + 6] != 17:
+            return []
+        sport, dport = struct.unpack_from("!HH", buf, pos + 40)
+        if MDNS_PORT not in (sport, dport):
+            return []
+        sender_ip = socket.inet_ntop(socket.AF_INET6, bytes(buf[pos + 8:pos + 24]))
+        observations = parse_mdns(buf, pos + 48, end, sender_ip)
+    else:
+        return []
+    if sender is None:
+        return []
+    for observation in observations:
+        observation["mac"] = sender
+    return observations
+
+
+def load_oui_table(path):
+    """
+    Loads MAC vendor prefixes from an IEEE oui.txt or Wireshark manuf file.
+    Returns:
+        dict: Six-hex-digit prefix (upper case) -> vendor name.
+    """
+    pattern = re.compile(r"^([0-9A-Fa-f]{2})[-:]([0-9A-Fa-f]{2})[-:]([0-9A-Fa-f]{2})(?:\s+\(hex\))?\s+(.+)$")
+    table = {}
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            match = pattern.match(line.strip())
+            if match:
+                table.setdefault("".join(match.groups()[:3]).upper(), match.group(4).split("\t")[-1].strip())
+    return table
+
+
+class DeviceTable:
+    """
+    Device inventory keyed by MAC address, merged from passive observations.
+    Devices are never dropped for being quiet, so hosts that are asleep stay in the table.
+    """
+
+    def __init__(self, oui_table=None, on_change=None):
+        """
+        Args:
+            oui_table (dict): MAC prefix -> vendor (see load_oui_table), used until a better vendor hint is seen.
+            on_change (callable): Called with (device, is_new) whenever a device is added or changes.
+        """
+        self.devices = {}
+        self.oui_table = oui_table or {}
+        self.on_change = on_change
+        self.frames = 0
+        self.malformed = 0
+
+    def observe(self, observation, timestamp):
+        """
+        Merges one observation.
+        Returns:
+            bool: True if the device was added or changed.
+        """
+        mac = observation["mac"]
+        device = self.devices.get(mac)
+        is_new = device is None
+        if is_new:
+            prefix = mac.replace(":", "")[:6].upper()
+            device = {"mac": mac, "ip": None, "ipv6": None, "hostname": None,
+                      "vendor": self.oui_table.get(prefix), "hints": set(), "sources": set(),
+                      "first_seen": timestamp, "last_seen": timestamp}
+            if int(prefix[:2], 16) & 0x02:
+                device["hints"].add("random-mac")  # Locally administered, e.g. a privacy address
+            self.devices[mac] = device
+        changed = is_new
+        for field in DEVICE_FIELDS:
+            value = observation.get(field)
+            if value and device[field] != value:
+                device[field] = value
+                changed = True
+        for field, values in (("hints", observation.get("hints", ())), ("sources", (observation["source"],))):
+            if not device[field].issuperset(values):
+                device[field].update(values)
+                changed = True
+        device["last_seen"] = max(device["last_seen"], timestamp)
+        if changed and self.on_change is not None:
+            self.on_change(device, is_new)
+        return changed
+
+    def feed(self, buf, offset, length, linktype, timestamp):
+        """Parses one frame and merges its observations; a frame the parsers choke on is counted and skipped."""
+        self.frames += 1
+        try:
+            observations = parse_frame(buf, offset, length, linktype)
+        except Exception:
+            self.malformed += 1  # One bad frame must not end a capture
+            return
+        for observation in observations:
+            self.observe(observation, timestamp)
+
+    def rows(self):
+        """Yields one report row per device, sorted by IP address then MAC."""
+        def order(device):
+            ip = device["ip"]
+            return (ip is None, socket.inet_aton(ip) if ip else b"", device["mac"])
+
+        for device in sorted(self.devices.values(), key=order):
+            yield dict(device, hints=",".join(sorted(device["hints"])), sources=",".join(sorted(device["sources"])),
+                       last_seen=time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(device["last_seen"])))
+
+
+def discover_from_pcap(path, table=None):
+    """
+    Builds or updates a device table from a pcap or pcapng file.
+    Args:
+        path (str): Capture file.
+        table (DeviceTable): Table to update (a new one is created if omitted).
+    Returns:
+        DeviceTable: The updated table.
+    """
+    table = table or DeviceTable()
+    info = pcap_reader.read_capture_info(path)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for timestamp, linktype, offset, length in pcap_reader.iter_frames(mm, info, info["data_start"], info["size"]):
+            table.feed(mm, offset, length, linktype, timestamp)
+    return table
+
+
+def discover_live(interface=None, duration=None, table=None, bpf_filter=PASSIVE_FILTER):
+    """
+    Updates a device table from live traffic until the duration elapses or Ctrl+C is pressed.
+    Uses the TPACKET_V3 ring on Linux and Scapy's sniffer elsewhere; nothing is ever sent.
+    Args:
+        interface (str): Interface to listen on (None for all interfaces).
+        duration (float): Seconds to listen (None for no limit).
+        table (DeviceTable): Table to update (a new one is created if omitted).
+        bpf_filter (str): Kernel capture filter.
+    Returns:
+        DeviceTable: The updated table.
+    """
+    table = table or DeviceTable()
+    deadline = time.monotonic() + duration if duration else None
+    try:
+        if hasattr(socket, "AF_PACKET"):
+            from raw_capture import RawPacketCapture
+            try:
+                capture = RawPacketCapture(interface, bpf_filter)
+            except Exception as e:
+                print(f"[-] Could not attach the capture filter ({e}); filtering in Python instead")
+                capture = RawPacketCapture(interface)
+            try:
+                while deadline is None or time.monotonic() < deadline:
+                    for timestamp, frame in capture.read_frames():
+                        table.feed(frame, 0, len(frame), pcap_reader.LINKTYPE_ETHERNET, timestamp)
+            finally:
+                capture.close()
+        else:
+            from scapy.all import sniff
+            sniff(iface=interface, filter=bpf_filter, store=False, timeout=duration,
+                  prn=lambda packet: table.feed(bytes(packet), 0, len(packet), pcap_reader.LINKTYPE_ETHERNET,
+                                                float(packet.time)))
+    except KeyboardInterrupt:
+        pass
+    return table
+
+
+def print_change(device, is_new):
+    """Prints a device as it appears or changes."""
+    print(f"[+] {'New' if is_new else 'Updated'}: {device['ip'] or '-'} {device['mac']} "
+          f"{device['hostname'] or ''} {device['vendor'] or ''}".rstrip())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Passive LAN device discovery from ARP, DHCP, mDNS and LLDP")
+    parser.add_argument("--pcap", action="append", help="Read a pcap/pcapng file instead of listening (repeatable)")
+    parser.add_argument("--interface", default=None, help="Interface to listen on (default: all)")
+    parser.add_argument("--duration", type=float, default=None, help="Seconds to listen (default: until Ctrl+C)")
+    parser.add_argument("--oui", default=None, help="IEEE oui.txt or Wireshark manuf file for vendor names")
+    parser.add_argument("--format", choices=FORMATS, default="text", help="Report format")
+    args = parser.parse_args()
+
+    device_table = DeviceTable(load_oui_table(args.oui) if args.oui else None, on_change=print_change)
+    if args.pcap:
+        for capture_file in args.pcap:
+            discover_from_pcap(capture_file, device_table)
+    else:
+        print(f"Listening for ARP, DHCP, mDNS and LLDP traffic on {args.interface or 'all interfaces'}...")
+        discover_live(args.interface, args.duration, device_table)
+
+    print(f"Discovered {len(device_table.devices)} devices from {device_table.frames} frames"
+          + (f" ({device_table.malformed} malformed frames skipped)" if device_table.malformed else ""))
+    generate_report(device_table.rows(), args.format, PASSIVE_COLUMNS, PASSIVE_HEADERS)
@@ -0,0 +1,348 @@
+import os
+import mmap
+import struct
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+PCAP_MAGICS = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1e-6),  # Little-endian, microsecond timestamps
+    b"\xa1\xb2\xc3\xd4": (">", 1e-6),
+    b"\x4d\x3c\xb2\xa1": ("<", 1e-9),  # Little-endian, nanosecond timestamps
+    b"\xa1\xb2\x3c\x4d": (">", 1e-9),
+}
+PCAPNG_MAGIC = b"\x0a\x0d\x0d\x0a"
+
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_LINUX_SLL2 = 276
+
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024  # Bytes of capture handed to each worker task
+SYNC_CHAIN = 8  # Consecutive valid headers required to trust a resynchronized record boundary
+SYNC_MAX_SPAN = 366 * 86400  # Record timestamps must fall within this many seconds of the first packet
+SYNC_MAX_REORDER = 3600  # ...and may step backwards by at most this much between records
+PCAPNG_BLOCK_TYPES = {0x0A0D0D0A, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 0xBAD, 0x40000BAD}
+
+
+def read_capture_info(path):
+    """
+    Reads the file header of a pcap or pcapng capture.
+    Args:
+        path (str): Path of the capture file.
+    Returns:
+        dict: format ('pcap' or 'pcapng'), endian, data_start and, for pcap, linktype/snaplen/ts_scale;
+            for pcapng, the interfaces [(linktype, ts_scale)] defined before the first packet.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic = mm[:4]
+        if magic in PCAP_MAGICS:
+            endian, ts_scale = PCAP_MAGICS[magic]
+            snaplen, linktype = struct.unpack_from(endian + "II", mm, 16)
+            first_ts = struct.unpack_from(endian + "I", mm, 24)[0] if len(mm) >= 40 else 0
+            return {"format": "pcap", "endian": endian, "ts_scale": ts_scale, "snaplen": snaplen,
+                    "linktype": linktype & 0xFFFF, "data_start": 24, "size": len(mm), "first_ts": first_ts}
+        if magic == PCAPNG_MAGIC:
+            return _read_pcapng_header(mm)
+    raise ValueError(f"{path} is not a pcap or pcapng file")
+
+
+def _read_pcapng_header(mm):
+    endian = "<" if mm[8:12] == b"\x4d\x3c\x2b\x1a" else ">"
+    interfaces = []
+    pos = 0
+    while pos + 12 <= len(mm):
+        block_type, block_len = struct.unpack_from(endian + "II", mm, pos)
+        if block_len < 12:
+            break
+        if block_type == 1:  # Interface Description Block
+            linktype, _, _ = struct.unpack_from(endian + "HHI", mm, pos + 8)
+            interfaces.append((linktype, _pcapng_ts_scale(mm, endian, pos + 16, pos + block_len - 4)))
+        elif block_type in (2, 3, 6):
+            break  # Packet data starts here
+        pos += block_len
+    return {"format": "pcapng", "endian": endian, "interfaces": interfaces, "data_start": 0, "size": len(mm)}
+
+
+def _pcapng_ts_scale(mm, endian, pos, end):
+    """Reads the if_tsresol option of an Interface Description Block (default: microseconds)."""
+    while pos + 4 <= end:
+        code, length = struct.unpack_from(endian + "HH", mm, pos)
+        if code == 0:
+            break
+        if code == 9 and length >= 1:
+            resolution = mm[pos + 4]
+            return 2.0 ** -(resolution & 0x7F) if resolution & 0x80 else 10.0 ** -resolution
+        pos += 4 + (length + 3) // 4 * 4
+    return 1e-6
+
+
+def _next_pcap_record(mm, pos, info, previous_ts):
+    """Validates the record header at pos; returns (next record offset, ts_sec) or None."""
+    if pos + 16 > info["size"]:
+        return None
+    ts_sec, ts_frac, incl_len, orig_len = struct.unpack_from(info["endian"] + "IIII", mm, pos)
+    if not (ts_frac < (1_000_000 if info["ts_scale"] == 1e-6 else 1_000_000_000)
+            and incl_len <= max(info["snaplen"], 262144) and incl_len <= orig_len
+            and pos + 16 + incl_len <= info["size"]
+            and info["first_ts"] - 86400 <= ts_sec <= info["first_ts"] + SYNC_MAX_SPAN
+            and (previous_ts is None or ts_sec >= previous_ts - SYNC_MAX_REORDER)):
+        return None
+    return pos + 16 + incl_len, ts_sec
+
+
+def _next_pcapng_block(mm, pos, info, previous_ts):
+    """Validates the block at pos; returns (next block offset, None) or None."""
+    if pos + 12 > info["size"]:
+        return None
+    block_type, block_len = struct.unpack_from(info["endian"] + "II", mm, pos)
+    if not (block_type in PCAPNG_BLOCK_TYPES and block_len >= 12 and block_len % 4 == 0
+            and pos + block_len <= info["size"]
+            and struct.unpack_from(info["endian"] + "I", mm, pos + block_len - 4)[0] == block_len):
+        return None
+    return pos + block_len, None
+
+
+def sync_to_record(mm, pos, info):
+    """
+    Finds the first record (pcap) or block (pcapng) boundary at or after pos.
+    A candidate is accepted when it and the following SYNC_CHAIN headers all parse consistently,
+    which lets workers split a capture by file offset without walking it from the start.
+    Args:
+        mm (mmap): The memory-mapped capture.
+        pos (int): Byte offset to search from.
+        info (dict): Capture header from read_capture_info.
+    Returns:
+        int: Offset of the boundary, or the file size if none is found.
+    """
+    pcapng = info["format"] == "pcapng"
+    next_header = _next_pcapng_block if pcapng else _next_pcap_record
+    step = 4 if pcapng else 1
+    pos = max(pos, info["data_start"])
+    if pcapng:
+        pos += -pos % 4  # Blocks are 32-bit aligned
+    while pos < info["size"]:
+        candidate, ts = pos, None
+        for _ in range(SYNC_CHAIN):
+            if candidate >= info["size"]:
+                return pos
+            header = next_header(mm, candidate, info, ts)
+            if header is None:
+                break
+            candidate, ts = header
+        else:
+            return pos
+        pos += step
+    return info["size"]
+
+
+def iter_frames(mm, info, start, end):
+    """
+    Yields the frames whose record header starts in [start, end).
+    Args:
+        mm (mmap): The memory-mapped capture.
+        info (dict): Capture header from read_capture_info.
+        start (int): Record-aligned start offset.
+        end (int): Record-aligned end offset.
+    Yields:
+        tuple: (timestamp, linktype, frame offset, captured length).
+    """
+    endian = info["endian"]
+    if info["format"] == "pcap":
+        header = struct.Struct(endian + "IIII")
+        linktype, ts_scale = info["linktype"], info["ts_scale"]
+        pos = start
+        while pos < end:
+            ts_sec, ts_frac, incl_len, _ = header.unpack_from(mm, pos)
+            yield ts_sec + ts_frac * ts_scale, linktype, pos + 16, incl_len
+            pos += 16 + incl_len
+        return
+
+    interfaces = info["interfaces"]
+    block_header = struct.Struct(endian + "II")
+    epb_header = struct.Struct(endian + "IIIII")
+    pos = start
+    while pos < end:
+        block_type, block_len = block_header.unpack_from(mm, pos)
+        if block_type == 6:  # Enhanced Packet Block
+            interface_id, ts_high, ts_low, cap_len, _ = epb_header.unpack_from(mm, pos + 8)
+            linktype, ts_scale = interfaces[interface_id] if interface_id < len(interfaces) else (1, 1e-6)
+            yield ((ts_high << 32) | ts_low) * ts_scale, linktype, pos + 28, cap_len
+        elif block_type == 3:  # Simple Packet Block (no timestamp)
+            orig_len = struct.unpack_from(endian + "I", mm, pos + 8)[0]
+            linktype = interfaces[0][0] if interfaces else LINKTYPE_ETHERNET
+            yield 0.0, linktype, pos + 12, min(orig_len, block_len - 16)
+        pos += block_len
+
+
+def network_header(mm, offset, length, linktype):
+    """
+    Locates the network-layer header of a frame.
+    Args:
+        mm (mmap): The memory-mapped capture.
+        offset (int): Offset of the frame.
+        length (int): Captured length of the frame.
+        linktype (int): Link-layer type of the frame.
+    Returns:
+        tuple: (ethertype, offset of the network header), or (None, None) for unsupported link types.
+    """
+    if linktype == LINKTYPE_ETHERNET:
+        if length < 14:
+            return None, None
+        ethertype = (mm[offset + 12] << 8) | mm[offset + 13]
+        pos = offset + 14
+        while ethertype in (0x8100, 0x88A8) and pos + 4 <= offset + length:  # 802.1Q / QinQ tags
+            ethertype = (mm[pos + 2] << 8) | mm[pos + 3]
+            pos += 4
+        return ethertype, pos
+    if linktype == LINKTYPE_RAW:
+        if length < 1:
+            return None, None
+        return (0x0800 if mm[offset] >> 4 == 4 else 0x86DD), offset
+    if linktype == LINKTYPE_LINUX_SLL:
+        return ((mm[offset + 14] << 8) | mm[offset + 15], offset + 16) if length >= 16 else (None, None)
+    if linktype == LINKTYPE_LINUX_SLL2:
+        return ((mm[offset] << 8) | mm[offset + 1], offset + 20) if length >= 20 else (None, None)
+    return None, None
+
+
+def classify_frame(mm, offset, length, linktype):
+    """
+    Classifies a frame the same way analyze_traffic classifies Scapy packets.
+    Returns:
+        str: 'TCP', 'UDP', 'ICMP' or 'Other' for IPv4 packets, 'Non-IP' otherwise.
+    """
+    ethertype, ip = network_header(mm, offset, length, linktype)
+    if ethertype != 0x0800 or ip + 20 > offset + length:
+        return "Non-IP"
+    if ((mm[ip + 6] & 0x1F) << 8) | mm[ip + 7]:
+        return "Other"  # Non-first fragment: no transport header to dissect
+    proto = mm[ip + 9]
+    return "TCP" if proto == 6 else "UDP" if proto == 17 else "ICMP" if proto == 1 else "Other"
+
+
+def _count_range(path, start, end, info):
+    """Worker task: counts protocols of the records in one record-aligned byte range."""
+    counts = Counter()
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for _, linktype, offset, length in iter_frames(mm, info, start, end):
+            counts[classify_frame(mm, offset, length, linktype)] += 1
+    return counts
+
+
+def split_capture(path, info, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Splits a capture into record-aligned byte ranges of roughly chunk_size.
+    Returns:
+        list: A list of (start, end) tuples.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        boundaries = [sync_to_record(mm, info["data_start"], info)]
+        for pos in range(info["data_start"] + chunk_size, info["size"], chunk_size):
+            boundary = sync_to_record(mm, pos, info)
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+    boundaries.append(info["size"])
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+def count_protocols(path, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Counts TCP/UDP/ICMP/Other/Non-IP packets in a pcap or pcapng file without building Scapy packets.
+    The memory-mapped capture is split by file offset across a process pool.
+    Args:
+        path (str): Path of the capture file.
+        workers (int): Number of worker processes (default: CPU count).
+        chunk_size (int): Bytes per worker task.
+    Returns:
+        Counter: Protocol name -> packet count, compatible with visualize_traffic.
+    """
+    info = read_capture_info(path)
+    ranges = split_capture(path, info, chunk_size)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(ranges) <= 1:
+        results = [_count_range(path, start, end, info) for start, end in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_count_range, [path] * len(ranges), *zip(*ranges),
+                                        [info] * len(ranges)))
+    return sum(results, Counter())
+
+
+def synthetic_frames(seed_payload=b"x" * 32):
+    """
+    Builds a TCP/UDP/ICMP/ARP mix of Ethernet frames for benchmarks.
+    Args:
+        seed_payload (bytes): Payload appended to each IP packet.
+    Returns:
+        list: Raw Ethernet frames (bytes).
+    """
+    ether_ip = b"\x00\x11\x22\x33\x44\x55\x66\x77\x88\x99\xaa\xbb\x08\x00"
+    ether_arp = b"\xff\xff\xff\xff\xff\xff\x66\x77\x88\x99\xaa\xbb\x08\x06"
+
+    def ipv4(proto, transport):
+        total = 20 + len(transport) + len(seed_payload)
+        return struct.pack("!BBHHHBBH4s4s", 0x45, 0, total, 0, 0, 64, proto, 0,
+                           b"\x0a\x00\x00\x01", b"\x0a\x00\x00\x02") + transport + seed_payload
+
+    return [
+        ether_ip + ipv4(6, struct.pack("!HHIIBBHHH", 443, 50000, 0, 0, 0x50, 0x18, 1024, 0, 0)),
+        ether_ip + ipv4(17, struct.pack("!HHHH", 53, 50001, 8 + len(seed_payload), 0)),
+        ether_ip + ipv4(1, struct.pack("!BBHHH", 8, 0, 0, 1, 1)),
+        ether_arp + b"\x00\x01\x08\x00\x06\x04\x00\x01" + b"\x00" * 20,
+    ]
+
+
+def write_synthetic_pcap(path, packet_count, seed_payload=b"x" * 32):
+    """
+    Writes a synthetic Ethernet pcap with a TCP/UDP/ICMP/ARP mix, for benchmarks.
+    Args:
+        path (str): Output path.
+        packet_count (int): Number of packets to write.
+        seed_payload (bytes): Payload appended to each IP packet.
+    """
+    frames = synthetic_frames(seed_payload)
+    record_header = struct.Struct("<IIII")
+    with open(path, "wb") as f:
+        f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, LINKTYPE_ETHERNET))
+        for index in range(packet_count):
+            frame = frames[index % len(frames)]
+            timestamp = 1700000000 + index // 1000  # 1000 packets per second
+            f.write(record_header.pack(timestamp, index % 1000 * 1000, len(frame), len(frame)))
+            f.write(frame)
+
+
+def benchmark_synthetic(packet_count=2_000_000, workers=None, scapy_sample=20_000):
+    """
+    Measures ingestion throughput on a synthetic capture generated in a temporary directory.
+    Args:
+        packet_count (int): Packets in the synthetic capture.
+        workers (int): Worker processes for the parallel run (default: CPU count).
+        scapy_sample (int): Packets read with Scapy for comparison (0 to skip).
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "synthetic.pcap")
+        write_synthetic_pcap(path, packet_count)
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"[+] Synthetic capture: {packet_count} packets, {size_mb:.1f} MB")
+
+        for worker_count in sorted({1, workers or os.cpu_count() or 1}):
+            start = time.perf_counter()
+            counts = count_protocols(path, workers=worker_count, chunk_size=8 * 1024 * 1024)
+            elapsed = time.perf_counter() - start
+            print(f"    {worker_count} worker(s): {elapsed:.2f}s, {packet_count / elapsed:,.0f} packets/s, "
+                  f"{size_mb / elapsed:.0f} MB/s {dict(counts)}")
+
+        if scapy_sample:
+            try:
+                from scapy.all import PcapReader
+            except ImportError:
+                return
+            start = time.perf_counter()
+            with PcapReader(path) as reader:
+                for index, _ in enumerate(reader):
+                    if index + 1 >= scapy_sample:
+                        break
+            elapsed = time.perf_counter() - start
+            print(f"    Scapy dissection: {scapy_sample / elapsed:,.0f} packets/s")
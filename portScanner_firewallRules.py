@@ -2,6 +2,23 @@ import socket
 from contextlib import closing
 import psutil
 import datetime
+import asyncio
+import argparse
+import ipaddress
+import itertools
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from report_writer import FORMATS, open_report, report_filename
+
+# One probe outcome streamed by the asyncio scanning engine
+ScanResult = namedtuple("ScanResult", ["ip", "port", "state"])
+
+# Structured report layout: one row per open local port and per open or filtered remote port
+PORT_COLUMNS = ("scope", "ip", "port", "state")
+PORT_TYPES = {"scope": "str", "ip": "str", "port": "int", "state": "str"}
 
 def check_local_open_ports():
     """
@@ -31,17 +48,211 @@ def scan_remote_ports(ip, port_range):
                 open_ports.append(port)
     return open_ports
 
-def save_to_file(local_ports, remote_ports, ip, port_range):
+def expand_targets(targets):
     """
-    Saves the results to a text file with a timestamped filename.
+    Expands IP addresses and CIDR ranges into a list of host addresses.
+    Args:
+        targets (str or list): A comma-separated string or a list of IPs/CIDR ranges (e.g., '192.168.1.0/24').
+    Returns:
+        list: A list of host IP address strings.
+    """
+    if isinstance(targets, str):
+        targets = [target.strip() for target in targets.split(",") if target.strip()]
+    hosts = []
+    for target in targets:
+        network = ipaddress.ip_network(target, strict=False)
+        hosts.extend(str(host) for host in network.hosts())
+    return hosts
+
+def expand_ports(ports):
+    """
+    Normalizes a port specification into a list of ports.
+    Args:
+        ports (tuple or iterable): A (start, end) tuple or an iterable of individual ports.
+    Returns:
+        list: A list of port numbers.
+    """
+    if isinstance(ports, tuple) and len(ports) == 2:
+        return list(range(ports[0], ports[1] + 1))
+    return list(ports)
+
+class HostRateLimiter:
+    """Spaces out connection attempts so no single host sees more than `rate` probes per second."""
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = {}
+
+    async def wait(self, ip):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(ip, now))
+        self._next_slot[ip] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+async def probe_port(ip, port, timeout=1.0):
+    """
+    Attempts a single non-blocking TCP connect.
+    Args:
+        ip (str): The IP address of the target device.
+        port (int): The port to probe.
+        timeout (float): Seconds to wait before the port is considered filtered.
+    Returns:
+        str: 'open', 'closed' (connection refused) or 'filtered' (timeout/unreachable).
+    """
+    loop = asyncio.get_running_loop()
+    family = socket.AF_INET6 if ":" in ip else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    try:
+        await asyncio.wait_for(loop.sock_connect(sock, (ip, port)), timeout)
+        return "open"
+    except ConnectionRefusedError:
+        return "closed"
+    except (asyncio.TimeoutError, OSError):
+        return "filtered"
+    finally:
+        sock.close()
+
+async def scan_ports_async(targets, ports, concurrency=500, timeout=1.0, per_host_rate=None):
+    """
+    Scans many hosts and ports at once and yields results as they arrive.
+    Args:
+        targets (str or list): IP addresses and/or CIDR ranges to scan.
+        ports (tuple or iterable): A (start, end) tuple or an iterable of ports.
+        concurrency (int): Maximum number of connection attempts in flight
+            (keep below the process file descriptor limit).
+        timeout (float): Per-connection timeout in seconds.
+        per_host_rate (float): Maximum probes per second sent to any single host (None for unlimited).
+    Yields:
+        ScanResult: The (ip, port, state) outcome of each probe.
+    """
+    hosts = expand_targets(targets)
+    port_list = expand_ports(ports)
+    # Port-major order interleaves hosts so the per-host rate limit doesn't stall the workers
+    jobs = ((ip, port) for port in port_list for ip in hosts)
+    results = asyncio.Queue(maxsize=concurrency * 2)
+    limiter = HostRateLimiter(per_host_rate)
+    finished = object()
+
+    async def worker():
+        for ip, port in jobs:
+            await limiter.wait(ip)
+            state = await probe_port(ip, port, timeout)
+            await results.put(ScanResult(ip, port, state))
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+
+    async def wait_for_workers():
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            await results.put(finished)
+
+    supervisor = asyncio.create_task(wait_for_workers())
+    try:
+        while True:
+            result = await results.get()
+            if result is finished:
+                break
+            yield result
+        await supervisor  # Re-raises any worker error
+    finally:
+        for task in workers:
+            task.cancel()
+        supervisor.cancel()
+
+def iter_scan_results(targets, ports, **scan_options):
+    """
+    Runs the asyncio scanning engine in a background thread and yields results synchronously.
+    Args:
+        targets (str or list): IP addresses and/or CIDR ranges to scan.
+        ports (tuple or iterable): A (start, end) tuple or an iterable of ports.
+        **scan_options: Passed through to scan_ports_async (concurrency, timeout, per_host_rate).
+    Yields:
+        ScanResult: The (ip, port, state) outcome of each probe.
+    """
+    results = queue.Queue()
+    stop = threading.Event()
+    finished = object()
+
+    async def pump():
+        async for result in scan_ports_async(targets, ports, **scan_options):
+            if stop.is_set():
+                break
+            results.put(result)
+
+    def runner():
+        try:
+            asyncio.run(pump())
+        except Exception as e:
+            results.put(e)
+        finally:
+            results.put(finished)
+
+    threading.Thread(target=runner, daemon=True).start()
+    try:
+        while True:
+            item = results.get()
+            if item is finished:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+def write_scan_results(file, results):
+    """
+    Writes open ports from a result stream as they arrive and appends a state summary.
+    Args:
+        file: An open text file.
+        results (iterable): ScanResult items.
+    """
+    counts = {"open": 0, "closed": 0, "filtered": 0}
+    for result in results:
+        counts[result.state] += 1
+        if result.state == "open":
+            file.write(f"{result.ip}:{result.port}\n")
+    if not counts["open"]:
+        file.write("No open TCP ports found.\n")
+    file.write(f"\nProbes: {sum(counts.values())}, Open: {counts['open']}, "
+               f"Closed: {counts['closed']}, Filtered: {counts['filtered']}\n\n")
+
+def port_records(local_ports, remote_ports, ip):
+    """
+    Yields structured report rows for the local and remote port results.
+    Closed remote ports are left out; filtered ones are kept, as they show where a firewall drops traffic.
+    """
+    for port in local_ports:
+        yield {"scope": "local", "ip": None, "port": port, "state": "open"}
+    for result in remote_ports:
+        if not isinstance(result, ScanResult):
+            result = ScanResult(ip, result, "open")
+        if result.state != "closed":
+            yield {"scope": "remote", "ip": result.ip, "port": result.port, "state": result.state}
+
+def save_to_file(local_ports, remote_ports, ip, port_range, fmt="text"):
+    """
+    Saves the results to a file with a timestamped filename.
     Args:
         local_ports (list): List of open local TCP ports.
-        remote_ports (list): List of open remote TCP ports.
-        ip (str): IP address of the remote device.
+        remote_ports (iterable): List of open remote TCP ports, or a stream of ScanResult
+            items (e.g., from iter_scan_results) which is written as it arrives.
+        ip (str): IP address (or CIDR range) of the remote device(s).
         port_range (tuple): Range of scanned remote ports.
+        fmt (str): Report format: text, jsonl, csv or parquet.
     """
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    filename = f"firewall_and_open_ports_{timestamp}.txt"
+    filename = report_filename("firewall_and_open_ports", fmt, timestamp)
+
+    if fmt != "text":
+        with open_report(filename, PORT_COLUMNS, fmt, types=PORT_TYPES) as report:
+            report.write_many(port_records(local_ports, remote_ports, ip))
+        print(f"[+] Results saved to {filename}")
+        return
     
     with open(filename, 'w') as file:
         file.write(f"Firewall Rules and Open Ports Report - {timestamp}\n")
@@ -56,14 +267,86 @@ def save_to_file(local_ports, remote_ports, ip, port_range):
         
         # Remote Open Ports
         file.write(f"Remote Open TCP Ports on {ip} (Range {port_range[0]}-{port_range[1]}):\n")
-        if remote_ports:
-            file.write(", ".join(map(str, remote_ports)) + "\n\n")
-        else:
+        remote_ports = iter(remote_ports)
+        first = next(remote_ports, None)
+        if first is None:
             file.write("No open TCP ports found.\n\n")
+        elif isinstance(first, ScanResult):
+            write_scan_results(file, itertools.chain([first], remote_ports))
+        else:
+            file.write(", ".join(map(str, itertools.chain([first], remote_ports))) + "\n\n")
 
     print(f"[+] Results saved to {filename}")
 
+def benchmark_loopback(listener_count=50, filtered_count=10, closed_port_count=2000, concurrency=500):
+    """
+    Compares the sequential scanner with the asyncio engine against local listeners on loopback.
+    Filtered ports are simulated with listeners whose accept queue is full, so the kernel drops
+    further SYNs and connects time out exactly as they would against a firewalled host.
+    Args:
+        listener_count (int): Number of open listening sockets on 127.0.0.1.
+        filtered_count (int): Number of saturated listeners that behave as filtered ports.
+        closed_port_count (int): Number of additional (normally closed) ports to probe.
+        concurrency (int): Concurrency cap for the asyncio engine.
+    """
+    sockets = []
+    try:
+        listener_ports = set()
+        for _ in range(listener_count):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(("127.0.0.1", 0))
+            sock.listen(128)
+            sockets.append(sock)
+            listener_ports.add(sock.getsockname()[1])
+        filtered_ports = set()
+        for _ in range(filtered_count):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(("127.0.0.1", 0))
+            sock.listen(0)
+            filler = socket.create_connection(sock.getsockname())  # Fills the accept queue
+            sockets.extend([sock, filler])
+            filtered_ports.add(sock.getsockname()[1])
+        ports = sorted(listener_ports | filtered_ports | set(range(40000, 40000 + closed_port_count)))
+
+        start = time.perf_counter()
+        sequential_open = [p for p in ports if scan_remote_ports("127.0.0.1", (p, p))]
+        sequential_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        async_open = [r.port for r in iter_scan_results("127.0.0.1", ports, concurrency=concurrency)
+                      if r.state == "open"]
+        async_time = time.perf_counter() - start
+    finally:
+        for sock in sockets:
+            sock.close()
+
+    print(f"[+] Probed {len(ports)} loopback ports "
+          f"({len(listener_ports)} open, {len(filtered_ports)} filtered)")
+    print(f"    Sequential: {sequential_time:.3f}s ({len(ports) / sequential_time:.0f} ports/s), "
+          f"{len(sequential_open)} open")
+    print(f"    Asyncio:    {async_time:.3f}s ({len(ports) / async_time:.0f} ports/s), "
+          f"{len(async_open)} open")
+
+def echo_open_ports(results):
+    """Prints open ports as they stream past, passing every result through unchanged."""
+    for result in results:
+        if result.state == "open":
+            print(f"[+] Open: {result.ip}:{result.port}")
+        yield result
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local open ports and remote port scanner")
+    parser.add_argument("--concurrency", type=int, default=500, help="Maximum connection attempts in flight")
+    parser.add_argument("--timeout", type=float, default=1.0, help="Per-connection timeout in seconds")
+    parser.add_argument("--rate", type=float, default=None, help="Maximum probes per second per host")
+    parser.add_argument("--format", choices=FORMATS, default="text", help="Report format")
+    parser.add_argument("--benchmark", action="store_true", help="Benchmark the scanners on loopback and exit")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_loopback(concurrency=args.concurrency)
+        raise SystemExit
+
     # Check local open ports
     print("[+] Checking local open TCP ports...")
     local_open_ports = check_local_open_ports()
@@ -74,7 +357,7 @@ if __name__ == "__main__":
         print("[-] No open TCP ports found locally.")
 
     # Scan remote device for open ports
-    ip = input("\nEnter the IP address of the remote device to scan: ")
+    ip = input("\nEnter the IP address or CIDR range(s) of the remote devices to scan (comma-separated): ")
     
     try:
         start_port = int(input("Enter start of port range to scan: "))
@@ -82,17 +365,15 @@ if __name__ == "__main__":
         
         if start_port > end_port or start_port < 1 or end_port > 65535:
             raise ValueError("Invalid port range.")
+        if not expand_targets(ip):
+            raise ValueError("No hosts to scan.")
         
-        print(f"[+] Scanning remote device {ip} for open ports in range {start_port}-{end_port}...")
-        remote_open_ports = scan_remote_ports(ip, (start_port, end_port))
-        
-        if remote_open_ports:
-            print(f"[+] Remote Open TCP Ports: {remote_open_ports}")
-        else:
-            print("[-] No open TCP ports found on the remote device.")
-        
-        # Save results to file
-        save_to_file(local_open_ports, remote_open_ports, ip, (start_port, end_port))
+        print(f"[+] Scanning {ip} for open ports in range {start_port}-{end_port}...")
+        results = iter_scan_results(ip, (start_port, end_port), concurrency=args.concurrency,
+                                    timeout=args.timeout, per_host_rate=args.rate)
+
+        # Stream results straight into the report file
+        save_to_file(local_open_ports, echo_open_ports(results), ip, (start_port, end_port), args.format)
     
     except ValueError as e:
         print(f"[-] Error: {e}")
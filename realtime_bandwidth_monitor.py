@@ -1,54 +1,47 @@
-import psutil
-import time
+import argparse
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 import datetime
 
+from bandwidth_sampler import BandwidthSampler, TOTAL
 
-def get_bandwidth_usage(interval=1):
+# Samples plotted (at the default 0.25 s sample interval this is the last minute)
+HISTORY_POINTS = 240
+
+
+def get_bandwidth_usage(sampler, nic=TOTAL):
     """
-    Captures bandwidth usage statistics.
+    Reads the latest bandwidth usage statistics from the background sampler without blocking.
     Args:
-        interval (int): Time interval in seconds for capturing data.
+        sampler (BandwidthSampler): Running sampler.
+        nic (str): Interface name (default: all interfaces).
     Returns:
         tuple: Upload and download speeds in Mbps.
     """
-    net_io_start = psutil.net_io_counters()
-    time.sleep(interval)
-    net_io_end = psutil.net_io_counters()
-
-    upload_speed = (net_io_end.bytes_sent - net_io_start.bytes_sent) * 8 / interval / 1e6  # Mbps
-    download_speed = (net_io_end.bytes_recv - net_io_start.bytes_recv) * 8 / interval / 1e6  # Mbps
+    latest = sampler.latest(nic)
+    if latest is None:
+        return 0.0, 0.0
+    return latest[1], latest[2]
 
-    return upload_speed, download_speed
 
-
-def update_graph(frame, upload_data, download_data, line_upload, line_download):
+def update_graph(frame, sampler, nic, line_upload, line_download):
     """
-    Updates the graph with current bandwidth usage data.
+    Updates the graph with the bandwidth history held by the sampler.
     Args:
         frame: Animation frame (not used directly).
-        upload_data: List to store upload speed data.
-        download_data: List to store download speed data.
+        sampler (BandwidthSampler): Running sampler.
+        nic (str): Interface name to plot.
         line_upload: Line object for upload speed.
         line_download: Line object for download speed.
     """
-    upload_speed, download_speed = get_bandwidth_usage()
-
-    # Append data and maintain a rolling window of the last 60 points
-    upload_data.append(upload_speed)
-    download_data.append(download_speed)
-    if len(upload_data) > 60:
-        upload_data.pop(0)
-        download_data.pop(0)
-
-    # Update line data
-    line_upload.set_ydata(upload_data)
-    line_download.set_ydata(download_data)
+    history = sampler.history(nic, size=HISTORY_POINTS)
+    if len(history) == 0:
+        return
 
-    # Update x-axis limits dynamically
-    line_upload.set_xdata(range(len(upload_data)))
-    line_download.set_xdata(range(len(download_data)))
+    # Seconds relative to the newest sample
+    seconds = history["timestamp"] - history["timestamp"][-1]
+    line_upload.set_data(seconds, history["upload"])
+    line_download.set_data(seconds, history["download"])
 
     plt.gca().relim()
     plt.gca().autoscale_view()
@@ -62,11 +55,20 @@ def on_close(event, fig):
     print(f"Plot saved as {filename}")
 
 
-def main():
+def main(nic=TOTAL, sample_interval=0.25, refresh_ms=500):
+    """
+    Plots live bandwidth usage.
+    Args:
+        nic (str): Interface to plot (default: all interfaces).
+        sample_interval (float): Seconds between counter samples.
+        refresh_ms (int): Milliseconds between redraws; drawing never waits for a sample.
+    """
+    sampler = BandwidthSampler(interval=sample_interval, history=HISTORY_POINTS).start()
+
     # Initialize plot
     fig, ax = plt.subplots()
 
-    ax.set_title("Real-Time Bandwidth Usage")
+    ax.set_title("Real-Time Bandwidth Usage" + ("" if nic == TOTAL else f" ({nic})"))
     ax.set_xlabel("Time (seconds)")
     ax.set_ylabel("Speed (Mbps)")
 
@@ -75,10 +77,6 @@ def main():
 
     ax.legend(loc="upper right")
 
-    # Data storage for bandwidth usage
-    upload_data = []
-    download_data = []
-
     # Connect the close event to the saving handler
     fig.canvas.mpl_connect('close_event', lambda event: on_close(event, fig))
 
@@ -86,12 +84,20 @@ def main():
     ani = FuncAnimation(
         fig,
         update_graph,
-        fargs=(upload_data, download_data, line_upload, line_download),
-        interval=1000  # Update every second
+        fargs=(sampler, nic, line_upload, line_download),
+        interval=refresh_ms
     )
 
-    plt.show()
+    try:
+        plt.show()
+    finally:
+        sampler.stop()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Real-time bandwidth usage graph")
+    parser.add_argument("--interface", default=TOTAL, help="Interface to plot (default: all interfaces)")
+    parser.add_argument("--sample-interval", type=float, default=0.25, help="Seconds between counter samples")
+    args = parser.parse_args()
+
+    main(nic=args.interface, sample_interval=args.sample_interval)
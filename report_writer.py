@@ -0,0 +1,234 @@
+import csv
+import json
+import datetime
+
+try:
+    import pyarrow  # Optional: only needed for Parquet reports (pip install pyarrow)
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+FORMATS = ("text", "jsonl", "csv", "parquet")
+EXTENSIONS = {"text": "txt", "jsonl": "jsonl", "csv": "csv", "parquet": "parquet"}
+DEFAULT_BATCH_SIZE = 10_000  # Rows buffered per Parquet row group
+
+# Column type names accepted by ParquetReportWriter
+PARQUET_TYPES = {
+    "int": lambda: pyarrow.int64(),
+    "float": lambda: pyarrow.float64(),
+    "str": lambda: pyarrow.string(),
+    "bool": lambda: pyarrow.bool_(),
+}
+
+
+def report_filename(prefix, fmt="text", timestamp=None):
+    """
+    Builds a timestamped report filename, e.g. network_devices_2025-04-06_14-05-00.txt.
+    Args:
+        prefix (str): Filename prefix.
+        fmt (str): One of FORMATS.
+        timestamp (str): Timestamp to use (default: now).
+    """
+    timestamp = timestamp or datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    return f"{prefix}_{timestamp}.{EXTENSIONS[fmt]}"
+
+
+class ReportWriter:
+    """
+    Base class for streaming report writers. Records (dicts) are written as they are passed in,
+    so a report of any size is produced in bounded memory.
+    """
+
+    def __init__(self, path, columns):
+        """
+        Args:
+            path (str): Output file.
+            columns (sequence): Column names, in output order; other record keys are ignored.
+        """
+        self.path = path
+        self.columns = tuple(columns)
+        self.records = 0
+
+    def write(self, record):
+        self._write(record)
+        self.records += 1
+
+    def write_many(self, records):
+        """Writes every record from an iterable (e.g. a generator). Returns the number written."""
+        count = 0
+        for record in records:
+            self.write(record)
+            count += 1
+        return count
+
+    def _write(self, record):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TextReportWriter(ReportWriter):
+    """Human-readable fixed-width table with a title and header, in the style of the existing reports."""
+
+    def __init__(self, path, columns, title=None, headers=None, widths=None, rule_width=50):
+        """
+        Args:
+            title (str): First line of the report.
+            headers (sequence): Column headings (default: the column names).
+            widths (sequence): Column widths (default: 20 each).
+            rule_width (int): Width of the separator lines.
+        """
+        super().__init__(path, columns)
+        self._widths = tuple(widths or (20,) * len(self.columns))
+        self._file = open(path, "w")
+        if title:
+            self._file.write(f"{title}\n")
+            self._file.write("=" * rule_width + "\n")
+        self._file.write(self._line(headers or self.columns))
+        self._file.write("-" * rule_width + "\n")
+
+    def _line(self, values):
+        # A value as wide as its column still gets a space, so neighbouring columns never run together
+        texts = ("" if value is None else str(value) for value in values)
+        return "".join(text.ljust(width) if len(text) < width else text + " "
+                       for text, width in zip(texts, self._widths)) + "\n"
+
+    def _write(self, record):
+        self._file.write(self._line(record.get(column) for column in self.columns))
+
+    def close(self):
+        self._file.close()
+
+
+class JsonLinesReportWriter(ReportWriter):
+    """One JSON object per line."""
+
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        self._file = open(path, "w")
+
+    def _write(self, record):
+        self._file.write(json.dumps({column: record.get(column) for column in self.columns}, default=str) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class CsvReportWriter(ReportWriter):
+    """CSV with a header row."""
+
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        self._file = open(path, "w", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def _write(self, record):
+        self._writer.writerow(record)
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetReportWriter(ReportWriter):
+    """
+    Columnar Parquet, written one row group per batch so at most batch_size rows are held in memory.
+    Column types are taken from `types` where given, otherwise inferred from the first non-null value
+    in the first batch (columns that are empty there are stored as strings).
+    """
+
+    def __init__(self, path, columns, types=None, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Args:
+            types (dict): Column name -> 'int', 'float', 'str' or 'bool'.
+            batch_size (int): Rows per row group.
+        """
+        if pyarrow is None:
+            raise ImportError("Parquet reports require the pyarrow module: pip install pyarrow")
+        super().__init__(path, columns)
+        self._types = dict(types or {})
+        self._batch_size = batch_size
+        self._batch = {column: [] for column in self.columns}
+        self._pending = 0
+        self._writer = None
+
+    def _write(self, record):
+        for column in self.columns:
+            self._batch[column].append(record.get(column))
+        self._pending += 1
+        if self._pending >= self._batch_size:
+            self._flush()
+
+    def _schema(self):
+        fields = []
+        for column in self.columns:
+            name = self._types.get(column)
+            if name is None:
+                value = next((value for value in self._batch[column] if value is not None), None)
+                name = {bool: "bool", int: "int", float: "float"}.get(type(value), "str")
+            fields.append(pyarrow.field(column, PARQUET_TYPES[name]()))
+        return pyarrow.schema(fields)
+
+    def _flush(self):
+        if self._writer is None:
+            self._writer = pyarrow.parquet.ParquetWriter(self.path, self._schema())
+        if self._pending:
+            schema = self._writer.schema
+            batch = {}
+            for field in schema:
+                values = self._batch[field.name]
+                if pyarrow.types.is_string(field.type):
+                    values = [value if value is None or isinstance(value, str) else str(value) for value in values]
+                batch[field.name] = values
+            self._writer.write_table(pyarrow.Table.from_pydict(batch, schema=schema))
+        self._batch = {column: [] for column in self.columns}
+        self._pending = 0
+
+    def close(self):
+        self._flush()  # Also creates the file for an empty report
+        self._writer.close()
+
+
+def open_report(path, columns, fmt=None, title=None, **options):
+    """
+    Opens a streaming report writer.
+    Args:
+        path (str): Output file.
+        columns (sequence): Column names.
+        fmt (str): One of FORMATS (default: chosen from the file extension, falling back to text).
+        title (str): Title line (text reports only).
+        **options: Passed to the writer (headers/widths/rule_width for text, types/batch_size for Parquet).
+    Returns:
+        ReportWriter: Use as a context manager.
+    """
+    if fmt is None:
+        extension = path.rsplit(".", 1)[-1].lower()
+        fmt = next((name for name, ext in EXTENSIONS.items() if ext == extension), "text")
+    if fmt == "text":
+        return TextReportWriter(path, columns, title=title,
+                                **{key: options[key] for key in ("headers", "widths", "rule_width") if key in options})
+    if fmt == "jsonl":
+        return JsonLinesReportWriter(path, columns)
+    if fmt == "csv":
+        return CsvReportWriter(path, columns)
+    if fmt == "parquet":
+        return ParquetReportWriter(path, columns,
+                                   **{key: options[key] for key in ("types", "batch_size") if key in options})
+    raise ValueError(f"Unknown report format {fmt!r} (expected one of {', '.join(FORMATS)})")
+
+
+def write_report(records, path, columns, fmt=None, title=None, **options):
+    """
+    Streams records from an iterable into a report file.
+    Returns:
+        int: Number of records written.
+    """
+    with open_report(path, columns, fmt, title, **options) as report:
+        return report.write_many(records)
@@ -1,28 +1,209 @@
-import schedule
 import time
-import subprocess
+import random
+import signal
+import importlib
+import multiprocessing
 
-# Define functions to run each script
-def run_extract_network_config():
-    print("Running extract_networkConfig_localHost.py...")
-    subprocess.run(["python", "extract_networkConfig_localHost.py"])
 
-def run_get_sys_info():
-    print("Running get_localHost_sysInfo.py...")
-    subprocess.run(["python", "get_localHost_sysInfo.py"])
+def _worker_main(conn, target):
+    """
+    Worker process loop: imports the collector once, then runs it each time it is asked to.
+    Args:
+        conn: Child end of the pipe to the runner.
+        target (str): The collector function as 'module:function'.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is handled by the runner
+    module_name, func_name = target.split(":")
+    func = getattr(importlib.import_module(module_name), func_name)  # Heavy imports (scapy, psutil) happen once
 
-def run_active_app_and_traffic():
-    print("Running activeApp_and_networkTraffic_localHost.py...")
-    subprocess.run(["python", "activeApp_and_networkTraffic_localHost.py"])
+    while conn.recv() is not None:
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        error = None
+        try:
+            func()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        conn.send((error, time.perf_counter() - wall_start, time.process_time() - cpu_start))
 
-# Schedule the scripts to run every 2 minutes
-schedule.every(2).minutes.do(run_extract_network_config)
-schedule.every(2).minutes.do(run_get_sys_info)
-schedule.every(2).minutes.do(run_active_app_and_traffic)
 
-print("Scheduler started. Scripts will run every 2 minutes.")
+class Job:
+    """A collector function run periodically in its own long-lived worker process."""
 
-# Keep the scheduler running
-while True:
-    schedule.run_pending()
-    time.sleep(1)
+    def __init__(self, name, target, interval, timeout=None, jitter=0.0, offset=None):
+        """
+        Args:
+            name (str): Display name of the job.
+            target (str): The collector function as 'module:function'.
+            interval (float): Seconds between runs.
+            timeout (float): Seconds a run may take before its worker is killed (default: interval).
+            jitter (float): Maximum random delay in seconds added to each run.
+            offset (float): Delay of the first run (default: staggered by the runner).
+        """
+        self.name = name
+        self.target = target
+        self.interval = interval
+        self.timeout = timeout or interval
+        self.jitter = jitter
+        self.offset = offset
+        self.stats = {"runs": 0, "failures": 0, "timeouts": 0, "skipped": 0,
+                      "last_wall": 0.0, "last_cpu": 0.0, "total_wall": 0.0, "total_cpu": 0.0}
+        self.next_due = None
+        self._base_due = None
+        self._started = None
+        self._conn = None
+        self._process = None
+
+    def spawn_worker(self):
+        """Starts (or restarts) the worker process for this job."""
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(target=_worker_main, args=(child_conn, self.target),
+                                                name=f"job-{self.name}", daemon=True)
+        self._process.start()
+        child_conn.close()
+
+    def stop_worker(self, kill=False):
+        """Stops the worker process, killing it if it is busy or kill is set."""
+        if self._process is None:
+            return
+        if not kill:
+            try:
+                self._conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self._process.join(timeout=2)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._conn.close()
+        self._process = None
+
+
+class JobRunner:
+    """
+    Runs jobs on their intervals without spawning a new interpreter per run.
+    A job whose previous run is still going is skipped, a run exceeding its timeout has its
+    worker killed and respawned, and wall and CPU time are recorded for every run.
+    """
+
+    def __init__(self, jobs, stagger=True, tick=0.5):
+        """
+        Args:
+            jobs (list): Job objects to run.
+            stagger (bool): Spread first runs evenly over each job's interval instead of firing together.
+            tick (float): Maximum seconds between checks for finished, timed-out and due jobs.
+        """
+        self.jobs = jobs
+        self.stagger = stagger
+        self.tick = tick
+
+    def start(self):
+        """Starts all worker processes and schedules the first runs."""
+        now = time.monotonic()
+        for index, job in enumerate(self.jobs):
+            job.spawn_worker()
+            if job.offset is not None:
+                offset = job.offset
+            else:
+                offset = index * job.interval / len(self.jobs) if self.stagger else 0.0
+            job._base_due = now + offset
+            job.next_due = job._base_due + random.uniform(0, job.jitter)
+
+    def stop(self):
+        """Stops all worker processes."""
+        for job in self.jobs:
+            job.stop_worker(kill=job._started is not None)
+
+    def poll(self):
+        """Collects finished runs, enforces timeouts and dispatches due jobs."""
+        now = time.monotonic()
+        for job in self.jobs:
+            self._collect(job, now)
+            if now >= job.next_due:
+                self._dispatch(job)
+                while job._base_due <= now:  # Don't try to catch up on missed runs
+                    job._base_due += job.interval
+                job.next_due = job._base_due + random.uniform(0, job.jitter)
+
+    def run_forever(self):
+        """Runs the scheduling loop until interrupted."""
+        self.start()
+        try:
+            while True:
+                self.poll()
+                next_due = min(job.next_due for job in self.jobs)
+                time.sleep(max(0.0, min(self.tick, next_due - time.monotonic())))
+        finally:
+            self.stop()
+
+    def _dispatch(self, job):
+        if job._started is not None:
+            job.stats["skipped"] += 1
+            print(f"[-] Skipping {job.name}: previous run still in progress")
+            return
+        if job._process is None or not job._process.is_alive():
+            job.spawn_worker()
+        job._conn.send(True)
+        job._started = time.monotonic()
+        print(f"[+] Running {job.name}...")
+
+    def _collect(self, job, now):
+        if job._started is None:
+            return
+        if job._conn.poll():
+            try:
+                error, wall, cpu = job._conn.recv()
+            except EOFError:
+                error, wall, cpu = "worker exited", now - job._started, 0.0
+            self._record(job, error, wall, cpu)
+        elif not job._process.is_alive():
+            job.stop_worker(kill=True)
+            self._record(job, "worker exited", now - job._started, 0.0)
+        elif now - job._started > job.timeout:
+            job.stop_worker(kill=True)
+            job.stats["timeouts"] += 1
+            self._record(job, f"timed out after {job.timeout}s", now - job._started, 0.0)
+
+    def _record(self, job, error, wall, cpu):
+        job._started = None
+        stats = job.stats
+        stats["runs"] += 1
+        stats["last_wall"], stats["last_cpu"] = wall, cpu
+        stats["total_wall"] += wall
+        stats["total_cpu"] += cpu
+        if error:
+            stats["failures"] += 1
+            print(f"[-] {job.name} failed ({error}): wall {wall:.2f}s")
+        else:
+            print(f"[+] {job.name} finished: wall {wall:.2f}s, CPU {cpu:.2f}s")
+
+    def print_stats(self):
+        """Prints per-job run counts and average wall/CPU cost."""
+        print(f"\n{'Job':<36}{'Runs':>6}{'Fail':>6}{'T/O':>6}{'Skip':>6}{'Avg Wall':>10}{'Avg CPU':>10}")
+        print("-" * 80)
+        for job in self.jobs:
+            stats = job.stats
+            runs = stats["runs"] or 1
+            print(f"{job.name:<36}{stats['runs']:>6}{stats['failures']:>6}{stats['timeouts']:>6}"
+                  f"{stats['skipped']:>6}{stats['total_wall'] / runs:>9.2f}s{stats['total_cpu'] / runs:>9.2f}s")
+
+
+# Collectors run every 2 minutes, staggered so they don't all fire at the same moment
+jobs = [
+    Job("extract_networkConfig_localHost", "extract_networkConfig_localHost:extract_network_configuration",
+        interval=120, timeout=60, jitter=5),
+    Job("get_localHost_sysInfo", "get_localHost_sysInfo:get_system_metrics",
+        interval=120, timeout=60, jitter=5),
+    Job("activeApp_and_networkTraffic_localHost", "activeApp_and_networkTraffic_localHost:monitor_system",
+        interval=120, timeout=90, jitter=5),
+]
+
+if __name__ == "__main__":
+    runner = JobRunner(jobs)
+    print("Scheduler started. Collectors will run every 2 minutes.")
+
+    try:
+        runner.run_forever()
+    except KeyboardInterrupt:
+        print("\nScheduler stopped.")
+    runner.print_stats()
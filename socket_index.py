@@ -0,0 +1,160 @@
+import socket
+from collections import namedtuple
+
+import psutil
+
+from packet_ring_buffer import ip_to_int
+
+# IP protocol number of each socket type, as carried in flow records
+SOCKET_PROTOCOLS = {socket.SOCK_STREAM: 6, socket.SOCK_DGRAM: 17}
+
+# Connection of one process, with the pid psutil.Process.net_connections leaves out
+ProcessConnection = namedtuple("ProcessConnection", "fd family type laddr raddr status pid")
+
+
+def _address_int(address):
+    """Packs a psutil address into an integer IPv4 address (None for IPv6)."""
+    try:
+        return ip_to_int(address.ip)
+    except OSError:
+        return None
+
+
+class SocketIndex:
+    """
+    Maps sockets to their owning processes from one system-wide psutil.net_connections pass,
+    instead of asking every process for its connections.
+    Each refresh diffs the new snapshot against the previous one, so only added and removed
+    sockets touch the index and process names are only looked up for new PIDs.
+    Connected sockets are keyed on (proto, local ip, local port, remote ip, remote port) and listening
+    or unconnected sockets on (proto, local ip, local port), so a packet is tagged with dictionary lookups.
+    Where the system-wide pass is not permitted (macOS without root), each process is asked instead
+    and processes that refuse are left out.
+    """
+
+    def __init__(self, kind='inet'):
+        """
+        Args:
+            kind (str): psutil connection kind to index ('inet', 'tcp', 'udp', ...).
+        """
+        self.kind = kind
+        self.connections = {}  # (family, type, laddr, raddr) -> psutil connection
+        self.names = {}  # pid -> process name
+        self.connected = {}  # (proto, lip, lport, rip, rport) -> pid
+        self.bound = {}  # (proto, lip, lport) -> pid
+        self.per_process = False  # True once the system-wide pass was refused
+
+    def refresh(self):
+        """
+        Takes a new connection snapshot and applies the difference to the index.
+        Returns:
+            tuple: (added, removed) connection counts.
+        """
+        snapshot = {(conn.family, conn.type, conn.laddr, conn.raddr): conn for conn in self._snapshot()}
+        removed = self.connections.keys() - snapshot.keys()
+        added = snapshot.keys() - self.connections.keys()
+        # Same socket address, new owner (e.g. a port released and bound again between refreshes)
+        moved = [key for key in snapshot.keys() & self.connections.keys()
+                 if snapshot[key].pid != self.connections[key].pid]
+        for key in removed:
+            self._unindex(self.connections[key])
+        for key in added:
+            self._index(snapshot[key])
+        for key in moved:
+            self._index(snapshot[key])
+        self.connections = snapshot
+
+        pids = {conn.pid for conn in snapshot.values()}
+        for pid in self.names.keys() - pids:
+            del self.names[pid]
+        for pid in pids - self.names.keys():
+            self.names[pid] = self._process_name(pid)
+        return len(added), len(removed)
+
+    def _snapshot(self):
+        if not self.per_process:
+            try:
+                return psutil.net_connections(kind=self.kind)
+            except psutil.AccessDenied:
+                print("[-] System-wide connection list not permitted; reading each process's connections instead")
+                self.per_process = True
+        connections = []
+        for proc in psutil.process_iter():
+            try:
+                connections += [ProcessConnection(*conn, proc.pid) for conn in proc.net_connections(kind=self.kind)]
+            except (psutil.AccessDenied, psutil.NoSuchProcess, psutil.ZombieProcess):
+                continue
+        return connections
+
+    @staticmethod
+    def _process_name(pid):
+        if pid is None:
+            return None
+        try:
+            return psutil.Process(pid).name()
+        except (psutil.AccessDenied, psutil.NoSuchProcess):
+            return None
+
+    @staticmethod
+    def _keys(conn):
+        proto = SOCKET_PROTOCOLS.get(conn.type)
+        if conn.family != socket.AF_INET or not conn.laddr or proto is None:
+            return None
+        local = (proto, _address_int(conn.laddr), conn.laddr.port)
+        if conn.raddr:
+            return local + (_address_int(conn.raddr), conn.raddr.port)
+        return local
+
+    def _index(self, conn):
+        key = self._keys(conn)
+        if key is not None:
+            (self.connected if len(key) == 5 else self.bound)[key] = conn.pid
+
+    def _unindex(self, conn):
+        key = self._keys(conn)
+        if key is not None:
+            index = self.connected if len(key) == 5 else self.bound
+            if index.get(key) == conn.pid:
+                del index[key]
+
+    def owner(self, src, sport, dst, dport, proto=None):
+        """
+        Finds the local process that sent or received a packet.
+        Args:
+            src (int): Source IPv4 address as an integer.
+            sport (int): Source port.
+            dst (int): Destination IPv4 address as an integer.
+            dport (int): Destination port.
+            proto (int): IP protocol number (6 for TCP, 17 for UDP; None tries both).
+        Returns:
+            tuple: (pid, name), or (None, None) if no local socket matches.
+        """
+        connected, bound = self.connected, self.bound
+        pid = None
+        for proto in (proto,) if proto is not None else (6, 17):
+            pid = connected.get((proto, src, sport, dst, dport))  # Sent by a connected socket
+            if pid is None:
+                pid = connected.get((proto, dst, dport, src, sport))  # Received on a connected socket
+            if pid is None:
+                for key in ((dst, dport), (0, dport), (src, sport), (0, sport)):  # Listening/unconnected sockets
+                    pid = bound.get((proto,) + key)
+                    if pid is not None:
+                        break
+            if pid is not None:
+                break
+        if pid is None:
+            return None, None
+        return pid, self.names.get(pid)
+
+    def established(self):
+        """
+        Lists established connections with their owning processes.
+        Returns:
+            list: Dictionaries with pid, name, local_address, remote_address and status.
+        """
+        return [{"pid": conn.pid,
+                 "name": self.names.get(conn.pid),
+                 "local_address": f"{conn.laddr.ip}:{conn.laddr.port}",
+                 "remote_address": f"{conn.raddr.ip}:{conn.raddr.port}" if conn.raddr else "N/A",
+                 "status": conn.status}
+                for conn in self.connections.values() if conn.status == psutil.CONN_ESTABLISHED]
@@ -0,0 +1,224 @@
+import socket
+import threading
+import time
+
+import paramiko
+
+DEFAULT_HOSTNAME = "Router"
+INVALID_INPUT = "% Invalid input detected at '^' marker."
+
+
+class StubCli:
+    """
+    Minimal Cisco IOS-like command line: enough for Netmiko's cisco_ios driver to log in,
+    push config sets and run show commands. Config lines are kept per interface, so
+    'show running-config interface X' reflects what was configured.
+    """
+
+    def __init__(self, hostname=DEFAULT_HOSTNAME):
+        self.hostname = hostname
+        self.mode = "exec"          # exec, config or config-if
+        self.interface = None
+        self.interfaces = {}        # interface name -> config lines
+        self.global_config = []
+
+    @property
+    def prompt(self):
+        if self.mode == "exec":
+            return f"{self.hostname}#"
+        return f"{self.hostname}({self.mode})#"
+
+    def execute(self, line):
+        """
+        Runs one command line.
+        Args:
+            line (str): The command, without the line ending.
+        Returns:
+            tuple: (output text, False) or (None, True) when the session should end.
+        """
+        command = line.strip()
+        if not command:
+            return "", False
+        words = command.split()
+        if self.mode == "exec":
+            return self._exec(command, words)
+        if command == "end":
+            self.mode, self.interface = "exec", None
+        elif command == "exit":
+            self.mode, self.interface = ("config", None) if self.mode == "config-if" else ("exec", None)
+        elif words[0] == "interface" and len(words) > 1:
+            self.mode, self.interface = "config-if", " ".join(words[1:])
+            self.interfaces.setdefault(self.interface, [])
+        elif self.mode == "config-if":
+            self.interfaces[self.interface].append(f" {command}")
+        else:
+            self.global_config.append(command)
+        return "", False
+
+    def _exec(self, command, words):
+        if words[0] in ("exit", "quit", "logout"):
+            return None, True
+        if words[0] == "terminal":
+            return "", False
+        if command in ("configure terminal", "conf t"):
+            self.mode = "config"
+            return "Enter configuration commands, one per line.  End with CNTL/Z.", False
+        if words[:2] == ["show", "running-config"] or words[:2] == ["show", "run"]:
+            if len(words) > 3 and words[2] == "interface":
+                name = " ".join(words[3:])
+                if name not in self.interfaces:
+                    return INVALID_INPUT, False
+                return "\n".join(["Building configuration...", "", f"interface {name}",
+                                  *self.interfaces[name], "end"]), False
+            lines = [f"hostname {self.hostname}", "!", *self.global_config, "!"]
+            for name, config in self.interfaces.items():
+                lines += [f"interface {name}", *config, "!"]
+            return "\n".join(["Building configuration...", "", *lines, "end"]), False
+        if words[:2] == ["show", "version"]:
+            return f"Cisco IOS Software, stub SSH server\n{self.hostname} uptime is 1 minute", False
+        return INVALID_INPUT, False
+
+
+class _StubServerInterface(paramiko.ServerInterface):
+    def __init__(self, server):
+        self.server = server
+        self.shell = threading.Event()
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_auth_password(self, username, password):
+        if self.server.login_delay:
+            time.sleep(self.server.login_delay)  # Stands in for the device's slow login
+        if (username, password) == (self.server.username, self.server.password):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        self.shell.set()
+        return True
+
+
+class StubSshServer:
+    """
+    Local paramiko SSH server that emulates a Cisco IOS device (see StubCli), for testing and
+    benchmarking SSH session handling (e.g. SessionPool) without real devices.
+    Counts logins, so tests can check how many sessions were actually opened.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, username="admin", password="password",
+                 hostname=DEFAULT_HOSTNAME, login_delay=0.0, host_key=None):
+        """
+        Args:
+            host (str): Address to listen on.
+            port (int): Port to listen on (0 picks a free port; see the port attribute).
+            username (str): Accepted username.
+            password (str): Accepted password.
+            hostname (str): Hostname shown in the prompt.
+            login_delay (float): Seconds each password check takes, to simulate a slow device login.
+            host_key (paramiko.PKey): Server host key (default: a new RSA key).
+        """
+        self.username = username
+        self.password = password
+        self.hostname = hostname
+        self.login_delay = login_delay
+        self.host_key = host_key or paramiko.RSAKey.generate(2048)
+        self.logins = 0
+        self.commands = []
+        self._lock = threading.Lock()
+        self._transports = set()
+        self._socket = socket.create_server((host, port))
+        self._socket.settimeout(0.5)
+        self.host, self.port = self._socket.getsockname()[:2]
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._accept_loop, daemon=True)
+
+    def start(self):
+        """Starts accepting connections in a background thread."""
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops listening and closes every open session."""
+        self._closed.set()
+        self._thread.join()
+        self._socket.close()
+        with self._lock:
+            transports = list(self._transports)
+        for transport in transports:
+            transport.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def device(self, device_type="cisco_ios"):
+        """Returns Netmiko ConnectHandler arguments for this server."""
+        return {"device_type": device_type, "host": self.host, "port": self.port,
+                "username": self.username, "password": self.password}
+
+    def _accept_loop(self):
+        while not self._closed.is_set():
+            try:
+                client, _ = self._socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    def _serve(self, client):
+        transport = paramiko.Transport(client)
+        transport.add_server_key(self.host_key)
+        interface = _StubServerInterface(self)
+        with self._lock:
+            self._transports.add(transport)
+        try:
+            transport.start_server(server=interface)
+            channel = transport.accept(timeout=10)
+            if channel is None or not interface.shell.wait(10):
+                return
+            with self._lock:
+                self.logins += 1
+            self._shell(channel)
+        except (paramiko.SSHException, EOFError, OSError):
+            pass
+        finally:
+            with self._lock:
+                self._transports.discard(transport)
+            transport.close()
+
+    def _shell(self, channel):
+        cli = StubCli(self.hostname)
+        channel.sendall(f"\r\n{cli.prompt}")
+        line, previous = "", ""
+        while not self._closed.is_set():
+            data = channel.recv(4096)
+            if not data:
+                break
+            for char in data.decode("utf-8", "replace"):
+                char, previous = (None if char == "\n" and previous == "\r" else char), char
+                if char is None or char == "\x00":
+                    continue  # Second half of CR LF, or Netmiko's keepalive
+                if char not in "\r\n":
+                    line += char
+                    channel.sendall(char)  # Echo, like a terminal
+                    continue
+                with self._lock:
+                    self.commands.append(line)
+                output, done = cli.execute(line)
+                if done:
+                    channel.close()
+                    return
+                channel.sendall("\r\n" + (output.replace("\n", "\r\n") + "\r\n" if output else "") + cli.prompt)
+                line = ""
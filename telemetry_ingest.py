@@ -0,0 +1,375 @@
+import array
+import collections
+import functools
+import random
+import string
+import time
+import numpy as np
+
+# Unit -> (canonical unit, factor to the canonical unit). Case matters where it does on the wire:
+# 'Mb/s' is megabits and 'MB/s' megabytes; the '...bps' spellings are always bits.
+UNITS = {
+    "": ("", 1.0),
+    "%": ("%", 1.0),
+    "ns": ("ms", 1e-6), "us": ("ms", 1e-3), "µs": ("ms", 1e-3), "ms": ("ms", 1.0),
+    "s": ("ms", 1e3), "sec": ("ms", 1e3), "min": ("ms", 60e3),
+    "bps": ("Mbps", 1e-6), "kbps": ("Mbps", 1e-3), "mbps": ("Mbps", 1.0), "gbps": ("Mbps", 1e3), "tbps": ("Mbps", 1e6),
+    "b/s": ("Mbps", 1e-6), "Kb/s": ("Mbps", 1e-3), "kb/s": ("Mbps", 1e-3), "Mb/s": ("Mbps", 1.0),
+    "Gb/s": ("Mbps", 1e3), "Tb/s": ("Mbps", 1e6),
+    "B/s": ("Mbps", 8e-6), "KB/s": ("Mbps", 8e-3), "kB/s": ("Mbps", 8e-3), "MB/s": ("Mbps", 8.0),
+    "GB/s": ("Mbps", 8e3), "TB/s": ("Mbps", 8e6),
+    "Bps": ("Mbps", 8e-6), "KBps": ("Mbps", 8e-3), "kBps": ("Mbps", 8e-3), "MBps": ("Mbps", 8.0),
+    "GBps": ("Mbps", 8e3), "TBps": ("Mbps", 8e6),
+    "B": ("B", 1.0), "KB": ("B", 1e3), "kB": ("B", 1e3), "MB": ("B", 1e6), "GB": ("B", 1e9), "TB": ("B", 1e12),
+    "KiB": ("B", 1024.0), "MiB": ("B", 1024.0 ** 2), "GiB": ("B", 1024.0 ** 3), "TiB": ("B", 1024.0 ** 4),
+    "pps": ("pps", 1.0), "kpps": ("pps", 1e3), "mpps": ("pps", 1e6),
+    "dBm": ("dBm", 1.0), "dbm": ("dBm", 1.0), "c": ("C", 1.0), "°c": ("C", 1.0),
+}
+
+# Characters a unit may contain; what precedes them in an entry's value is the number
+UNIT_CHARS = string.ascii_letters + "%/µ°"
+
+# Rows of a batch, once converted to NumPy; device and metric are ids into the ingestor's name tables
+TELEMETRY_DTYPE = np.dtype([
+    ("timestamp", "f8"),
+    ("device", "u4"),
+    ("metric", "u4"),
+    ("value", "f8"),
+])
+
+AGGREGATE_DTYPE = np.dtype([
+    ("window", "f8"),
+    ("device", "u4"),
+    ("metric", "u4"),
+    ("count", "u4"),
+    ("min", "f8"),
+    ("max", "f8"),
+    ("mean", "f8"),
+    ("p99", "f8"),
+])
+
+DEFAULT_BATCH_SIZE = 65_536
+
+
+@functools.lru_cache(maxsize=256)
+def unit_conversion(unit):
+    """
+    Looks up how to normalize a unit, trying the exact spelling first and then the lowercase one.
+    Rates with a capital 'B' (bytes) are only matched exactly, as lowercasing would read them as bits.
+    Args:
+        unit (str): Unit as written, e.g. 'ms', 'Gbps', 'MB/s'.
+    Returns:
+        tuple: (canonical unit, factor); value * factor is in the canonical unit.
+    Raises:
+        ValueError: If the unit is unknown.
+    """
+    conversion = UNITS.get(unit)
+    if conversion is None:
+        conversion = UNITS.get(unit.lower())
+        if conversion is not None and "B" in unit and conversion[0] == "Mbps":
+            conversion = None  # e.g. 'MBPS': bytes or bits is ambiguous
+    if conversion is None:
+        raise ValueError(f"Unknown unit {unit!r}")
+    return conversion
+
+
+@functools.lru_cache(maxsize=1024)
+def metric_name(name):
+    """Normalizes a metric name, e.g. 'Packet Loss' -> 'packet_loss'."""
+    return "_".join(name.lower().split())
+
+
+@functools.lru_cache(maxsize=4096)
+def _entry_conversion(name, unit):
+    # Entries repeat the same few metric/unit pairs, so both lookups are cached together
+    return (metric_name(name),) + unit_conversion(unit)
+
+
+def parse_entry(entry):
+    """
+    Parses a free-text telemetry entry such as 'Latency: 50ms' or 'Throughput = 1.5 Gbps'.
+    Args:
+        entry (str): Entry text.
+    Returns:
+        tuple: (metric, value, unit) with the metric name and value normalized to the canonical unit.
+    Raises:
+        ValueError: If the entry cannot be parsed or its unit is unknown.
+    """
+    name, separator, text = entry.partition(":")
+    if not separator:
+        name, separator, text = entry.partition("=")
+    text = text.strip()
+    number = text.rstrip(UNIT_CHARS).rstrip()
+    name = name.strip()
+    if not separator or not name or not number:
+        raise ValueError(f"Unparseable telemetry entry {entry!r}")
+    try:
+        value = float(number)
+    except ValueError:
+        raise ValueError(f"Unparseable telemetry entry {entry!r}") from None
+    metric, unit, factor = _entry_conversion(name, text[len(number):].lstrip())
+    return metric, value * factor, unit
+
+
+class TelemetryBatch:
+    """
+    Column-oriented batch of samples backed by array.array buffers, so appending costs no per-row
+    objects and the columns convert to NumPy without copying element by element.
+    """
+
+    def __init__(self):
+        self.timestamps = array.array("d")
+        self.devices = array.array("I")
+        self.metrics = array.array("I")
+        self.values = array.array("d")
+
+    def __len__(self):
+        return len(self.values)
+
+    def append(self, timestamp, device, metric, value):
+        self.timestamps.append(timestamp)
+        self.devices.append(device)
+        self.metrics.append(metric)
+        self.values.append(value)
+
+    def to_array(self):
+        """Returns the batch as a TELEMETRY_DTYPE structured array."""
+        records = np.empty(len(self), dtype=TELEMETRY_DTYPE)
+        records["timestamp"] = np.frombuffer(self.timestamps, dtype="f8")
+        records["device"] = np.frombuffer(self.devices, dtype=np.uintc)
+        records["metric"] = np.frombuffer(self.metrics, dtype=np.uintc)
+        records["value"] = np.frombuffer(self.values, dtype="f8")
+        return records
+
+
+class TelemetryIngestor:
+    """
+    Parses telemetry once, at ingest, into typed columns: metric and device names are interned to ids,
+    values are converted to each metric's canonical unit, and samples accumulate in array-backed
+    batches that are sealed into NumPy arrays as they fill. Window aggregates are computed over the
+    retained batches with vectorized NumPy operations. Not thread-safe.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, max_batches=None, on_batch=None):
+        """
+        Args:
+            batch_size (int): Samples per batch.
+            max_batches (int): Sealed batches kept for aggregation, oldest dropped first (None keeps all).
+            on_batch (callable): Called with each sealed batch (a TELEMETRY_DTYPE array), e.g. to persist it.
+        """
+        self.batch_size = batch_size
+        self.on_batch = on_batch
+        self.batches = collections.deque(maxlen=max_batches)
+        self.devices = []      # id -> device name
+        self.metrics = []      # id -> metric name
+        self.units = []        # metric id -> canonical unit
+        self.rejected = 0
+        self._device_ids = {}
+        self._metric_ids = {}
+        self._batch = TelemetryBatch()
+
+    def _device_id(self, device):
+        device_id = self._device_ids.get(device)
+        if device_id is None:
+            device_id = self._device_ids[device] = len(self.devices)
+            self.devices.append(device)
+        return device_id
+
+    def _metric_id(self, metric, unit):
+        metric_id = self._metric_ids.get(metric)
+        if metric_id is None:
+            metric_id = self._metric_ids[metric] = len(self.metrics)
+            self.metrics.append(metric)
+            self.units.append(unit)
+        elif self.units[metric_id] != unit:
+            raise ValueError(f"Metric {metric!r} is in {self.units[metric_id]!r}, not {unit!r}")
+        return metric_id
+
+    def add(self, metric, value, unit="", device="localhost", timestamp=None):
+        """
+        Ingests one already-split sample.
+        Args:
+            metric (str): Metric name.
+            value (float): Value in `unit`.
+            unit (str): Unit of the value (see UNITS).
+            device (str): Device the sample came from.
+            timestamp (float): Seconds since the epoch (default: now).
+        Returns:
+            tuple: (metric, value, unit) as stored, normalized.
+        """
+        canonical, factor = unit_conversion(unit)
+        metric = metric_name(metric)
+        value = float(value) * factor
+        self._append(metric, value, canonical, device, timestamp)
+        return metric, value, canonical
+
+    def ingest(self, entry, device="localhost", timestamp=None):
+        """
+        Parses and ingests one free-text entry, e.g. 'Latency: 50ms'.
+        Returns:
+            tuple: (metric, value, unit) as stored, or None if the entry was rejected (counted in `rejected`).
+        """
+        try:
+            parsed = parse_entry(entry)
+            self._append(*parsed, device, timestamp)
+        except ValueError:
+            self.rejected += 1
+            return None
+        return parsed
+
+    def _append(self, metric, value, unit, device, timestamp):
+        metric_id = self._metric_ids.get(metric)
+        if metric_id is None or self.units[metric_id] != unit:
+            metric_id = self._metric_id(metric, unit)
+        device_id = self._device_ids.get(device)
+        if device_id is None:
+            device_id = self._device_id(device)
+        batch = self._batch
+        batch.append(time.time() if timestamp is None else timestamp, device_id, metric_id, value)
+        if len(batch.values) >= self.batch_size:
+            self.seal()
+
+    def seal(self):
+        """Seals the batch being filled (if not empty) into `batches` and hands it to on_batch."""
+        if not len(self._batch):
+            return
+        records = self._batch.to_array()
+        self._batch = TelemetryBatch()
+        self.batches.append(records)
+        if self.on_batch is not None:
+            self.on_batch(records)
+
+    def records(self):
+        """Returns every retained sample, including the batch being filled, as one TELEMETRY_DTYPE array."""
+        parts = list(self.batches)
+        if len(self._batch):
+            parts.append(self._batch.to_array())
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=TELEMETRY_DTYPE)
+
+    def aggregate(self, window=60.0, start=None, end=None):
+        """
+        Computes count/min/max/mean/p99 per time window, device and metric.
+        Args:
+            window (float): Window length in seconds; windows are aligned to multiples of it.
+            start (float): Only samples with timestamp >= start.
+            end (float): Only samples with timestamp < end.
+        Returns:
+            numpy.ndarray: AGGREGATE_DTYPE records sorted by window, device and metric.
+        """
+        return aggregate_windows(self.records(), window, start, end)
+
+    def aggregate_rows(self, window=60.0, start=None, end=None):
+        """Like aggregate, but returns dicts with device and metric names and the unit, for reports."""
+        return [dict(zip(AGGREGATE_DTYPE.names, row), device=self.devices[row[1]], metric=self.metrics[row[2]],
+                     unit=self.units[row[2]])
+                for row in self.aggregate(window, start, end).tolist()]
+
+
+def aggregate_windows(records, window=60.0, start=None, end=None):
+    """
+    Computes count/min/max/mean/p99 per time window, device and metric without a Python loop:
+    samples are put in (window, device, metric, value) order, so each group is a contiguous run
+    whose first and last values are its min and max and whose p99 is read at a computed offset.
+    Args:
+        records (numpy.ndarray): TELEMETRY_DTYPE records.
+        window (float): Window length in seconds.
+        start (float): Only samples with timestamp >= start.
+        end (float): Only samples with timestamp < end.
+    Returns:
+        numpy.ndarray: AGGREGATE_DTYPE records (p99 by nearest rank).
+    """
+    if start is not None or end is not None:
+        timestamps = records["timestamp"]
+        keep = np.ones(len(records), dtype=bool)
+        if start is not None:
+            keep &= timestamps >= start
+        if end is not None:
+            keep &= timestamps < end
+        records = records[keep]
+    if not len(records):
+        return np.zeros(0, dtype=AGGREGATE_DTYPE)
+
+    # One integer key per (window, device, metric), extended with each value's rank so that a single
+    # integer sort leaves every group contiguous and in value order
+    windows = np.floor(records["timestamp"] / window).astype(np.int64)
+    devices = records["device"].astype(np.int64)
+    metrics = records["metric"].astype(np.int64)
+    device_count, metric_count = int(devices.max()) + 1, int(metrics.max()) + 1
+    keys = ((windows - windows.min()) * device_count + devices) * metric_count + metrics
+    size = len(records)
+    if int(keys.max()) < np.iinfo(np.int64).max // size:
+        ranks = np.empty(size, dtype=np.int64)
+        ranks[np.argsort(records["value"])] = np.arange(size)
+        order = np.argsort(keys * size + ranks)
+    else:
+        order = np.lexsort((records["value"], keys))
+    keys = keys[order]
+    values = records["value"][order]
+
+    boundary = np.empty(len(values), dtype=bool)
+    boundary[0] = True
+    np.not_equal(keys[1:], keys[:-1], out=boundary[1:])
+    starts = np.flatnonzero(boundary)
+    counts = np.diff(np.append(starts, len(values)))
+    first = order[starts]
+
+    result = np.empty(len(starts), dtype=AGGREGATE_DTYPE)
+    result["window"] = windows[first] * window
+    result["device"] = records["device"][first]
+    result["metric"] = records["metric"][first]
+    result["count"] = counts
+    result["min"] = values[starts]
+    result["max"] = values[starts + counts - 1]
+    result["mean"] = np.add.reduceat(values, starts) / counts
+    result["p99"] = values[starts + np.ceil(counts * 0.99).astype(np.int64) - 1]
+    return result
+
+
+def benchmark_ingest(sample_count=500_000, devices=50, window=60.0, seed=1):
+    """
+    Compares storing telemetry as text (as the logger did), re-parsing and aggregating it with Python
+    loops, with typed ingest into TelemetryIngestor and vectorized window aggregates.
+    Args:
+        sample_count (int): Samples ingested.
+        devices (int): Simulated devices.
+        window (float): Aggregation window in seconds.
+        seed (int): Random seed.
+    """
+    rng = random.Random(seed)
+    start = float(int(time.time()) - 3600)
+    kinds = [("Latency", "ms", 5, 80), ("Throughput", "Gbps", 0.1, 10), ("Packet Loss", "%", 0, 2),
+             ("Jitter", "us", 100, 5000)]
+    samples = []
+    for index in range(sample_count):
+        name, unit, low, high = kinds[index % len(kinds)]
+        samples.append((start + index * 3600 / sample_count, f"switch-{index % devices:03d}",
+                        f"{name}: {rng.uniform(low, high):.3f}{unit}"))
+
+    # Text: each consumer re-parses the entries and groups them in Python
+    begin = time.perf_counter()
+    groups = collections.defaultdict(list)
+    for timestamp, device, entry in samples:
+        metric, value, _ = parse_entry(entry)
+        groups[(timestamp // window * window, device, metric)].append(value)
+    text_rows = []
+    for key, values in groups.items():
+        values.sort()
+        text_rows.append((key, len(values), values[0], values[-1], sum(values) / len(values),
+                          values[-(-len(values) * 99 // 100) - 1]))
+    text_seconds = time.perf_counter() - begin
+
+    ingestor = TelemetryIngestor()
+    begin = time.perf_counter()
+    for timestamp, device, entry in samples:
+        ingestor.ingest(entry, device, timestamp)
+    ingest_seconds = time.perf_counter() - begin
+    begin = time.perf_counter()
+    result = ingestor.aggregate(window)
+    aggregate_seconds = time.perf_counter() - begin
+
+    print(f"[+] {sample_count} samples from {devices} devices, {len(result)} window aggregates")
+    print(f"[+] Text, re-parsed and aggregated in Python: {text_seconds:.2f}s per consumer")
+    print(f"[+] Typed ingest: {ingest_seconds:.2f}s once ({sample_count / ingest_seconds:,.0f} samples/s), "
+          f"then {aggregate_seconds * 1000:.1f} ms per aggregation ({text_seconds / aggregate_seconds:.0f}x)")
+    if len(text_rows) != len(result):
+        print(f"[-] Result mismatch: Python aggregation returned {len(text_rows)} groups")
@@ -0,0 +1,30 @@
+import os
+import threading
+
+from config_store import ConfigStore, StubDevice
+
+
+def test_concurrent_saves_of_identical_configs(tmp_path):
+    # Freshly provisioned switches share one config, and backup workers save them at the same time
+    text = StubDevice("sw-template", seed=1).send_command("show running-config")
+    for trial in range(50):
+        store = ConfigStore(os.path.join(tmp_path, f"backups-{trial}.db"))
+        barrier = threading.Barrier(4)
+        errors = []
+
+        def save(device_id):
+            barrier.wait()
+            try:
+                store.save(device_id, text)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=save, args=(device_id,)) for device_id in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert store._connection().execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 1
+        assert all(store.config_at(device_id) == store.get(store.latest_hash(0)) for device_id in range(4))
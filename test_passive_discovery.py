@@ -0,0 +1,75 @@
+import struct
+
+import passive_discovery
+from passive_discovery import DeviceTable, discover_from_pcap
+from pcap_reader import LINKTYPE_ETHERNET
+
+SENDER = b"\x02\x00\x00\x00\x00\x01"
+
+
+def write_pcap(path, frames):
+    with open(path, "wb") as f:
+        f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, LINKTYPE_ETHERNET))
+        for index, frame in enumerate(frames):
+            f.write(struct.pack("<IIII", 1700000000 + index, 0, len(frame), len(frame)))
+            f.write(frame)
+
+
+def tlv(tlv_type, value):
+    return struct.pack("!H", tlv_type << 9 | len(value)) + value
+
+
+def lldp_frame(description):
+    return (b"\x01\x80\xc2\x00\x00\x0e" + SENDER + b"\x88\xcc"
+            + tlv(1, b"\x04" + SENDER) + tlv(2, b"\x05Gi0/1") + tlv(3, b"\x00\x78")
+            + tlv(5, b"core-sw1") + tlv(6, description) + tlv(0, b""))
+
+
+def dhcp_request_frame(options):
+    bootp = struct.pack("!BBBB", 1, 1, 6, 0) + b"\x00" * 24 + b"\x02\x00\x00\x00\x00\x02" + b"\x00" * 202
+    payload = bootp + b"\x63\x82\x53\x63" + options + b"\xff"
+    udp = struct.pack("!HHHH", 68, 67, 8 + len(payload), 0) + payload
+    ip = struct.pack("!BBHHHBBH4s4s", 0x45, 0, 20 + len(udp), 0, 0, 64, 17, 0,
+                     b"\x00\x00\x00\x00", b"\xff\xff\xff\xff") + udp
+    return b"\xff" * 6 + b"\x02\x00\x00\x00\x00\x02" + b"\x08\x00" + ip
+
+
+def arp_frame(ip):
+    return (b"\xff" * 6 + b"\x02\x00\x00\x00\x00\x03" + b"\x08\x06" + b"\x00\x01\x08\x00\x06\x04\x00\x01"
+            + b"\x02\x00\x00\x00\x00\x03" + bytes(ip) + b"\x00" * 6 + bytes([10, 0, 0, 1]))
+
+
+def test_lldp_with_empty_system_description(tmp_path):
+    path = tmp_path / "lldp.pcap"
+    write_pcap(path, [lldp_frame(b""), arp_frame([10, 0, 0, 3])])
+    table = discover_from_pcap(str(path))
+    device = table.devices["02:00:00:00:00:01"]
+    assert device["hostname"] == "core-sw1"
+    assert device["vendor"] is None
+    assert "02:00:00:00:00:03" in table.devices
+    assert table.malformed == 0
+
+
+def test_dhcp_with_empty_message_type(tmp_path):
+    path = tmp_path / "dhcp.pcap"
+    write_pcap(path, [dhcp_request_frame(b"\x35\x00" + b"\x0c\x06laptop"), arp_frame([10, 0, 0, 3])])
+    table = discover_from_pcap(str(path))
+    assert table.devices["02:00:00:00:00:02"]["hostname"] == "laptop"
+    assert "02:00:00:00:00:03" in table.devices
+
+
+def test_malformed_frame_is_skipped(tmp_path, monkeypatch):
+    parse_frame = passive_discovery.parse_frame
+
+    def parse_or_fail(buf, offset, length, linktype):
+        if buf[offset + 12:offset + 14] == b"\x88\xcc":
+            raise IndexError("parser bug")
+        return parse_frame(buf, offset, length, linktype)
+
+    monkeypatch.setattr(passive_discovery, "parse_frame", parse_or_fail)
+    path = tmp_path / "mixed.pcap"
+    write_pcap(path, [lldp_frame(b"IOS"), arp_frame([10, 0, 0, 3])])
+    table = discover_from_pcap(str(path), DeviceTable())
+    assert table.frames == 2
+    assert table.malformed == 1
+    assert list(table.devices) == ["02:00:00:00:00:03"]
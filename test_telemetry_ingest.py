@@ -0,0 +1,37 @@
+import pytest
+
+from telemetry_ingest import UNITS, parse_entry, unit_conversion
+
+
+@pytest.mark.parametrize("unit", sorted(UNITS))
+def test_every_unit_spelling(unit):
+    canonical, factor = UNITS[unit]
+    for entry in (f"Metric: 5{unit}", f"Metric = 5 {unit}"):
+        metric, value, parsed_unit = parse_entry(entry)
+        assert (metric, parsed_unit) == ("metric", canonical)
+        assert value == pytest.approx(5 * factor)
+
+
+@pytest.mark.parametrize("entry, expected", [
+    ("Signal: -70 dBm", ("signal", -70.0, "dBm")),
+    ("Signal: -70 DBM", ("signal", -70.0, "dBm")),
+    ("Rate: 5MBps", ("rate", 40.0, "Mbps")),
+    ("Rate: 5Mbps", ("rate", 5.0, "Mbps")),
+    ("Rate: 5MBPs", None),
+    ("Rate: 5MBPS", None),
+    ("Throughput: 1GBPS", None),
+    ("Latency: 50MS", ("latency", 50.0, "ms")),
+])
+def test_case_folding(entry, expected):
+    if expected is None:
+        with pytest.raises(ValueError):
+            parse_entry(entry)
+    else:
+        metric, value, unit = parse_entry(entry)
+        assert (metric, unit) == expected[::2]
+        assert value == pytest.approx(expected[1])
+
+
+def test_unknown_unit():
+    with pytest.raises(ValueError):
+        unit_conversion("furlongs")
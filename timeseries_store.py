@@ -0,0 +1,345 @@
+import datetime
+import math
+import mmap
+import os
+import re
+import tempfile
+import time
+import numpy as np
+
+# Raw samples: one fixed-width record per measurement; latency is NaN when no probe succeeded
+SAMPLE_DTYPE = np.dtype([
+    ("timestamp", "f8"),
+    ("upload", "f4"),
+    ("download", "f4"),
+    ("latency", "f4"),
+])
+
+# Rollups: one record per bucket, timestamped with the bucket start
+ROLLUP_DTYPE = np.dtype([
+    ("timestamp", "f8"),
+    ("count", "u4"),
+    ("upload_mean", "f4"),
+    ("upload_max", "f4"),
+    ("download_mean", "f4"),
+    ("download_max", "f4"),
+    ("latency_mean", "f4"),
+    ("latency_max", "f4"),
+    ("latency_count", "u4"),
+])
+
+# Resolution -> (bucket seconds, seconds covered by one segment file)
+RESOLUTIONS = {
+    "raw": (None, 86400),
+    "1m": (60, 30 * 86400),
+    "1h": (3600, 366 * 86400),
+}
+
+SEGMENT_MAGIC = b"TSSEG001"
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("itemsize", "u8"), ("count", "u8")])
+
+
+class Segment:
+    """
+    One time partition of one resolution, stored as a header plus fixed-width records in a
+    memory-mapped file. The file grows by doubling; the record count in the header is bumped
+    after each record is written, so a torn write is never visible to readers.
+    """
+
+    def __init__(self, path, dtype, writable=False, initial_capacity=4096):
+        """
+        Args:
+            path (str): Segment file.
+            dtype (numpy.dtype): Record type.
+            writable (bool): Open for appending (the file is created if missing).
+            initial_capacity (int): Records preallocated when the file is created.
+        """
+        self.path = path
+        self.dtype = dtype
+        self.writable = writable
+        if writable and not os.path.exists(path):
+            with open(path, "wb") as f:
+                header = np.array([(SEGMENT_MAGIC, dtype.itemsize, 0)], dtype=HEADER_DTYPE)
+                f.write(header.tobytes())
+                f.truncate(HEADER_DTYPE.itemsize + initial_capacity * dtype.itemsize)
+        self.file = open(path, "r+b" if writable else "rb")
+        self._map()
+
+    def _map(self):
+        size = os.fstat(self.file.fileno()).st_size
+        self.mm = mmap.mmap(self.file.fileno(), size, access=mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_READ)
+        self._header = np.frombuffer(self.mm, dtype=HEADER_DTYPE, count=1)
+        if self._header["magic"][0] != SEGMENT_MAGIC or self._header["itemsize"][0] != self.dtype.itemsize:
+            self._unmap()
+            raise ValueError(f"{self.path} is not a segment of this record type")
+        self.capacity = (size - HEADER_DTYPE.itemsize) // self.dtype.itemsize
+        self._records = np.frombuffer(self.mm, dtype=self.dtype, count=self.capacity, offset=HEADER_DTYPE.itemsize)
+
+    def _unmap(self):
+        del self._header, self._records  # Views must be released before the map can close
+        self.mm.close()
+
+    @property
+    def count(self):
+        return int(self._header["count"][0])
+
+    def append(self, record):
+        """Appends one record (a tuple in dtype field order)."""
+        count = self.count
+        if count == self.capacity:
+            self._unmap()
+            self.file.truncate(HEADER_DTYPE.itemsize + 2 * self.capacity * self.dtype.itemsize)
+            self._map()
+        self._records[count] = record
+        self._header["count"] = count + 1
+
+    def array(self):
+        """Returns the stored records as a view (valid until the segment grows or closes)."""
+        return self._records[:self.count]
+
+    def close(self):
+        """Unmaps and closes the file."""
+        if self.writable:
+            self.mm.flush()
+        self._unmap()
+        self.file.close()
+
+
+class RollupAccumulator:
+    """Aggregates samples into fixed buckets, handing back each bucket's record once it is complete."""
+
+    def __init__(self, span):
+        """
+        Args:
+            span (int): Bucket length in seconds.
+        """
+        self.span = span
+        self.bucket = None
+
+    def add(self, timestamp, upload, download, latency):
+        """
+        Adds one sample.
+        Returns:
+            tuple: The finished record of the previous bucket, if this sample starts a new one; otherwise None.
+        """
+        bucket = timestamp - timestamp % self.span
+        finished = None
+        if self.bucket is not None and bucket != self.bucket:
+            finished = self.record()
+            self.bucket = None
+        if self.bucket is None:
+            self.bucket = bucket
+            self.count = self.latency_count = 0
+            self.upload_sum = self.download_sum = self.latency_sum = 0.0
+            self.upload_max = self.download_max = self.latency_max = -math.inf
+        self.count += 1
+        self.upload_sum += upload
+        self.download_sum += download
+        self.upload_max = max(self.upload_max, upload)
+        self.download_max = max(self.download_max, download)
+        if not math.isnan(latency):
+            self.latency_count += 1
+            self.latency_sum += latency
+            self.latency_max = max(self.latency_max, latency)
+        return finished
+
+    def record(self):
+        """Returns the current (possibly partial) bucket as a ROLLUP_DTYPE tuple, or None if empty."""
+        if self.bucket is None:
+            return None
+        latency_mean = self.latency_sum / self.latency_count if self.latency_count else math.nan
+        latency_max = self.latency_max if self.latency_count else math.nan
+        return (self.bucket, self.count, self.upload_sum / self.count, self.upload_max,
+                self.download_sum / self.count, self.download_max, latency_mean, latency_max, self.latency_count)
+
+
+class TimeSeriesStore:
+    """
+    Embedded, append-only store for bandwidth/latency samples.
+    Raw samples go to daily segment files; 1 minute and 1 hour rollups are maintained on ingest and
+    go to their own segments. The open rollup buckets are rebuilt from the raw samples on reopen.
+    One writer per store directory; not thread-safe.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Store directory (created if missing).
+        """
+        self.path = path
+        for resolution in RESOLUTIONS:
+            os.makedirs(os.path.join(path, resolution), exist_ok=True)
+        self._writers = {}  # resolution -> (partition start, Segment)
+        self._rollups = {resolution: RollupAccumulator(span)
+                         for resolution, (span, _) in RESOLUTIONS.items() if span is not None}
+        self._recover()
+
+    def _recover(self):
+        for resolution, accumulator in self._rollups.items():
+            partitions = self._partitions(resolution)
+            resume = -math.inf
+            if partitions:
+                segment = Segment(partitions[-1][1], ROLLUP_DTYPE)
+                if segment.count:
+                    resume = float(segment.array()["timestamp"][-1].item()) + accumulator.span
+                segment.close()
+            for sample in self.query(resume, math.inf).tolist():
+                self._add_rollup(resolution, accumulator, sample)
+
+    def _add_rollup(self, resolution, accumulator, sample):
+        finished = accumulator.add(*sample)
+        if finished is not None:
+            self._writer(resolution, finished[0]).append(finished)
+
+    def _partitions(self, resolution):
+        """Returns (partition start, path) for every segment of a resolution, oldest first."""
+        directory = os.path.join(self.path, resolution)
+        partitions = [(int(name[:-4]), os.path.join(directory, name))
+                      for name in os.listdir(directory) if name.endswith(".seg")]
+        return sorted(partitions)
+
+    def _writer(self, resolution, timestamp):
+        partition_seconds = RESOLUTIONS[resolution][1]
+        partition = int(timestamp // partition_seconds * partition_seconds)
+        current = self._writers.get(resolution)
+        if current is None or current[0] != partition:
+            if current is not None:
+                current[1].close()
+            dtype = SAMPLE_DTYPE if resolution == "raw" else ROLLUP_DTYPE
+            path = os.path.join(self.path, resolution, f"{partition}.seg")
+            current = self._writers[resolution] = (partition, Segment(path, dtype, writable=True))
+        return current[1]
+
+    def append(self, timestamp, upload, download, latency=math.nan):
+        """
+        Stores one sample and updates the rollups.
+        Args:
+            timestamp (float): Seconds since the epoch.
+            upload (float): Upload speed in Mbps.
+            download (float): Download speed in Mbps.
+            latency (float): Latency in milliseconds (NaN if unavailable).
+        """
+        if latency is None:
+            latency = math.nan
+        self._writer("raw", timestamp).append((timestamp, upload, download, latency))
+        for resolution, accumulator in self._rollups.items():
+            self._add_rollup(resolution, accumulator, (timestamp, upload, download, latency))
+
+    def query(self, start, end, resolution="raw"):
+        """
+        Returns the records with start <= timestamp < end.
+        Args:
+            start (float): Range start in seconds since the epoch.
+            end (float): Range end in seconds since the epoch.
+            resolution (str): 'raw', '1m' or '1h'; rollups include the bucket still being filled.
+        Returns:
+            numpy.ndarray: Structured array (SAMPLE_DTYPE or ROLLUP_DTYPE), in insertion order.
+        """
+        span, partition_seconds = RESOLUTIONS[resolution]
+        dtype = SAMPLE_DTYPE if resolution == "raw" else ROLLUP_DTYPE
+        current = self._writers.get(resolution)
+        parts = []
+        for partition, path in self._partitions(resolution):
+            if partition >= end or partition + partition_seconds <= start:
+                continue
+            writing = current is not None and current[0] == partition
+            segment = current[1] if writing else Segment(path, dtype)
+            data = segment.array()
+            parts.append(data[(data["timestamp"] >= start) & (data["timestamp"] < end)])  # Boolean indexing copies
+            del data
+            if not writing:
+                segment.close()
+
+        if span is not None:
+            partial = self._rollups[resolution].record()
+            if partial is not None and start <= partial[0] < end:
+                parts.append(np.array([partial], dtype=dtype))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+
+    def close(self):
+        """Closes the open segments. Open rollup buckets are rebuilt from raw samples on reopen."""
+        for _, segment in self._writers.values():
+            segment.close()
+        self._writers.clear()
+
+
+TEXT_LINE = re.compile(r"^(\S+ \S+) \| Upload: ([\d.]+) Mbps \| Download: ([\d.]+) Mbps \| Latency: (?:([\d.]+) ms|N/A)")
+
+
+def parse_text_log(path, start, end):
+    """
+    Reads samples back from the text log written by bandwidth_and _latency.py (the pre-store format).
+    Returns:
+        numpy.ndarray: SAMPLE_DTYPE records with start <= timestamp < end.
+    """
+    rows = []
+    with open(path) as f:
+        for line in f:
+            match = TEXT_LINE.match(line)
+            if not match:
+                continue
+            timestamp = datetime.datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S").timestamp()
+            if start <= timestamp < end:
+                latency = float(match.group(4)) if match.group(4) else math.nan
+                rows.append((timestamp, float(match.group(2)), float(match.group(3)), latency))
+    return np.array(rows, dtype=SAMPLE_DTYPE)
+
+
+def benchmark_against_text_log(samples=100_000, interval=1.0):
+    """
+    Compares ingest and range-query throughput of the store and the per-second text log.
+    Args:
+        samples (int): Samples written (one per interval seconds).
+        interval (float): Seconds between samples.
+    """
+    rng = np.random.default_rng(0)
+    start = float(int(time.time()) - samples * interval)
+    timestamps = start + np.arange(samples) * interval
+    uploads = rng.gamma(2.0, 5.0, samples).round(2)
+    downloads = rng.gamma(2.0, 20.0, samples).round(2)
+    latencies = rng.gamma(2.0, 10.0, samples).round(1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Text log: reopened and appended once per sample, as the monitor loop does
+        log_file = os.path.join(directory, "bandwidth.log")
+        begin = time.perf_counter()
+        for timestamp, upload, download, latency in zip(timestamps.tolist(), uploads.tolist(),
+                                                        downloads.tolist(), latencies.tolist()):
+            line = (f"{datetime.datetime.fromtimestamp(timestamp):%Y-%m-%d %H:%M:%S} | Upload: {upload:.2f} Mbps | "
+                    f"Download: {download:.2f} Mbps | Latency: {latency:.1f} ms")
+            with open(log_file, "a") as f:
+                f.write(line + "\n")
+        text_ingest = samples / (time.perf_counter() - begin)
+
+        store = TimeSeriesStore(os.path.join(directory, "store"))
+        begin = time.perf_counter()
+        for sample in zip(timestamps.tolist(), uploads.tolist(), downloads.tolist(), latencies.tolist()):
+            store.append(*sample)
+        store_ingest = samples / (time.perf_counter() - begin)
+
+        # Query the middle tenth of the range
+        query_start = start + samples * interval * 0.45
+        query_end = start + samples * interval * 0.55
+        begin = time.perf_counter()
+        text_result = parse_text_log(log_file, query_start, query_end)
+        text_query = time.perf_counter() - begin
+        begin = time.perf_counter()
+        store_result = store.query(query_start, query_end)
+        store_query = time.perf_counter() - begin
+        begin = time.perf_counter()
+        rollup_result = store.query(query_start, query_end, "1m")
+        rollup_query = time.perf_counter() - begin
+
+        text_size = os.path.getsize(log_file)
+        store_size = sum(os.path.getsize(path) for resolution in RESOLUTIONS
+                         for _, path in store._partitions(resolution))
+        store.close()
+
+    print(f"[+] Ingest: text log {text_ingest:,.0f} samples/s, store {store_ingest:,.0f} samples/s")
+    print(f"[+] Range query ({len(store_result)} samples): text log {text_query * 1000:.1f} ms, "
+          f"store {store_query * 1000:.2f} ms ({text_query / store_query:.0f}x); "
+          f"1m rollup ({len(rollup_result)} buckets) {rollup_query * 1000:.2f} ms")
+    print(f"[+] Size on disk: text log {text_size / 1e6:.1f} MB, store {store_size / 1e6:.1f} MB "
+          f"(preallocated, including rollups)")
+    if len(text_result) != len(store_result):
+        print(f"[-] Result mismatch: text log returned {len(text_result)} samples")
@@ -1,10 +1,18 @@
 import os
+import json
 import time
-import random
+import hashlib
 import logging
-from threading import Thread
+import functools
+import threading
+from collections import OrderedDict
 
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import (Flask, render_template, request, redirect, url_for, flash, jsonify, session, make_response,
+                   Response)
+
+from backup_jobs import BackupJobService
+from device_repository import DeviceRepository, SORT_COLUMNS
+from config_store import ConfigStore, StubDevice, collect_backup
 
 app = Flask(__name__)
 # Read secret key from environment variable for security
@@ -19,54 +27,205 @@ logging.basicConfig(
     ]
 )
 
-# Mock device data (ideally, stored in database or persistent storage)
-devices = [
+# Device inventory shared by all workers (SQLite in WAL mode)
+repository = DeviceRepository(os.getenv('DEVICE_DB', 'devices.db'))
+
+# Mock device data, loaded into an empty inventory on first start
+seed_devices = [
     {"id": 1, "name": "Router-GJ3NFB", "ip_address": "192.168.1.1", "status": "up", "last_backup": None},
     {"id": 2, "name": "Switch-1", "status": "up", "last_backup": None},
     {"id": 3, "name": "Firewall-1", "status": "down", "last_backup": None}
 ]
+repository.seed(seed_devices)
+
+# Deduplicated, delta-compressed running-config history
+config_store = ConfigStore(os.getenv('CONFIG_BACKUP_DB', 'config_backups.db'))
+
+
+def backup_session_factory():
+    """
+    Session factory used to pull configs, chosen by BACKUP_CONNECT:
+    'netmiko' connects to the devices with BACKUP_DEVICE_TYPE (default cisco_ios), BACKUP_USERNAME and
+    BACKUP_PASSWORD; 'stub' generates fake configs (demos only). Unset means backups are disabled (None).
+    """
+    mode = os.getenv('BACKUP_CONNECT', '').strip().lower()
+    if not mode:
+        return None
+    if mode == 'stub':
+        logging.warning("Config backups use generated stub configs (BACKUP_CONNECT=stub), not real devices")
+        return StubDevice
+    if mode != 'netmiko':
+        raise ValueError(f"Unknown BACKUP_CONNECT {mode!r} (expected 'netmiko' or 'stub')")
+    username, password = os.getenv('BACKUP_USERNAME'), os.getenv('BACKUP_PASSWORD')
+    if not username or not password:
+        raise ValueError("BACKUP_CONNECT=netmiko needs BACKUP_USERNAME and BACKUP_PASSWORD")
+    from netmiko import ConnectHandler
+    return functools.partial(ConnectHandler, device_type=os.getenv('BACKUP_DEVICE_TYPE', 'cisco_ios'),
+                             username=username, password=password)
+
+
+connect_device = backup_session_factory()
+if connect_device is None:
+    logging.warning("Config backups are disabled; set BACKUP_CONNECT to enable them")
+
+# Rendered dashboard pages keyed by ETag (per worker process)
+PAGE_CACHE_SIZE = 256
+PER_PAGE_LIMIT = 500
+page_cache = OrderedDict()
+page_cache_lock = threading.Lock()
 
 
 def perform_backup(device):
-    """Simulate backup process (replace with actual backup logic)"""
+    """Pull the device's running-config into the config store (unchanged configs store nothing)"""
+    if connect_device is None:
+        logging.error(f"Backup skipped for device {device['name']}: backups are not configured (BACKUP_CONNECT)")
+        return False
     try:
         logging.info(f"Starting backup for device: {device['name']}")
-        # Simulate backup time
-        time.sleep(random.uniform(1, 3))
-        device["last_backup"] = time.strftime("%Y-%m-%d %H:%M:%S")
-        logging.info(f"Backup completed for device: {device['name']}")
+        device_args = {"id": device["id"], "host": device.get("ip_address") or device["name"]}
+        digest, changed = collect_backup(config_store, device_args, connect_device)
+        repository.mark_backed_up(device["id"], time.strftime("%Y-%m-%d %H:%M:%S"))
+        logging.info(f"Backup completed for device: {device['name']} "
+                     f"({'changed' if changed else 'unchanged'}, {digest[:12]})")
         return True
     except Exception as e:
         logging.error(f"Backup failed for device {device['name']}: {str(e)}")
         return False
 
 
-def backup_all_devices():
-    """Backup all devices in background"""
-    logging.info("Backup thread started")
-    for device in devices:
-        success = perform_backup(device)
-        if success:
-            logging.info(f"Successfully backed up {device['name']}")
-        else:
-            logging.error(f"Failed to backup {device['name']}")
-    logging.info("Backup thread finished")
+# Bounded worker pool per process; size it to what the devices/backup server can take. Jobs and the devices
+# being backed up are kept in the shared database, so every gunicorn worker sees the same jobs and
+# a second click on another worker does not start an overlapping backup
+backup_service = BackupJobService(perform_backup, repository.path, workers=int(os.getenv('BACKUP_WORKERS', '8')),
+                                  max_queue=int(os.getenv('BACKUP_QUEUE_SIZE', '100000')))
+
+
+def dashboard_query():
+    """Reads and validates the pagination, filter and sort parameters of the dashboard"""
+    args = request.args
+    sort = args.get('sort', 'name')
+    return {
+        "page": max(args.get('page', 1, type=int) or 1, 1),
+        "per_page": min(max(args.get('per_page', 50, type=int) or 50, 1), PER_PAGE_LIMIT),
+        "status": args.get('status') or None,
+        "search": args.get('q', '').strip() or None,
+        "sort": sort if sort in SORT_COLUMNS else 'name',
+        "descending": args.get('order') == 'desc',
+    }
 
 
 @app.route('/')
 def dashboard():
-    return render_template('dashboard.html', devices=devices)
+    query = dashboard_query()
+    latest_job = backup_service.latest()
+
+    # The page only changes when the inventory, the query or the latest job's progress does
+    flashes = bool(session.get('_flashes'))
+    job_key = (latest_job["id"], latest_job["finished"], sorted(latest_job["progress"].items())) if latest_job else None
+    etag = hashlib.sha1(json.dumps([repository.version(), query, job_key]).encode()).hexdigest()
+    if not flashes:
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+        with page_cache_lock:
+            html = page_cache.get(etag)
+            if html is not None:
+                page_cache.move_to_end(etag)
+    else:
+        html = None
+
+    if html is None:
+        rows, total = repository.page(**query)
+        pages = max((total + query["per_page"] - 1) // query["per_page"], 1)
+        html = render_template('dashboard.html', devices=rows, total=total, pages=pages, query=query,
+                               statuses=repository.statuses(), latest_job=latest_job)
+        if not flashes:  # Flash messages are shown once, so those pages are never reused
+            with page_cache_lock:
+                page_cache[etag] = html
+                if len(page_cache) > PAGE_CACHE_SIZE:
+                    page_cache.popitem(last=False)
+
+    response = make_response(html)
+    if not flashes:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'  # Cache, but revalidate with If-None-Match
+    return response
 
 
 @app.route('/backup', methods=['POST'])
 def backup_devices():
-    # Trigger backup in background thread to avoid blocking web request
-    backup_thread = Thread(target=backup_all_devices, daemon=True)
-    backup_thread.start()
-    flash("Backup initiated for all devices...", "info")
+    # Queue the backup on the worker pool to avoid blocking the web request;
+    # devices already being backed up by an earlier job are not queued again
+    if connect_device is None:
+        flash("Backups are not configured: set BACKUP_CONNECT (and device credentials) first", "danger")
+        return redirect(url_for('dashboard'))
+    job_id = backup_service.submit(repository.all())
+    progress = backup_service.status(job_id, include_devices=False)["progress"]
+    message = f"Backup job {job_id} queued for {progress.get('queued', 0) + progress.get('running', 0)} devices"
+    if progress.get("skipped"):
+        message += f" ({progress['skipped']} already in progress)"
+    if progress.get("rejected"):
+        message += f" ({progress['rejected']} rejected, queue full)"
+    flash(message, "info")
     return redirect(url_for('dashboard'))
 
 
+@app.route('/backup/jobs')
+def backup_jobs():
+    """JSON progress of all tracked backup jobs, newest first (per-device details are under /backup/jobs/<id>)"""
+    return jsonify(backup_service.jobs())
+
+
+@app.route('/backup/jobs/<job_id>')
+def backup_job_status(job_id):
+    """JSON status of one backup job with per-device progress and timings"""
+    status = backup_service.status(job_id)
+    if status is None:
+        return jsonify({"error": f"Unknown job {job_id}"}), 404
+    return jsonify(status)
+
+
+def parse_time(value):
+    """Parses a query-string time: epoch seconds or 'YYYY-MM-DD HH:MM:SS' (None if absent)"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return time.mktime(time.strptime(value, "%Y-%m-%d %H:%M:%S"))
+
+
+@app.route('/devices/<int:device_id>/config')
+def device_config(device_id):
+    """Backed-up config of a device as of ?at= (default: the latest)"""
+    try:
+        config = config_store.config_at(device_id, parse_time(request.args.get('at')))
+    except ValueError:
+        return jsonify({"error": "Invalid time"}), 400
+    if config is None:
+        return jsonify({"error": f"No backup of device {device_id} at that time"}), 404
+    return Response(config, mimetype='text/plain')
+
+
+@app.route('/devices/<int:device_id>/diff')
+def device_config_diff(device_id):
+    """Unified diff of a device's config between ?from= and ?to= (default: the two latest versions)"""
+    try:
+        old_time, new_time = parse_time(request.args.get('from')), parse_time(request.args.get('to'))
+    except ValueError:
+        return jsonify({"error": "Invalid time"}), 400
+    if old_time is None:
+        versions = config_store.versions(device_id)
+        if not versions:
+            return jsonify({"error": f"No backups of device {device_id}"}), 404
+        old_time = versions[-2][0] if len(versions) > 1 else versions[-1][0]
+    diff = config_store.diff_between(device_id, old_time, new_time)
+    if diff is None:
+        return jsonify({"error": f"No backup of device {device_id} at that time"}), 404
+    return Response(diff, mimetype='text/plain')
+
+
 if __name__ == '__main__':
     # For production, do NOT use 'debug=True' or Flask's built-in server
     # Run this app with a production-grade WSGI server instead, example: